@@ -5,6 +5,7 @@ from sqlalchemy import engine_from_config, pool
 # Alembic dynamically adds context during runtime
 from alembic import context  # type: ignore[attr-defined]
 from pipeline.database import models as pipeline_models  # noqa: F401
+from pipeline.database.search import is_search_table
 from pipeline.ui.config import settings
 
 # this is the Alembic Config object, which provides
@@ -25,6 +26,12 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = pipeline_models.SQLModel.metadata
 
+
+def include_name(name, type_, parent_names) -> bool:
+    """Leave search indexes, which have no model, out of autogenerate."""
+    return not (type_ == "table" and is_search_table(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +54,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -69,7 +77,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,45 @@
+"""add pdf_id_number to individual, for sorting by pdf_id in SQL
+
+Revision ID: 2e6a8d4c7b31
+Revises: 9b4f7c2e1d58
+Create Date: 2026-10-17 18:42:10.118305
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "2e6a8d4c7b31"
+down_revision: Union[str, None] = "9b4f7c2e1d58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "individual",
+        sa.Column("pdf_id_number", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Same as pdf_id_sort_key: the number after "APV", if it is only digits
+    op.execute(
+        "UPDATE individual SET pdf_id_number = CAST(substr(pdf_id, 4) AS INTEGER) "
+        "WHERE pdf_id GLOB 'APV[0-9]*' AND substr(pdf_id, 4) NOT GLOB '*[^0-9]*'"
+    )
+    op.create_index(
+        op.f("ix_individual_pdf_id_number"),
+        "individual",
+        ["pdf_id_number"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_individual_pdf_id_number"), table_name="individual")
+    # Not in batch mode, which would recreate the table without its search triggers
+    op.drop_column("individual", "pdf_id_number")
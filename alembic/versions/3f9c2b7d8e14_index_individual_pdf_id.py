@@ -0,0 +1,29 @@
+"""index Individual pdf_id
+
+Revision ID: 3f9c2b7d8e14
+Revises: e041369e8253
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2b7d8e14"
+down_revision: Union[str, None] = "e041369e8253"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_individual_pdf_id"), "individual", ["pdf_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_individual_pdf_id"), table_name="individual")
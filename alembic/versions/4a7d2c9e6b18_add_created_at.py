@@ -0,0 +1,33 @@
+"""add created_at to individual and formb102r, for audit history
+
+Revision ID: 4a7d2c9e6b18
+Revises: 7c1f5e9a3d24
+Create Date: 2026-10-18 14:02:51.318406
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "4a7d2c9e6b18"
+down_revision: Union[str, None] = "7c1f5e9a3d24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable, as when existing records were created is unknown
+    op.add_column("individual", sa.Column("created_at", sa.DateTime(), nullable=True))
+    op.add_column("formb102r", sa.Column("created_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Not in batch mode, which would recreate the tables without their search triggers
+    op.drop_column("formb102r", "created_at")
+    op.drop_column("individual", "created_at")
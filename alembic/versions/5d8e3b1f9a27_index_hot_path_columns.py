@@ -0,0 +1,57 @@
+"""index hot path columns of FormB102r and drop redundant AuditLog indexes
+
+Revision ID: 5d8e3b1f9a27
+Revises: c7e2a9f4d613
+Create Date: 2026-10-17 16:08:22.504917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8e3b1f9a27"
+down_revision: Union[str, None] = "c7e2a9f4d613"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Loading the forms of an individual
+    op.create_index(
+        op.f("ix_formb102r_individual_id"),
+        "formb102r",
+        ["individual_id"],
+        unique=False,
+    )
+    # Sorting and looking up forms on the home page
+    op.create_index(
+        op.f("ix_formb102r_lastname"), "formb102r", ["lastname"], unique=False
+    )
+    op.create_index(
+        op.f("ix_formb102r_army_number"), "formb102r", ["army_number"], unique=False
+    )
+    # Matching forms imported before source_filename was recorded
+    op.create_index(
+        op.f("ix_formb102r_form_image"), "formb102r", ["form_image"], unique=False
+    )
+    # Both are covered by ix_auditlog_table_name_record_id_timestamp, so they only
+    # slow down writing to the log
+    op.drop_index(op.f("ix_auditlog_table_name"), table_name="auditlog")
+    op.drop_index(op.f("ix_auditlog_record_id"), table_name="auditlog")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        op.f("ix_auditlog_record_id"), "auditlog", ["record_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_auditlog_table_name"), "auditlog", ["table_name"], unique=False
+    )
+    op.drop_index(op.f("ix_formb102r_form_image"), table_name="formb102r")
+    op.drop_index(op.f("ix_formb102r_army_number"), table_name="formb102r")
+    op.drop_index(op.f("ix_formb102r_lastname"), table_name="formb102r")
+    op.drop_index(op.f("ix_formb102r_individual_id"), table_name="formb102r")
@@ -0,0 +1,33 @@
+"""add version to formb102r, for optimistic concurrency control
+
+Revision ID: 7c1f5e9a3d24
+Revises: 2e6a8d4c7b31
+Create Date: 2026-10-18 09:12:37.604219
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1f5e9a3d24"
+down_revision: Union[str, None] = "2e6a8d4c7b31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "formb102r",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Not in batch mode, which would recreate the table without its search triggers
+    op.drop_column("formb102r", "version")
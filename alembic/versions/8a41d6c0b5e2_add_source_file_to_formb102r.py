@@ -0,0 +1,40 @@
+"""add source filename and hash to FormB102r
+
+Revision ID: 8a41d6c0b5e2
+Revises: 3f9c2b7d8e14
+Create Date: 2026-10-17 11:02:15.904512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "8a41d6c0b5e2"
+down_revision: Union[str, None] = "3f9c2b7d8e14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("formb102r", sa.Column("source_filename", sa.String(), nullable=True))
+    op.add_column("formb102r", sa.Column("source_sha256", sa.String(), nullable=True))
+    op.create_index(
+        op.f("ix_formb102r_source_filename"),
+        "formb102r",
+        ["source_filename"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_formb102r_source_filename"), table_name="formb102r")
+    # SQLite does not support DROP COLUMN before 3.35, so recreate the table
+    with op.batch_alter_table("formb102r") as batch_op:
+        batch_op.drop_column("source_sha256")
+        batch_op.drop_column("source_filename")
@@ -0,0 +1,48 @@
+"""add full-text search indexes of FormB102r and Individual
+
+Revision ID: 9b4f7c2e1d58
+Revises: 5d8e3b1f9a27
+Create Date: 2026-10-17 17:42:10.286531
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op  # type: ignore[attr-defined]
+from pipeline.database.search import search_index_ddl, search_table_name
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4f7c2e1d58"
+down_revision: Union[str, None] = "5d8e3b1f9a27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns indexed as of this revision
+SEARCH_COLUMNS = {
+    "formb102r": (
+        "lastname",
+        "firstname",
+        "army_number",
+        "regiment_or_corp",
+        "occupation",
+        "hometown",
+    ),
+    "individual": ("lastname", "firstname", "army_number"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The last statement indexes the existing rows
+    for table_name, columns in SEARCH_COLUMNS.items():
+        for statement in search_index_ddl(table_name, columns):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in SEARCH_COLUMNS:
+        name = search_table_name(table_name)
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {name}")
@@ -0,0 +1,59 @@
+"""index AuditLog history and create AuditSnapshot table
+
+Revision ID: c7e2a9f4d613
+Revises: 8a41d6c0b5e2
+Create Date: 2026-10-17 14:26:53.117630
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2a9f4d613"
+down_revision: Union[str, None] = "8a41d6c0b5e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_auditlog_table_name_record_id_timestamp",
+        "auditlog",
+        ["table_name", "record_id", "timestamp"],
+        unique=False,
+    )
+    op.create_table(
+        "auditsnapshot",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("data", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_auditsnapshot_table_name_record_id_timestamp",
+        "auditsnapshot",
+        ["table_name", "record_id", "timestamp"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # SQLite drops indexes automatically with the table
+        op.drop_table("auditsnapshot")
+    else:
+        op.drop_index(
+            "ix_auditsnapshot_table_name_record_id_timestamp",
+            table_name="auditsnapshot",
+        )
+        op.drop_table("auditsnapshot")
+    op.drop_index("ix_auditlog_table_name_record_id_timestamp", table_name="auditlog")
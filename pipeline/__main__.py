@@ -1,20 +1,38 @@
+import json
 import time
+from datetime import datetime
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 
 import typer
+from sqlmodel import Session
 
+from pipeline.database.helpers.audit_history import (
+    AUDITED_MODELS,
+    create_snapshots,
+    reconstruct_records,
+)
+from pipeline.database.init_db import engine
 from pipeline.logging_config import setup_logging
-from pipeline.tasks.db_import_b102r import import_all_in_dir
-from pipeline.tasks.image_processing import resize_image, resize_images_from_dir
+from pipeline.tasks.db_import_b102r import DEFAULT_BATCH_SIZE, import_all_in_dir
+from pipeline.tasks.image_processing import (
+    PYRAMID_WIDTHS,
+    THUMBNAIL_WIDTH,
+    resize_image,
+    resize_image_pyramid,
+    resize_images_from_dir,
+    resize_images_pyramid_from_dir,
+)
 from pipeline.tasks.pdf_processing import (
+    extract_and_thumbnail_dir,
+    extract_and_thumbnail_pdf,
     extract_images_from_dir,
     extract_images_from_pdf,
 )
+from pipeline.tasks.tiling import create_deep_zoom, create_deep_zoom_from_dir
 
 setup_logging()
 VALID_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
-THUMBNAIL_WIDTH = 150
 
 app = typer.Typer()
 
@@ -23,10 +41,19 @@ Example usage:
 
 $ python -m pipeline extract-images --pdf-path path/to/file.pdf \
     --output-dir output/ --log-level INFO
+$ python -m pipeline extract-images --pdf-path path/to/dir \
+    --output-dir output/ --workers 4
 $ python -m pipeline thumbnail-images --img-path path/to/img.jpg \
     --output-dir output/thumbnails --log-level INFO
+$ python -m pipeline extract-and-thumbnail --pdf-path path/to/dir \
+    --output-dir output/ --width 150 --width 600 --workers 4
 $ python -m pipeline import-b102r --input-dir path/to/dir \
     --log-level INFO
+$ python -m pipeline import-b102r --input-dir path/to/dir \
+    --batch-size 1000 --workers 4
+$ python -m pipeline audit-snapshot
+$ python -m pipeline audit-state --table formb102r --record-id 11 \
+    --as-of 2025-06-01T12:00:00
 """
 
 
@@ -46,6 +73,24 @@ def extract_images(
             help="Directory where the extracted images will be saved.",
         ),
     ],
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to use when extracting a directory.",
+            min=1,
+        ),
+    ] = 1,
+    force: Annotated[
+        bool,
+        typer.Option(
+            "--force",
+            "-f",
+            help="Re-extract every PDF in a directory, ignoring the manifest of "
+            "PDFs completed by earlier runs.",
+        ),
+    ] = False,
     log_level: Annotated[
         str,
         typer.Option(
@@ -64,7 +109,10 @@ def extract_images(
     directory.
 
     If a directory is passed, each PDF is processed in turn, and a summary is shown
-    at the end. Use the --log-level option to control verbosity. Defaults to WARNING.
+    at the end. Use --workers to extract PDFs in parallel across several processes.
+    PDFs that are unchanged since an earlier run into the same output directory are
+    skipped; use --force to extract them again.
+    Use the --log-level option to control verbosity. Defaults to WARNING.
     """
     log_level = log_level.upper()
 
@@ -88,7 +136,9 @@ def extract_images(
     output_dir = Path(output_dir)
 
     if pdf_path.is_dir():
-        results = extract_images_from_dir(pdf_path, output_dir)
+        results = extract_images_from_dir(
+            pdf_path, output_dir, workers=workers, resume=not force
+        )
         total_pdfs = len(results)
         total_images = sum(len(imgs) for imgs in results.values())
         total_time = time.time() - start_time
@@ -139,6 +189,15 @@ def thumbnail_images(
             help="Directory where the resized images will be saved.",
         ),
     ],
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to use when resizing a directory.",
+            min=1,
+        ),
+    ] = 1,
     log_level: Annotated[
         str,
         typer.Option(
@@ -157,7 +216,8 @@ def thumbnail_images(
     output directory, with filenames indicating their new size.
 
     If a directory is passed, all supported image files are processed in turn, and a
-    summary is shown at the end. Use the --log-level option to control verbosity.
+    summary is shown at the end. Use --workers to resize images in parallel across
+    several processes. Use the --log-level option to control verbosity.
     Defaults to WARNING.
     """
     log_level = log_level.upper()
@@ -179,7 +239,9 @@ def thumbnail_images(
     start_time = time.time()
 
     if img_path.is_dir():
-        results = resize_images_from_dir(img_path, output_dir, width=THUMBNAIL_WIDTH)
+        results = resize_images_from_dir(
+            img_path, output_dir, width=THUMBNAIL_WIDTH, workers=workers
+        )
         total_images = sum(len(paths) for paths in results.values())
         total_time = time.time() - start_time
         typer.echo(
@@ -213,9 +275,122 @@ def thumbnail_images(
 
 
 @app.command()
-def extract_and_thumbnail():
-    """Extract images from a PDF and create thumbnails for them in one step."""
-    raise NotImplementedError
+def extract_and_thumbnail(
+    pdf_path: Annotated[
+        Path,
+        typer.Option(
+            "--pdf-path", "-p", help="Path to the PDF file or directory of PDFs."
+        ),
+    ],
+    output_dir: Annotated[
+        Path,
+        typer.Option(
+            "--output-dir",
+            "-o",
+            help="Directory where the extracted images will be saved.",
+        ),
+    ],
+    widths: Annotated[
+        Optional[List[int]],
+        typer.Option(
+            "--width",
+            help="Thumbnail width in pixels. Repeat for several widths. "
+            "Defaults to 150.",
+        ),
+    ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to use when processing a directory.",
+            min=1,
+        ),
+    ] = 1,
+    log_level: Annotated[
+        str,
+        typer.Option(
+            "--log-level",
+            "-l",
+            help="Set the logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL",
+            case_sensitive=False,
+        ),
+    ] = "WARNING",
+):
+    """
+    Extract images from a PDF and create thumbnails for them in one step.
+
+    This command takes either a single PDF file or a directory of PDFs. Each embedded
+    image is saved to the output directory and, in the same pass, downscaled to
+    thumbnails that are saved in a "thumbnails" subfolder. This avoids reading and
+    decoding every image from disk again, as happens when running extract-images
+    followed by thumbnail-images.
+
+    If a directory is passed, the images for each PDF are saved in a subfolder named
+    after the PDF, and a summary is shown at the end. Use --workers to process PDFs in
+    parallel. Use the --log-level option to control verbosity. Defaults to WARNING.
+    """
+    log_level = log_level.upper()
+
+    if log_level not in VALID_LOG_LEVELS:
+        typer.echo(
+            typer.style(
+                f"Invalid log level: {log_level}. Choose from: DEBUG, INFO, "
+                f"WARNING, ERROR, CRITICAL.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    setup_logging(log_level)
+
+    start_time = time.time()
+    widths = widths or [THUMBNAIL_WIDTH]
+
+    if pdf_path.is_dir():
+        results = extract_and_thumbnail_dir(
+            pdf_path, output_dir, widths=widths, workers=workers
+        )
+        total_images = sum(len(images) for images in results.values())
+        total_thumbnails = sum(
+            len(thumbnails)
+            for images in results.values()
+            for thumbnails in images.values()
+        )
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Extracted {total_images} images and {total_thumbnails} thumbnails "
+                f"from {len(results)} PDFs into {output_dir} in "
+                f"{total_time:.1f} seconds",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    elif pdf_path.is_file():
+        images = extract_and_thumbnail_pdf(pdf_path, output_dir, widths=widths)
+        total_thumbnails = sum(len(thumbnails) for thumbnails in images.values())
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Extracted {len(images)} images and {total_thumbnails} thumbnails "
+                f"to {output_dir} in {total_time:.1f} seconds",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    else:
+        typer.echo(
+            typer.style(
+                "Error: --pdf-path must be a valid file or directory.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
 
 
 @app.command("resize-images")
@@ -240,6 +415,14 @@ def resize_images(
         Optional[int],
         typer.Option("--height", "-h", help="Target height in pixels."),
     ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            help="Number of worker processes to use when resizing a directory.",
+            min=1,
+        ),
+    ] = 1,
     log_level: Annotated[
         str,
         typer.Option(
@@ -258,7 +441,8 @@ def resize_images(
     target dimensions. If both width and height are given, images are resized to fit
     within those bounds while preserving the aspect ratio.
 
-    Use --log-level to control verbosity. Defaults to WARNING.
+    Use --workers to resize a directory of images in parallel across several
+    processes. Use --log-level to control verbosity. Defaults to WARNING.
     """
     log_level = log_level.upper()
     if log_level not in VALID_LOG_LEVELS:
@@ -289,7 +473,7 @@ def resize_images(
 
     if img_path.is_dir():
         results = resize_images_from_dir(
-            img_path, output_dir, width=width, height=height
+            img_path, output_dir, width=width, height=height, workers=workers
         )
         total_images = sum(len(paths) for paths in results.values())
         total_time = time.time() - start_time
@@ -323,6 +507,206 @@ def resize_images(
         raise typer.Exit(code=1)
 
 
+@app.command("pyramid-images")
+def pyramid_images(
+    img_path: Annotated[
+        Path,
+        typer.Option(
+            "--img-path", "-p", help="Path to the image file or directory of images."
+        ),
+    ],
+    output_dir: Annotated[
+        Path,
+        typer.Option(
+            "--output-dir", "-o", help="Directory where resized images will be saved."
+        ),
+    ],
+    widths: Annotated[
+        Optional[List[int]],
+        typer.Option(
+            "--width",
+            help="Target width in pixels. Repeat for several widths. "
+            "Defaults to 150, 600 and 1200.",
+        ),
+    ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to use when resizing a directory.",
+            min=1,
+        ),
+    ] = 1,
+    log_level: Annotated[
+        str,
+        typer.Option(
+            "--log-level",
+            "-l",
+            help="Set logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL",
+            case_sensitive=False,
+        ),
+    ] = "WARNING",
+):
+    """
+    Resize image(s) to several widths at once, decoding each image only once.
+
+    Takes either a single image file or a directory of image files and saves a copy
+    of each at every requested width, preserving aspect ratio. Filenames are suffixed
+    with the target width, e.g. _w600px. Each size is downscaled from the next size
+    up, so a full pyramid costs little more than the largest size alone.
+
+    Use --workers to resize a directory of images in parallel across several
+    processes. Use --log-level to control verbosity. Defaults to WARNING.
+    """
+    log_level = log_level.upper()
+    if log_level not in VALID_LOG_LEVELS:
+        typer.echo(
+            typer.style(
+                f"Invalid log level: {log_level}. "
+                f"Choose from: DEBUG, INFO, WARNING, ERROR, CRITICAL.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    setup_logging(log_level)
+    start_time = time.time()
+    widths = widths or list(PYRAMID_WIDTHS)
+
+    if img_path.is_dir():
+        results = resize_images_pyramid_from_dir(
+            img_path, output_dir, widths=widths, workers=workers
+        )
+        total_images = sum(len(paths) for paths in results.values())
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Resized {total_images} images from {len(results)} source files "
+                f"into {output_dir} in {total_time:.1f} seconds",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    elif img_path.is_file():
+        result = resize_image_pyramid(img_path, output_dir, widths=widths)
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Resized image to {len(result)} widths in {total_time:.1f} seconds",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    else:
+        typer.echo(
+            typer.style(
+                "Error: --img-path must be a valid file or directory.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+
+@app.command("tile-images")
+def tile_images(
+    img_path: Annotated[
+        Path,
+        typer.Option(
+            "--img-path", "-p", help="Path to the image file or directory of images."
+        ),
+    ],
+    output_dir: Annotated[
+        Path,
+        typer.Option(
+            "--output-dir", "-o", help="Directory where the tiles will be saved."
+        ),
+    ],
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to use when tiling a directory.",
+            min=1,
+        ),
+    ] = 1,
+    log_level: Annotated[
+        str,
+        typer.Option(
+            "--log-level",
+            "-l",
+            help="Set logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL",
+            case_sensitive=False,
+        ),
+    ] = "WARNING",
+):
+    """
+    Create Deep Zoom tile pyramids for an image file or a directory of images.
+
+    Each image is cut into 254px tiles at every zoom level and described by a .dzi
+    file, so that the muster correction page can load only the tiles that are
+    visible instead of the whole original image.
+
+    If a directory is passed, images in its subfolders are also tiled (except
+    thumbnails) and the folder layout is mirrored in the output directory. Point
+    TILES_DIR in the .env file at the output directory to use the tiles in muster.
+    Use --workers to tile images in parallel. Use --log-level to control verbosity.
+    Defaults to WARNING.
+    """
+    log_level = log_level.upper()
+    if log_level not in VALID_LOG_LEVELS:
+        typer.echo(
+            typer.style(
+                f"Invalid log level: {log_level}. "
+                f"Choose from: DEBUG, INFO, WARNING, ERROR, CRITICAL.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    setup_logging(log_level)
+    start_time = time.time()
+
+    if img_path.is_dir():
+        results = create_deep_zoom_from_dir(img_path, output_dir, workers=workers)
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Tiled {len(results)} images into {output_dir} in "
+                f"{total_time:.1f} seconds",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    elif img_path.is_file():
+        result = create_deep_zoom(img_path, output_dir)
+        total_time = time.time() - start_time
+        typer.echo(
+            typer.style(
+                f"Tiled image in {total_time:.1f} seconds: {result}",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+    else:
+        typer.echo(
+            typer.style(
+                "Error: --img-path must be a valid file or directory.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+
 @app.command("import-b102r")
 def import_b102r(
     input_dir: Annotated[
@@ -333,6 +717,24 @@ def import_b102r(
             help="Directory containing B102r JSON files to import.",
         ),
     ],
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            "-b",
+            help="Number of JSON files to import per database transaction.",
+            min=1,
+        ),
+    ] = DEFAULT_BATCH_SIZE,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            help="Number of worker processes to parse JSON files with.",
+            min=1,
+        ),
+    ] = 1,
     log_level: Annotated[
         str,
         typer.Option(
@@ -347,6 +749,10 @@ def import_b102r(
     Import all B102r-form JSON files from a directory into the database.
 
     This command loads raw data extracted from forms into the database for review.
+    Files are imported in batches, each committed as a single transaction; use
+    --batch-size to set how many files go in each batch. A file that fails to import
+    is skipped without affecting the rest of its batch. Use --workers to parse files
+    in parallel across several processes while they are written to the database.
 
     Use the --log-level option to control verbosity. Defaults to WARNING.
     """
@@ -379,7 +785,7 @@ def import_b102r(
         )
         raise typer.Exit(code=1)
 
-    num_imported = import_all_in_dir(input_dir)
+    num_imported = import_all_in_dir(input_dir, batch_size=batch_size, workers=workers)
 
     elapsed = time.time() - start_time
     typer.echo(
@@ -392,5 +798,204 @@ def import_b102r(
     )
 
 
+def _audited_model(table: str):
+    """Look up the model for an audited table name, or exit with an error."""
+    model_class = AUDITED_MODELS.get(table.lower())
+    if model_class is None:
+        typer.echo(
+            typer.style(
+                f"Invalid table: {table}. Choose from: "
+                f"{', '.join(AUDITED_MODELS)}.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+    return model_class
+
+
+@app.command("audit-snapshot")
+def audit_snapshot(
+    table: Annotated[
+        Optional[str],
+        typer.Option(
+            "--table",
+            "-t",
+            help="Table to snapshot: formb102r or individual. Defaults to both.",
+        ),
+    ] = None,
+    min_changes: Annotated[
+        int,
+        typer.Option(
+            "--min-changes",
+            "-m",
+            help="Only snapshot records with at least this many changes since their "
+            "latest snapshot.",
+            min=1,
+        ),
+    ] = 1,
+    log_level: Annotated[
+        str,
+        typer.Option(
+            "--log-level",
+            "-l",
+            help="Set the logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL.",
+            case_sensitive=False,
+        ),
+    ] = "WARNING",
+):
+    """
+    Checkpoint the current state of changed records for audit history.
+
+    Reconstructing a record's state at a point in time (see audit-state) replays
+    the audit log from the nearest checkpoint, so running this periodically, e.g.
+    nightly, keeps reconstruction fast however long the audit log grows.
+
+    Use the --log-level option to control verbosity. Defaults to WARNING.
+    """
+    log_level = log_level.upper()
+
+    if log_level not in VALID_LOG_LEVELS:
+        typer.echo(
+            typer.style(
+                f"Invalid log level: {log_level}. Choose from: DEBUG, INFO, "
+                f"WARNING, ERROR, CRITICAL.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    setup_logging(log_level)
+
+    model_classes = [_audited_model(table)] if table else list(AUDITED_MODELS.values())
+    with Session(engine) as session:
+        for model_class in model_classes:
+            num_snapshots = create_snapshots(session, model_class, min_changes)
+            typer.echo(
+                typer.style(
+                    f"Created {num_snapshots} snapshots of "
+                    f"{model_class.__tablename__} records.",
+                    fg=typer.colors.GREEN,
+                    bold=True,
+                )
+            )
+
+
+@app.command("audit-state")
+def audit_state(
+    table: Annotated[
+        str,
+        typer.Option(
+            "--table", "-t", help="Table of the records: formb102r or individual."
+        ),
+    ],
+    as_of: Annotated[
+        str,
+        typer.Option(
+            "--as-of",
+            "-a",
+            help="Point in time in ISO 8601 format, e.g. 2025-06-01T12:00:00. "
+            "Taken to be UTC unless it includes an offset.",
+        ),
+    ],
+    record_id: Annotated[
+        Optional[int],
+        typer.Option(
+            "--record-id",
+            "-r",
+            help="Id of the record to reconstruct. Defaults to the whole table.",
+        ),
+    ] = None,
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output",
+            "-o",
+            help="JSON file to write the state to. Defaults to standard output.",
+        ),
+    ] = None,
+    log_level: Annotated[
+        str,
+        typer.Option(
+            "--log-level",
+            "-l",
+            help="Set the logging level: DEBUG, INFO, WARNING, ERROR, CRITICAL.",
+            case_sensitive=False,
+        ),
+    ] = "WARNING",
+):
+    """
+    Reconstruct the state of a record, or of a whole table, at a point in time.
+
+    The state is rebuilt from the audit log, starting from the nearest snapshot
+    created by audit-snapshot. Field values are given as they are recorded in the
+    audit log, i.e. as text.
+
+    Use the --log-level option to control verbosity. Defaults to WARNING.
+    """
+    log_level = log_level.upper()
+
+    if log_level not in VALID_LOG_LEVELS:
+        typer.echo(
+            typer.style(
+                f"Invalid log level: {log_level}. Choose from: DEBUG, INFO, "
+                f"WARNING, ERROR, CRITICAL.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    setup_logging(log_level)
+
+    model_class = _audited_model(table)
+    try:
+        as_of_time = datetime.fromisoformat(as_of)
+    except ValueError:
+        typer.echo(
+            typer.style(
+                f"Invalid --as-of time: {as_of}. Use ISO 8601 format, e.g. "
+                f"2025-06-01T12:00:00.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1) from None
+
+    with Session(engine) as session:
+        record_ids = [record_id] if record_id is not None else None
+        states = reconstruct_records(session, model_class, as_of_time, record_ids)
+
+    if record_id is not None and record_id not in states:
+        typer.echo(
+            typer.style(
+                f"Error: no {table} record with id {record_id} found.",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    result = states[record_id] if record_id is not None else states
+    result_json = json.dumps(result, indent=2, ensure_ascii=False)
+    if output is None:
+        typer.echo(result_json)
+    else:
+        output.write_text(result_json + "\n", encoding="utf-8")
+        typer.echo(
+            typer.style(
+                f"Wrote the state of {len(states)} records to {output}.",
+                fg=typer.colors.GREEN,
+                bold=True,
+            )
+        )
+
+
 if __name__ == "__main__":
     app()
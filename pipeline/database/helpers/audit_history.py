@@ -0,0 +1,327 @@
+"""
+Reconstruct the state of records at a point in time from the AuditLog.
+
+Values are the labels stored in AuditLog, i.e. `str(value or "")`, so the state of a
+record is a dict of field name to label rather than a model instance. Fields whose
+changes are not logged (UNAUDITED_FIELDS) are left out, as their past values are
+unknown.
+
+The state of a record at time T is rebuilt from its latest AuditSnapshot taken at or
+before T, by replaying the changes logged after the snapshot up to T. A record with
+no such snapshot is rebuilt from its earliest snapshot after T instead, or else from
+its current state, by undoing the changes logged after T, unless it was created after
+T. Either way only the changes between T and the nearest checkpoint are read, using
+the (table_name, record_id, timestamp) index on AuditLog. For a record that has never
+been snapshotted, that is every change since T, so snapshots should be created
+periodically (see `create_snapshots`).
+
+When records were created is only known for those created since `created_at` was
+added, so older records are reconstructed as of any time, even before they existed.
+"""
+
+import json
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any, Optional, Union
+
+from sqlalchemy import func, insert, or_
+from sqlmodel import Session, col, select
+
+from pipeline.database.models import AuditLog, AuditSnapshot, FormB102r, Individual
+from pipeline.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+AuditedModel = Union[FormB102r, Individual]
+
+# Models whose changes are recorded in AuditLog, by table name
+AUDITED_MODELS: dict[str, type[AuditedModel]] = {
+    str(FormB102r.__tablename__): FormB102r,
+    str(Individual.__tablename__): Individual,
+}
+
+RecordState = dict[str, str]
+
+# Bookkeeping fields whose changes are not logged in AuditLog, or are derived from
+# other fields, so that their current values say nothing about the past
+UNAUDITED_FIELDS = frozenset(
+    {
+        "id",
+        "version",
+        "created_at",
+        "pdf_id_number",
+        "source_filename",
+        "source_sha256",
+    }
+)
+
+
+def _to_label(value: Any) -> str:
+    """Convert a field value to the label that AuditLog records for it."""
+    return str(value or "")
+
+
+def _from_json_value(value: Optional[str]) -> str:
+    """Read the label from an AuditLog old_value or new_value."""
+    if not value:
+        return ""
+    return json.loads(value).get("label", "")
+
+
+def _to_utc(timestamp: datetime) -> datetime:
+    """Convert a timestamp to naive UTC, as timestamps are stored in SQLite."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _record_state(record: AuditedModel) -> RecordState:
+    return {
+        field: _to_label(getattr(record, field))
+        for field in type(record).model_fields
+        if field not in UNAUDITED_FIELDS
+    }
+
+
+def _snapshot_state(snapshot: AuditSnapshot) -> RecordState:
+    # Snapshots taken before a field was added to UNAUDITED_FIELDS may include it
+    return {
+        field: label
+        for field, label in json.loads(snapshot.data).items()
+        if field not in UNAUDITED_FIELDS
+    }
+
+
+def _latest_snapshot_times(table_name: str, as_of: datetime):
+    """Subquery of the time of the latest snapshot of each record at or before as_of."""
+    return (
+        select(
+            col(AuditSnapshot.record_id).label("record_id"),
+            func.max(AuditSnapshot.timestamp).label("timestamp"),
+        )
+        .where(
+            AuditSnapshot.table_name == table_name,
+            col(AuditSnapshot.timestamp) <= as_of,
+        )
+        .group_by(col(AuditSnapshot.record_id))
+        .subquery()
+    )
+
+
+def _earliest_snapshot_times_after(table_name: str, as_of: datetime):
+    """Subquery of the time of the earliest snapshot of each record after as_of."""
+    return (
+        select(
+            col(AuditSnapshot.record_id).label("record_id"),
+            func.min(AuditSnapshot.timestamp).label("timestamp"),
+        )
+        .where(
+            AuditSnapshot.table_name == table_name,
+            col(AuditSnapshot.timestamp) > as_of,
+        )
+        .group_by(col(AuditSnapshot.record_id))
+        .subquery()
+    )
+
+
+def reconstruct_records(
+    session: Session,
+    model_class: type[AuditedModel],
+    as_of: datetime,
+    record_ids: Optional[Iterable[int]] = None,
+) -> dict[int, RecordState]:
+    """
+    Reconstruct the state of records of a model as they were at a point in time.
+
+    Args:
+        session (Session): Database session.
+        model_class (type[AuditedModel]): Model of the records, e.g. FormB102r.
+        as_of (datetime): Point in time. Naive timestamps are taken to be UTC.
+        record_ids (Iterable[int], optional): Ids of the records to reconstruct.
+            Defaults to every record currently in the table.
+
+    Returns:
+        dict[int, RecordState]: State of each record, keyed by id. Records that no
+        longer exist and have no snapshot, or that were created after `as_of`, are
+        omitted. Records with no `created_at` are taken to have always existed.
+    """
+    table_name = str(model_class.__tablename__)
+    as_of = _to_utc(as_of)
+    ids = set(record_ids) if record_ids is not None else None
+
+    # Replay forward from the latest snapshot at or before as_of
+    latest = _latest_snapshot_times(table_name, as_of)
+    snapshot_stmt = select(AuditSnapshot).join(
+        latest,
+        (col(AuditSnapshot.record_id) == latest.c.record_id)
+        & (col(AuditSnapshot.timestamp) == latest.c.timestamp),
+    )
+    if ids is not None:
+        snapshot_stmt = snapshot_stmt.where(col(AuditSnapshot.record_id).in_(ids))
+
+    states: dict[int, RecordState] = {
+        snapshot.record_id: _snapshot_state(snapshot)
+        for snapshot in session.exec(snapshot_stmt)
+    }
+
+    if states:
+        replay_stmt = (
+            select(AuditLog)
+            .join(latest, col(AuditLog.record_id) == latest.c.record_id)
+            .where(
+                AuditLog.table_name == table_name,
+                col(AuditLog.timestamp) > latest.c.timestamp,
+                col(AuditLog.timestamp) <= as_of,
+            )
+            .order_by(col(AuditLog.timestamp), col(AuditLog.id))
+        )
+        if ids is not None:
+            replay_stmt = replay_stmt.where(col(AuditLog.record_id).in_(ids))
+        for change in session.exec(replay_stmt):
+            if change.field_name not in UNAUDITED_FIELDS:
+                states[change.record_id][change.field_name] = _from_json_value(
+                    change.new_value
+                )
+
+    # Undo changes made after as_of to the earliest snapshot after it of the other
+    # records, or else to their current state, leaving out records created later
+    id_column = col(model_class.id)
+    created_at = col(model_class.created_at)
+    earliest = _earliest_snapshot_times_after(table_name, as_of)
+    later_snapshot_stmt = select(AuditSnapshot).join(
+        earliest,
+        (col(AuditSnapshot.record_id) == earliest.c.record_id)
+        & (col(AuditSnapshot.timestamp) == earliest.c.timestamp),
+    )
+    created_later_stmt = (
+        select(id_column)
+        .join(earliest, id_column == earliest.c.record_id)
+        .where(created_at > as_of)
+    )
+    current_stmt = select(model_class).where(
+        or_(created_at.is_(None), created_at <= as_of),
+        id_column.not_in(select(latest.c.record_id)),
+        id_column.not_in(select(earliest.c.record_id)),
+    )
+    if ids is not None:
+        later_snapshot_stmt = later_snapshot_stmt.where(
+            col(AuditSnapshot.record_id).in_(ids)
+        )
+        created_later_stmt = created_later_stmt.where(id_column.in_(ids))
+        current_stmt = current_stmt.where(id_column.in_(ids))
+
+    undone: dict[int, RecordState] = {
+        snapshot.record_id: _snapshot_state(snapshot)
+        for snapshot in session.exec(later_snapshot_stmt)
+        if snapshot.record_id not in states
+    }
+    for record_id in session.exec(created_later_stmt):
+        if record_id is not None:
+            undone.pop(record_id, None)
+    current: list[AuditedModel] = list(session.exec(current_stmt))  # type: ignore
+    undone.update(
+        (record.id, _record_state(record))
+        for record in current
+        if record.id is not None
+    )
+
+    if undone:
+        undo_stmt = (
+            select(AuditLog)
+            .outerjoin(earliest, col(AuditLog.record_id) == earliest.c.record_id)
+            .where(
+                AuditLog.table_name == table_name,
+                col(AuditLog.timestamp) > as_of,
+                col(AuditLog.record_id).not_in(select(latest.c.record_id)),
+                or_(
+                    earliest.c.timestamp.is_(None),
+                    col(AuditLog.timestamp) <= earliest.c.timestamp,
+                ),
+            )
+            .order_by(col(AuditLog.timestamp).desc(), col(AuditLog.id).desc())
+        )
+        if ids is not None:
+            undo_stmt = undo_stmt.where(col(AuditLog.record_id).in_(undone.keys()))
+        for change in session.exec(undo_stmt):
+            if change.record_id in undone and change.field_name not in UNAUDITED_FIELDS:
+                undone[change.record_id][change.field_name] = _from_json_value(
+                    change.old_value
+                )
+
+    states.update(undone)
+    return dict(sorted(states.items()))
+
+
+def reconstruct_record(
+    session: Session, model_class: type[AuditedModel], record_id: int, as_of: datetime
+) -> Optional[RecordState]:
+    """Reconstruct the state of one record at a point in time, or None if unknown."""
+    return reconstruct_records(session, model_class, as_of, [record_id]).get(record_id)
+
+
+def create_snapshots(
+    session: Session, model_class: type[AuditedModel], min_changes: int = 1
+) -> int:
+    """
+    Checkpoint the current state of records that have changed since their last
+    snapshot, so that later reconstructions can start from it.
+
+    Intended to be run periodically, e.g. nightly. Records with fewer than
+    `min_changes` AuditLog changes since their latest snapshot (or ever, if they
+    have none) are skipped, since reconstructing them is already cheap.
+
+    Args:
+        session (Session): Database session. The snapshots are committed.
+        model_class (type[AuditedModel]): Model of the records, e.g. FormB102r.
+        min_changes (int): Minimum number of changes since the latest snapshot for
+            a record to be checkpointed.
+
+    Returns:
+        int: Number of snapshots created.
+
+    Raises:
+        ValueError: If `min_changes` is less than 1.
+    """
+    if min_changes < 1:
+        raise ValueError(
+            f"Minimum number of changes must be at least 1, got {min_changes}"
+        )
+
+    table_name = str(model_class.__tablename__)
+    timestamp = _to_utc(datetime.now(timezone.utc))
+
+    latest = _latest_snapshot_times(table_name, timestamp)
+    changed_stmt = (
+        select(col(AuditLog.record_id))
+        .outerjoin(latest, col(AuditLog.record_id) == latest.c.record_id)
+        .where(
+            AuditLog.table_name == table_name,
+            (latest.c.timestamp.is_(None))
+            | (col(AuditLog.timestamp) > latest.c.timestamp),
+        )
+        .group_by(col(AuditLog.record_id))
+        .having(func.count() >= min_changes)
+    )
+    changed_ids = set(session.exec(changed_stmt))
+
+    snapshots = []
+    if changed_ids:
+        records_stmt = select(model_class).where(col(model_class.id).in_(changed_ids))
+        records: list[AuditedModel] = list(session.exec(records_stmt))  # type: ignore
+        snapshots = [
+            {
+                "table_name": table_name,
+                "record_id": record.id,
+                "data": json.dumps(_record_state(record)),
+                "timestamp": timestamp,
+            }
+            for record in records
+        ]
+    if snapshots:
+        session.execute(insert(AuditSnapshot), snapshots)
+    session.commit()
+
+    logger.info("Created %d %s snapshots", len(snapshots), table_name)
+    return len(snapshots)
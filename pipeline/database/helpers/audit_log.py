@@ -1,11 +1,15 @@
 import json
 from datetime import datetime, timezone
-from typing import Optional, Union, get_args, get_origin
+from typing import Any, Optional, Union, get_args, get_origin
 
+from sqlalchemy import insert
 from sqlmodel import Session, SQLModel
 
 from pipeline.database.models import AuditLog
 
+# change_reason of changes made by re-importing a form, rather than by a reviewer
+IMPORT_CHANGE_REASON = "import"
+
 
 def _to_json_value(label: str, id_: int | None = None) -> str:
     """Create a JSON string for storing lookup/text field values."""
@@ -41,6 +45,44 @@ def _infer_field_type(model: type[SQLModel], field_name: str) -> Optional[str]:
     return outer_type.__name__
 
 
+def build_change(
+    *,
+    model_class: type[SQLModel],
+    record_id: int,
+    field_name: str,
+    old_label: str,
+    new_label: str,
+    old_id: int | None = None,
+    new_id: int | None = None,
+    change_reason: str = "manual",
+    session_id: str | None = None,
+    timestamp: datetime | None = None,
+) -> dict[str, Any]:
+    """Build the column values of an AuditLog row for one changed field."""
+    return {
+        "table_name": model_class.__tablename__,
+        "record_id": record_id,
+        "field_name": field_name,
+        "field_type": _infer_field_type(model_class, field_name),
+        "old_value": _to_json_value(old_label, old_id),
+        "new_value": _to_json_value(new_label, new_id),
+        "change_reason": change_reason,
+        "session_id": session_id,
+        "timestamp": timestamp or datetime.now(timezone.utc),
+    }
+
+
+def log_changes(session: Session, changes: list[dict[str, Any]]) -> None:
+    """
+    Insert audit log rows built by `build_change` in a single bulk INSERT.
+
+    Doesn't commit, so the rows are written in the same transaction as the change
+    they record; the caller commits both together.
+    """
+    if changes:
+        session.execute(insert(AuditLog), changes)
+
+
 def log_change(
     session: Session,
     *,
@@ -54,20 +96,17 @@ def log_change(
     change_reason: str = "manual",
     session_id: str | None = None,
 ):
-    """Insert an audit log row into the database."""
-    field_type = _infer_field_type(model_class, field_name)
-    table_name = model_class.__tablename__
-
-    audit_log = AuditLog(
-        table_name=table_name,
+    """Insert an audit log row into the database and commit it."""
+    change = build_change(
+        model_class=model_class,
         record_id=record_id,
         field_name=field_name,
-        field_type=field_type,
-        old_value=_to_json_value(old_label, old_id),
-        new_value=_to_json_value(new_label, new_id),
+        old_label=old_label,
+        new_label=new_label,
+        old_id=old_id,
+        new_id=new_id,
         change_reason=change_reason,
         session_id=session_id,
-        timestamp=datetime.now(timezone.utc),
     )
-    session.add(audit_log)
+    session.add(AuditLog(**change))
     session.commit()
@@ -0,0 +1,176 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from pipeline.database.helpers.audit_log import log_changes
+from pipeline.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_FLUSH_SIZE = 100
+# Rows that can wait to be written before submit() writes them itself
+DEFAULT_MAX_QUEUED = 10_000
+# Longest wait, in seconds, between attempts to write a batch that failed
+MAX_RETRY_DELAY = 60.0
+
+# Queued by stop() to tell the writer thread to drain the queue and exit
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Write audit log rows on a background thread, in batches.
+
+    Rows built by `build_change` are passed to `submit`, which only queues them, so
+    a caller such as a UI event handler doesn't wait for SQLite to commit. The
+    writer thread inserts queued rows with one bulk insert and commit per batch of
+    at most `flush_size` rows, when `flush_size` rows are waiting or
+    `flush_interval` seconds after the first row of a batch arrived, whichever is
+    sooner.
+
+    A batch that fails to be written is retried, waiting twice as long after each
+    failure (up to MAX_RETRY_DELAY seconds), while later rows wait in the queue. At
+    most `max_queued` rows can wait; once the queue is full, `submit` writes rows
+    itself, so callers are slowed down rather than the queue growing without limit
+    while the database is unavailable.
+
+    Rows are written in a separate transaction from the change they record, so
+    they can be lost if the process is killed before they are flushed. `stop`
+    writes everything queued before it was called, trying each batch once more.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ):
+        if flush_interval <= 0:
+            raise ValueError(f"Flush interval must be positive, got {flush_interval}")
+        if flush_size < 1:
+            raise ValueError(f"Flush size must be at least 1, got {flush_size}")
+        if max_queued < flush_size:
+            raise ValueError(
+                f"Maximum queued rows must be at least the flush size, got {max_queued}"
+            )
+
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queued)
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self.running:
+            raise RuntimeError("Audit log writer is already running")
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="audit-log-writer", daemon=True
+        )
+        self._thread.start()
+        logger.info("Audit log writer started")
+
+    def submit(self, changes: list[dict[str, Any]]) -> None:
+        """
+        Queue audit log rows built by `build_change` to be written.
+
+        Raises:
+            SQLAlchemyError: If the queue is full and the rows that didn't fit in it
+                could not be written.
+        """
+        if not self.running:
+            raise RuntimeError("Audit log writer is not running")
+        for num_queued, change in enumerate(changes):
+            try:
+                self._queue.put_nowait(change)
+            except queue.Full:
+                overflow = changes[num_queued:]
+                logger.warning(
+                    "Audit log queue is full, writing %d rows now", len(overflow)
+                )
+                with Session(self.engine) as session:
+                    log_changes(session, overflow)
+                    session.commit()
+                return
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Write all queued rows, then stop the writer thread."""
+        if self._thread is None:
+            return
+        # Cuts short the wait before retrying a failed batch, making room in the queue
+        self._stopping.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Audit log writer did not finish within %s seconds", timeout)
+        else:
+            logger.info("Audit log writer stopped")
+        self._thread = None
+
+    def _write(self, batch: list[dict[str, Any]]) -> bool:
+        """Write a batch of rows, returning whether it succeeded."""
+        try:
+            with Session(self.engine) as session:
+                log_changes(session, batch)
+                session.commit()
+        except SQLAlchemyError:
+            logger.exception("Failed to write %d audit log rows", len(batch))
+            return False
+        logger.debug("Wrote %d audit log rows", len(batch))
+        return True
+
+    def _write_with_retry(self, batch: list[dict[str, Any]]) -> bool:
+        """Write a batch of rows, retrying with backoff until it succeeds or stop()."""
+        delay = self.flush_interval
+        while not self._write(batch):
+            if self._stopping.wait(delay):
+                return False
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+        return True
+
+    def _next_batch(self) -> tuple[list[dict[str, Any]], bool]:
+        """
+        Take up to `flush_size` rows from the queue, waiting at most
+        `flush_interval` seconds after the first, and whether stop() was called.
+        """
+        batch: list[dict[str, Any]] = []
+        deadline: float | None = None
+        while len(batch) < self.flush_size:
+            timeout = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            try:
+                change = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if change is _STOP:
+                return batch, True
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(change)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._next_batch()
+            if batch and not self._write_with_retry(batch):
+                logger.error(
+                    "Dropping %d unwritten audit log rows: %s", len(batch), batch
+                )
+            if stopping:
+                break
@@ -1,7 +1,14 @@
-from sqlmodel import Session, select
+from datetime import datetime, timezone
+from typing import Any
 
-from pipeline.database.helpers.audit_log import log_change
+from sqlalchemy import func, update
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, col, select
+
+from pipeline.database.helpers.audit_log import build_change, log_changes
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
 from pipeline.database.models import FormB102r, Individual
+from pipeline.database.search import match_query, search_table
 from pipeline.database.validators import validate_date
 
 
@@ -15,6 +22,142 @@ def get_forms(session: Session) -> list[FormB102r]:
     )
 
 
+# Fields that save_form_with_log never writes from the updated form, as well as the
+# "_raw" fields that hold the imported values. The version is set by the save itself.
+UNSAVED_FORM_FIELDS = ("id", "version")
+
+# Columns of the form table on the muster home page
+FORM_TABLE_COLUMNS = ("form_type", "lastname", "firstname", "dob", "army_number")
+
+
+def _form_table_query(
+    stmt: Any, *, sort_by: str | None, descending: bool, search: str | None
+) -> tuple[Any, Any]:
+    """
+    Filter and sort a select of FormB102r into the order of the form table, and
+    count the forms it selects. See `get_form_page` for the arguments.
+    """
+    if sort_by is not None and sort_by not in FORM_TABLE_COLUMNS:
+        raise ValueError(f"Cannot sort forms by {sort_by!r}")
+
+    id_column = col(FormB102r.id)
+    sort_columns: list[Any] = [col(getattr(FormB102r, sort_by))] if sort_by else []
+    count_stmt = select(func.count()).select_from(FormB102r)
+
+    query = match_query(search)
+    if query:
+        index = search_table(str(FormB102r.__tablename__))
+        matches = index.c[index.name].match(query)
+        stmt = stmt.join(index, index.c.rowid == id_column).where(matches)
+        count_stmt = select(func.count()).select_from(index).where(matches)
+        if not sort_by:
+            sort_columns.append(index.c.rank)
+
+    sort_columns.append(id_column)
+    stmt = stmt.order_by(*(c.desc() if descending else c for c in sort_columns))
+    return stmt, count_stmt
+
+
+def get_form_page(
+    session: Session,
+    *,
+    page: int = 1,
+    rows_per_page: int = 10,
+    sort_by: str | None = "lastname",
+    descending: bool = False,
+    search: str | None = None,
+) -> tuple[list[dict[str, Any]], int]:
+    """
+    Retrieve one page of B102r forms for a table, with only the columns it shows.
+
+    Forms are sorted and paged in the database, so the cost of a page doesn't grow
+    with the number of forms. Ties are ordered by id so that every form appears on
+    exactly one page.
+
+    Searching uses the full-text search index of FormB102r, which covers the names,
+    army number, regiment, occupation and hometown of a form.
+
+    Args:
+        session (Session): Database session.
+        page (int): Page number, starting from 1.
+        rows_per_page (int): Number of forms per page, or 0 for all of them.
+        sort_by (str, optional): Column in FORM_TABLE_COLUMNS to sort by. Defaults
+            to lastname; None sorts search results by relevance, and other forms by
+            id.
+        descending (bool): Whether to sort in descending order.
+        search (str, optional): Only include forms with a word starting with each
+            word of this text, ignoring case and accents.
+
+    Returns:
+        tuple[list[dict[str, Any]], int]: Rows of the page, each with the id and
+        FORM_TABLE_COLUMNS of a form (None as ""), and the total number of forms
+        matching `search`.
+
+    Raises:
+        ValueError: If `sort_by` is not a table column, `page` is less than 1 or
+            `rows_per_page` is negative.
+    """
+    if page < 1:
+        raise ValueError(f"Page number must be at least 1, got {page}")
+    if rows_per_page < 0:
+        raise ValueError(f"Rows per page must not be negative, got {rows_per_page}")
+
+    columns = [col(getattr(FormB102r, name)) for name in FORM_TABLE_COLUMNS]
+    stmt, count_stmt = _form_table_query(
+        select(col(FormB102r.id), *columns),
+        sort_by=sort_by,
+        descending=descending,
+        search=search,
+    )
+    total = session.exec(count_stmt).one()
+
+    if rows_per_page:
+        stmt = stmt.offset((page - 1) * rows_per_page).limit(rows_per_page)
+
+    rows = [
+        {
+            "id": row.id,
+            **{name: getattr(row, name) or "" for name in FORM_TABLE_COLUMNS},
+        }
+        for row in session.execute(stmt)
+    ]
+    return rows, total
+
+
+def get_form_queue(
+    session: Session,
+    *,
+    sort_by: str | None = "lastname",
+    descending: bool = False,
+    search: str | None = None,
+) -> list[int]:
+    """
+    Retrieve the ids of all the forms of the form table, in the order it shows them,
+    so that they can be corrected one after another.
+
+    Only the ids are selected, so even a queue of every form is cheap to hold.
+
+    Args:
+        session (Session): Database session.
+        sort_by (str, optional): As for `get_form_page`.
+        descending (bool): As for `get_form_page`.
+        search (str, optional): As for `get_form_page`.
+
+    Returns:
+        list[int]: Ids of the forms, in table order.
+
+    Raises:
+        ValueError: If `sort_by` is not a table column.
+    """
+    stmt, _ = _form_table_query(
+        select(col(FormB102r.id)),
+        sort_by=sort_by,
+        descending=descending,
+        search=search,
+    )
+    return list(session.exec(stmt))
+
+
 def get_form(session: Session, form_id: int) -> FormB102r | None:
     """Retrieve one B102r form by form_id"""
     form = session.get(FormB102r, form_id)
@@ -34,39 +177,78 @@ def save_form_with_log(
     original_form: FormB102r,
     change_reason: str | None = None,
     session_id: str | None = None,
+    audit_writer: AuditLogWriter | None = None,
 ):
     """
     Persist changes to a B102r form, logging any changes in AuditLog.
+
+    Only the fields that differ between `original_form` and `updated_form` are
+    written, in a single UPDATE that also checks that the form is still at the
+    version of `original_form`. If someone else has saved the form, or it has been
+    re-imported, since `original_form` was loaded, nothing is saved and
+    StaleDataError is raised, rather than their changes being overwritten. On
+    success, `updated_form.version` is set to the new version.
+
+    The audit log rows for all changed fields are written in one bulk insert, and
+    committed in the same transaction as the form itself. If `audit_writer` is given,
+    the rows are instead queued on it once the form has been committed.
     @TODO Log changes to lookup ids
-    """
-    for field in FormB102r.model_fields.keys():
 
-        # Skip "_raw" fields as these should not be changed
-        # Skip "id" field because we won't be updating the PK
-        if field.endswith("_raw") or field == "id":
-            continue
+    Raises:
+        StaleDataError: If the form has changed or been deleted since
+            `original_form` was loaded.
+    """
+    assert updated_form.id is not None, "Form must have an ID to be saved"
 
-        old_value = getattr(original_form, field)
-        new_value = getattr(updated_form, field)
+    updated_form.dob_date = validate_date(updated_form.dob_date)
 
-        assert updated_form.id is not None, "Form must have an ID to be saved"
+    changed = {
+        field: getattr(updated_form, field)
+        for field in FormB102r.model_fields.keys()
+        if field not in UNSAVED_FORM_FIELDS
+        and not field.endswith("_raw")
+        and getattr(original_form, field) != getattr(updated_form, field)
+    }
+    if not changed:
+        return
 
-        updated_form.dob_date = validate_date(updated_form.dob_date)
+    timestamp = datetime.now(timezone.utc)
+    changes = [
+        build_change(
+            model_class=FormB102r,
+            record_id=updated_form.id,
+            field_name=field,
+            old_label=str(getattr(original_form, field) or ""),
+            new_label=str(new_value or ""),
+            change_reason=str(change_reason or ""),
+            session_id=str(session_id or ""),
+            timestamp=timestamp,
+        )
+        for field, new_value in changed.items()
+    ]
 
-        if old_value != new_value:
-            log_change(
-                session=session,
-                model_class=FormB102r,
-                record_id=updated_form.id,
-                field_name=str(field),
-                old_label=str(old_value or ""),
-                new_label=str(new_value or ""),
-                change_reason=str(change_reason or ""),
-                session_id=str(session_id or ""),
-            )
+    new_version = original_form.version + 1
+    result = session.execute(
+        update(FormB102r)
+        .where(
+            col(FormB102r.id) == updated_form.id,
+            col(FormB102r.version) == original_form.version,
+        )
+        .values(**changed, version=new_version)
+    )
+    if result.rowcount != 1:  # type: ignore[attr-defined]
+        session.rollback()
+        raise StaleDataError(
+            f"FormB102r id={updated_form.id} has changed since version "
+            f"{original_form.version} was loaded"
+        )
 
-    session.merge(updated_form)
+    if audit_writer is None:
+        log_changes(session, changes)
     session.commit()
+    updated_form.version = new_version
+    if audit_writer is not None:
+        audit_writer.submit(changes)
 
 
 def get_individual_by_form(session: Session, form: FormB102r) -> Individual | None:
@@ -0,0 +1,104 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from sqlalchemy import Engine
+from sqlmodel import Session, col, select
+
+from pipeline.database.models import FormB102r
+from pipeline.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 50
+
+
+class FormCache:
+    """
+    Least recently used cache of B102r forms, which can be filled ahead of use.
+
+    The muster correction page keeps one for each reviewer. While a form is being
+    corrected, the next forms in the reviewer's queue are prefetched into it in the
+    background, so moving on to one of them doesn't wait for the database.
+
+    Forms are held detached from any session, and `get` hands out copies, so that
+    editing a form on the page doesn't change the cached one. Call `invalidate`
+    after saving a form so that it is read again next time.
+    """
+
+    def __init__(self, engine: Engine, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, got {capacity}")
+
+        self.engine = engine
+        self.capacity = capacity
+        self._forms: OrderedDict[int, FormB102r] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, form_id: int) -> bool:
+        with self._lock:
+            return form_id in self._forms
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._forms)
+
+    def get(self, form_id: int) -> FormB102r | None:
+        """
+        Return a copy of a form, reading it from the database if it isn't cached.
+
+        Args:
+            form_id (int): Id of the form.
+
+        Returns:
+            FormB102r | None: Copy of the form, or None if there is no such form.
+        """
+        with self._lock:
+            form = self._forms.get(form_id)
+            if form is not None:
+                self._forms.move_to_end(form_id)
+
+        if form is None:
+            logger.debug("Form %s not cached", form_id)
+            form = self._load([form_id]).get(form_id)
+            if form is None:
+                return None
+            self._store([form])
+
+        # A new instance rather than a deep copy, whose instance state would still
+        # belong to the cached form
+        return FormB102r(**form.model_dump())
+
+    def prefetch(self, form_ids: Iterable[int]) -> None:
+        """
+        Read the forms that aren't cached yet from the database, in one query.
+
+        Args:
+            form_ids (Iterable[int]): Ids of the forms, e.g. the next in a queue.
+        """
+        with self._lock:
+            missing = [form_id for form_id in form_ids if form_id not in self._forms]
+        if missing:
+            self._store(self._load(missing).values())
+            logger.debug("Prefetched forms %s", missing)
+
+    def invalidate(self, form_id: int) -> None:
+        """Drop a form from the cache, e.g. once it has been changed."""
+        with self._lock:
+            self._forms.pop(form_id, None)
+
+    def _load(self, form_ids: list[int]) -> dict[int, FormB102r]:
+        with Session(self.engine) as session:
+            stmt = select(FormB102r).where(col(FormB102r.id).in_(form_ids))
+            return {form.id: form for form in session.exec(stmt) if form.id is not None}
+
+    def _store(self, forms: Iterable[FormB102r]) -> None:
+        with self._lock:
+            for form in forms:
+                assert form.id is not None
+                self._forms[form.id] = form
+                self._forms.move_to_end(form.id)
+            while len(self._forms) > self.capacity:
+                self._forms.popitem(last=False)
@@ -1,23 +1,33 @@
-from sqlmodel import Session, select
+from datetime import datetime, timezone
 
-from pipeline.database.helpers.audit_log import log_change
+from sqlmodel import Session, col, select
+
+from pipeline.database.helpers.audit_log import build_change, log_changes
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
 from pipeline.database.models import Individual
 from pipeline.database.validators import validate_date
 
 
+def pdf_id_sort_key(pdf_id: str | None) -> int:
+    """
+    Numeric part of a pdf_id - expected form is "APV<int>" - or 0 if it has none.
+
+    This is the value stored in Individual.pdf_id_number, which must be set
+    whenever pdf_id is.
+    """
+    if pdf_id and pdf_id.startswith("APV"):
+        number = pdf_id.removeprefix("APV")
+        if number.isascii() and number.isdigit():
+            return int(number)
+    return 0
+
+
 def get_individuals(session: Session) -> list[Individual]:
     """Retrieve a list of all individuals sorted by the numeric part of pdf_id"""
-    statement = select(Individual)
-    individuals = session.exec(statement).all()
-    # Sort by numeric part of PDF ID - expected form is "APV<int>"
-    return sorted(
-        individuals,
-        key=lambda ind: (
-            int(ind.pdf_id.removeprefix("APV"))
-            if ind.pdf_id and ind.pdf_id.startswith("APV")
-            else 0
-        ),
+    statement = select(Individual).order_by(
+        col(Individual.pdf_id_number), col(Individual.id)
     )
+    return list(session.exec(statement).all())
 
 
 def get_individual(session: Session, individual_id: int) -> Individual | None:
@@ -39,8 +49,23 @@ def save_individual_with_log(
     original_individual: Individual,
     change_reason: str | None = None,
     session_id: str | None = None,
+    audit_writer: AuditLogWriter | None = None,
 ):
-    """Persist changes to an Individual, logging any changes in AuditLog."""
+    """
+    Persist changes to an Individual, logging any changes in AuditLog.
+
+    The audit log rows for all changed fields are written in one bulk insert, and
+    committed in the same transaction as the Individual itself. If `audit_writer`
+    is given, the rows are instead queued on it once the Individual has been
+    committed.
+    """
+    assert updated_individual.id is not None, "Individual must have an ID to be saved"
+
+    updated_individual.dob = validate_date(updated_individual.dob)
+    updated_individual.pdf_id_number = pdf_id_sort_key(updated_individual.pdf_id)
+
+    timestamp = datetime.now(timezone.utc)
+    changes = []
     for field in Individual.model_fields.keys():
 
         # Skip "id" field because we won't be updating the PK
@@ -50,23 +75,23 @@ def save_individual_with_log(
         old_value = getattr(original_individual, field)
         new_value = getattr(updated_individual, field)
 
-        assert (
-            updated_individual.id is not None
-        ), "Individual must have an ID to be saved"
-
-        updated_individual.dob = validate_date(updated_individual.dob)
-
         if old_value != new_value:
-            log_change(
-                session=session,
-                model_class=Individual,
-                record_id=updated_individual.id,
-                field_name=str(field),
-                old_label=str(old_value or ""),
-                new_label=str(new_value or ""),
-                change_reason=str(change_reason or ""),
-                session_id=str(session_id or ""),
+            changes.append(
+                build_change(
+                    model_class=Individual,
+                    record_id=updated_individual.id,
+                    field_name=str(field),
+                    old_label=str(old_value or ""),
+                    new_label=str(new_value or ""),
+                    change_reason=str(change_reason or ""),
+                    session_id=str(session_id or ""),
+                    timestamp=timestamp,
+                )
             )
 
+    if audit_writer is None:
+        log_changes(session, changes)
     session.merge(updated_individual)
     session.commit()
+    if audit_writer is not None:
+        audit_writer.submit(changes)
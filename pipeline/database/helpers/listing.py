@@ -0,0 +1,170 @@
+"""
+Lightweight listings of records, for tables and exports.
+
+Unlike `get_forms` and `get_individuals`, which return SQLModel instances with every
+column, validated by pydantic and tracked by the session, these select only the
+columns that are listed and return slotted dataclasses or plain tuples.
+"""
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any, Optional
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, SQLModel, col, select
+
+from pipeline.database.models import FormB102r, Individual
+from pipeline.database.search import match_query, search_table
+
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class IndividualRow:
+    id: int
+    pdf_id: Optional[str]
+    pdf_id_number: int
+    lastname: Optional[str]
+    firstname: Optional[str]
+    army_number: Optional[str]
+    dob: Optional[date]
+
+
+@dataclass(frozen=True, slots=True)
+class FormRow:
+    id: int
+    individual_id: int
+    form_type: Optional[str]
+    lastname: Optional[str]
+    firstname: Optional[str]
+    dob: Optional[str]
+    army_number: Optional[str]
+
+
+def _row_columns(model_class: type[SQLModel], row_class: type) -> list[Any]:
+    """Columns of a model with the names of the fields of a row dataclass."""
+    return [col(getattr(model_class, field.name)) for field in fields(row_class)]
+
+
+def list_individuals(
+    session: Session,
+    search: Optional[str] = None,
+    *,
+    after: Optional[IndividualRow] = None,
+    limit: Optional[int] = None,
+) -> list[IndividualRow]:
+    """
+    List individuals, sorted by the numeric part of pdf_id, or only those matching a
+    search, most relevant first.
+
+    Without a search, individuals can be listed a page at a time by passing the last
+    row of the previous page as `after`. Each page is then read from the
+    (pdf_id_number, id) order of the index, however far into the list it is.
+
+    Args:
+        session (Session): Database session.
+        search (str, optional): Only list individuals with a word starting with each
+            word of this text in their names or army number, ignoring case and
+            accents.
+        after (IndividualRow, optional): Only list individuals sorted after this
+            one. Cannot be combined with `search`.
+        limit (int, optional): List at most this many individuals.
+
+    Returns:
+        list[IndividualRow]: Listed individuals.
+
+    Raises:
+        ValueError: If `after` is given with `search`, or `limit` is less than 1.
+    """
+    if after is not None and search is not None:
+        raise ValueError("Search results cannot be listed after an individual")
+    if limit is not None and limit < 1:
+        raise ValueError(f"Limit must be at least 1, got {limit}")
+
+    stmt = select(*_row_columns(Individual, IndividualRow))
+
+    if search is not None:
+        query = match_query(search)
+        if query is None:
+            return []
+        index = search_table(str(Individual.__tablename__))
+        stmt = (
+            stmt.join(index, index.c.rowid == col(Individual.id))
+            .where(index.c[index.name].match(query))
+            .order_by(index.c.rank, col(Individual.id))
+        )
+    else:
+        sort_key = tuple_(col(Individual.pdf_id_number), col(Individual.id))
+        if after is not None:
+            stmt = stmt.where(sort_key > (after.pdf_id_number, after.id))
+        stmt = stmt.order_by(col(Individual.pdf_id_number), col(Individual.id))
+
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [IndividualRow(*row) for row in session.execute(stmt)]
+
+
+def list_forms(session: Session, individual_id: Optional[int] = None) -> list[FormRow]:
+    """
+    List B102r forms sorted by lastname.
+
+    Args:
+        session (Session): Database session.
+        individual_id (int, optional): Only list the forms of this individual.
+
+    Returns:
+        list[FormRow]: Listed forms.
+    """
+    stmt = select(*_row_columns(FormB102r, FormRow)).order_by(
+        col(FormB102r.lastname), col(FormB102r.id)
+    )
+    if individual_id is not None:
+        stmt = stmt.where(col(FormB102r.individual_id) == individual_id)
+    return [FormRow(*row) for row in session.execute(stmt)]
+
+
+def iter_rows(
+    session: Session,
+    model_class: type[SQLModel],
+    columns: Sequence[str],
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+    record_ids: Optional[Sequence[int]] = None,
+) -> Iterator[tuple[Any, ...]]:
+    """
+    Stream some columns of the records of a model, in id order, e.g. for an export.
+
+    The query is run straight away, but rows are fetched from the database
+    `batch_size` at a time as the iterator is consumed, so memory use doesn't grow
+    with the number of records. The session must stay open until the iterator is
+    exhausted.
+
+    Args:
+        session (Session): Database session.
+        model_class (type[SQLModel]): Model of the records, e.g. FormB102r.
+        columns (Sequence[str]): Names of the columns to select.
+        batch_size (int): Number of rows to fetch at a time.
+        record_ids (Sequence[int], optional): Only stream the records with these ids.
+
+    Returns:
+        Iterator[tuple[Any, ...]]: Values of `columns` for each record.
+
+    Raises:
+        ValueError: If a column is not a field of the model, or `batch_size` is less
+            than 1.
+    """
+    unknown = [name for name in columns if name not in model_class.model_fields]
+    if unknown:
+        raise ValueError(f"{model_class.__name__} has no columns {unknown}")
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+
+    id_column = col(model_class.id)  # type: ignore[attr-defined]
+    stmt = (
+        select(*(col(getattr(model_class, name)) for name in columns))
+        .order_by(id_column)
+        .execution_options(yield_per=batch_size)
+    )
+    if record_ids is not None:
+        stmt = stmt.where(id_column.in_(record_ids))
+    return (tuple(row) for row in session.execute(stmt))
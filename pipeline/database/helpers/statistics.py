@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import Engine, exists, func
+from sqlmodel import Session, col, select
+
+from pipeline.database.helpers.audit_log import IMPORT_CHANGE_REASON
+from pipeline.database.models import AuditLog, FormB102r, Individual
+from pipeline.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 30.0
+
+
+@dataclass(frozen=True)
+class DatabaseCounts:
+    """Numbers of records in the database."""
+
+    individuals: int
+    forms: int
+    # Forms by form_type, most common first. Forms with no form_type are under "".
+    forms_by_type: dict[str, int] = field(default_factory=dict)
+    # Forms with at least one change in AuditLog, other than by re-importing them
+    corrected_forms: int = 0
+
+    @property
+    def uncorrected_forms(self) -> int:
+        return self.forms - self.corrected_forms
+
+
+def count_records(session: Session) -> DatabaseCounts:
+    """
+    Count the records in the database with COUNT(*) queries, without loading them.
+
+    Args:
+        session (Session): Database session.
+
+    Returns:
+        DatabaseCounts: Numbers of individuals and forms, forms by type, and forms
+        that have been corrected.
+    """
+    individuals = session.exec(select(func.count()).select_from(Individual)).one()
+
+    by_type_stmt = (
+        select(col(FormB102r.form_type), func.count())
+        .group_by(col(FormB102r.form_type))
+        .order_by(func.count().desc(), col(FormB102r.form_type))
+    )
+    forms_by_type = {
+        form_type or "": count for form_type, count in session.exec(by_type_stmt)
+    }
+
+    # Uses the (table_name, record_id, timestamp) index of AuditLog for each form
+    corrected_stmt = (
+        select(func.count())
+        .select_from(FormB102r)
+        .where(
+            exists().where(
+                col(AuditLog.table_name) == FormB102r.__tablename__,
+                col(AuditLog.record_id) == col(FormB102r.id),
+                col(AuditLog.change_reason).is_distinct_from(IMPORT_CHANGE_REASON),
+            )
+        )
+    )
+    corrected_forms = session.exec(corrected_stmt).one()
+
+    return DatabaseCounts(
+        individuals=individuals,
+        forms=sum(forms_by_type.values()),
+        forms_by_type=forms_by_type,
+        corrected_forms=corrected_forms,
+    )
+
+
+def data_version(session: Session) -> tuple[int, ...]:
+    """
+    Return a cheap fingerprint of the data that changes whenever individuals or
+    forms are added or removed, or a correction is logged in AuditLog.
+
+    Results derived from the data, such as the rows of a table on a page, can be
+    cached until it changes. Corrections are detected by the latest AuditLog id, so
+    changes saved without being logged are not.
+
+    Args:
+        session (Session): Database session.
+
+    Returns:
+        tuple[int, ...]: Fingerprint to compare with an earlier one.
+    """
+    version: list[int] = []
+    for model_class in (Individual, FormB102r):
+        stmt = select(func.count(), func.max(col(model_class.id)))
+        count, max_id = session.exec(stmt.select_from(model_class)).one()
+        version.extend((count, max_id or 0))
+    # AuditLog is only appended to, so its latest id is enough
+    max_change_id = session.exec(select(func.max(col(AuditLog.id)))).one()
+    version.append(max_change_id or 0)
+    return tuple(version)
+
+
+class DatabaseStatistics:
+    """
+    Serve the counts of records in the database, recounting them at most once every
+    `ttl` seconds.
+
+    Pages that show counts, such as the muster home page, can then ask for them on
+    every visit, while the database is only queried when the cached counts have
+    expired. Counts can be up to `ttl` seconds out of date; call `invalidate` to
+    recount on the next request, e.g. after an import.
+    """
+
+    def __init__(self, engine: Engine, ttl: float = DEFAULT_TTL):
+        if ttl < 0:
+            raise ValueError(f"TTL must not be negative, got {ttl}")
+
+        self.engine = engine
+        self.ttl = ttl
+        self._counts: Optional[DatabaseCounts] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def counts(self) -> DatabaseCounts:
+        """Return the counts of records, recounting them if the cache has expired."""
+        with self._lock:
+            if self._counts is None or time.monotonic() >= self._expires:
+                with Session(self.engine) as session:
+                    self._counts = count_records(session)
+                self._expires = time.monotonic() + self.ttl
+                logger.debug("Recounted records: %s", self._counts)
+            return self._counts
+
+    def invalidate(self) -> None:
+        """Recount the records on the next call to `counts`."""
+        with self._lock:
+            self._counts = None
@@ -1,9 +1,90 @@
+from pathlib import Path
+from typing import Union
+
+from sqlalchemy import Engine, event
 from sqlmodel import SQLModel, create_engine
 
 from pipeline.database import models  # noqa: F401 - all models are registered
 from pipeline.ui.config import settings
 
-engine = create_engine(f"sqlite:///{settings.database_path}")
+
+def enable_sqlite_savepoints(engine: Engine) -> None:
+    """
+    Let SQLAlchemy, rather than the sqlite3 driver, begin SQLite transactions.
+
+    The sqlite3 driver only emits BEGIN before the first write, so a SAVEPOINT taken
+    before that starts (and its RELEASE commits) a transaction of its own. Emitting
+    BEGIN ourselves makes `Session.begin_nested()` behave as a true nested
+    transaction. See "Serializable isolation / Savepoints / Transactional DDL" in the
+    SQLAlchemy SQLite dialect documentation.
+
+    Transactions begin with BEGIN IMMEDIATE, taking the write lock straight away. A
+    deferred transaction that reads and then writes can fail with "database is
+    locked" in WAL mode if another connection wrote in between, rather than waiting
+    for `busy_timeout`. Only meant for the import engine, since read-only sessions
+    would also take the lock.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def sqlite_pragmas(bulk_load: bool = False) -> dict[str, Union[str, int]]:
+    """
+    Return the PRAGMAs to set on each SQLite connection, from the settings.
+
+    The default profile uses WAL journaling, so the muster app's readers don't block
+    a writer (or each other), with synchronous=NORMAL, which in WAL mode only risks
+    losing the last transactions on power loss, never corrupting the database. The
+    bulk-load profile, for import runs, defaults to synchronous=OFF and a larger page
+    cache; a crash during an import may then lose the import, which can be rerun.
+    """
+    pragmas: dict[str, Union[str, int]] = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+    if bulk_load:
+        pragmas["synchronous"] = settings.sqlite_bulk_load_synchronous
+        pragmas["cache_size"] = settings.sqlite_bulk_load_cache_size
+    return pragmas
+
+
+def create_sqlite_engine(database_path: Path, bulk_load: bool = False) -> Engine:
+    """
+    Create an engine for a SQLite database, tuned with `sqlite_pragmas`.
+
+    The PRAGMAs are set by a connect event hook, so they apply to every connection
+    in the pool. The bulk-load engine also supports savepoints, for imports that
+    roll back one file without losing the rest of the batch (see
+    `enable_sqlite_savepoints`).
+    """
+    engine = create_engine(f"sqlite:///{database_path}")
+    if bulk_load:
+        enable_sqlite_savepoints(engine)
+    pragmas = sqlite_pragmas(bulk_load)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+engine = create_sqlite_engine(settings.database_path)
+# For import runs, which write many rows and can be rerun if interrupted
+bulk_load_engine = create_sqlite_engine(settings.database_path, bulk_load=True)
 
 
 def init_db():
@@ -5,8 +5,10 @@ from pathlib import Path
 from typing import List, Optional
 
 from pydantic import field_validator
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+from pipeline.database.search import register_search_index
 from pipeline.database.validators import validate_date
 
 
@@ -15,11 +17,18 @@ from pipeline.database.validators import validate_date
 # ------------------------
 class Individual(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    pdf_id: Optional[str] = Field(default=None)
+    pdf_id: Optional[str] = Field(default=None, index=True)
+    # Numeric part of pdf_id, so that individuals can be sorted in natural order
+    # (APV9 before APV10) in SQL. Kept in step with pdf_id by `pdf_id_sort_key`.
+    pdf_id_number: int = Field(default=0, index=True)
     lastname: Optional[str] = Field(default=None)
     firstname: Optional[str] = Field(default=None)
     army_number: Optional[str] = Field(default=None)
     dob: Optional[date] = Field(default=None)
+    # None for individuals created before this was recorded
+    created_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
 
     b102rs: List["FormB102r"] = Relationship(back_populates="individual")
 
@@ -102,7 +111,28 @@ class Place(SQLModel, table=True):
 class FormB102r(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     form_image: Optional[Path] = Field(
-        default=None, description="Path to the file with an image of this form"
+        default=None,
+        index=True,
+        description="Path to the file with an image of this form",
+    )
+    source_filename: Optional[str] = Field(
+        default=None,
+        index=True,
+        unique=True,
+        description="Name of the BVQA JSON file this form was imported from",
+    )
+    source_sha256: Optional[str] = Field(
+        default=None,
+        description="SHA-256 hash of the BVQA JSON file when it was last imported",
+    )
+    version: int = Field(
+        default=1,
+        description="Incremented whenever the form is changed, so that a save based "
+        "on an out-of-date copy can be detected",
+    )
+    created_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="When the form was imported, or None if before this was recorded",
     )
     form_type_raw: Optional[str] = Field(
         default=None, description="Form type as imported from raw source data"
@@ -111,7 +141,9 @@ class FormB102r(SQLModel, table=True):
 
     # Link to individual
     individual_id: int = Field(
-        foreign_key="individual.id", description="Individual to which this form belongs"
+        foreign_key="individual.id",
+        index=True,
+        description="Individual to which this form belongs",
     )
     individual: Optional[Individual] = Relationship(back_populates="b102rs")
 
@@ -121,7 +153,7 @@ class FormB102r(SQLModel, table=True):
         description="Last name of individual as imported from raw source data",
     )
     lastname: Optional[str] = Field(
-        default=None, description="Corrected last name of individual"
+        default=None, index=True, description="Corrected last name of individual"
     )
 
     firstname_raw: Optional[str] = Field(
@@ -137,7 +169,7 @@ class FormB102r(SQLModel, table=True):
         description="Army number as imported from raw source data",
     )
     army_number: Optional[str] = Field(
-        default=None, description="Corrected army number"
+        default=None, index=True, description="Corrected army number"
     )
 
     registration_number_raw: Optional[str] = Field(
@@ -354,14 +386,44 @@ class FormB102r(SQLModel, table=True):
     )
 
 
+# Columns searched by the muster search bar
+FORM_B102R_SEARCH_COLUMNS = (
+    "lastname",
+    "firstname",
+    "army_number",
+    "regiment_or_corp",
+    "occupation",
+    "hometown",
+)
+INDIVIDUAL_SEARCH_COLUMNS = ("lastname", "firstname", "army_number")
+
+register_search_index(
+    SQLModel.metadata.tables[str(FormB102r.__tablename__)], FORM_B102R_SEARCH_COLUMNS
+)
+register_search_index(
+    SQLModel.metadata.tables[str(Individual.__tablename__)], INDIVIDUAL_SEARCH_COLUMNS
+)
+
+
 # ------------------------
 # Audit log of changes to data
 # ------------------------
 class AuditLog(SQLModel, table=True):
+    # Replaying the history of a record reads its changes in timestamp order. This
+    # also serves lookups by table_name alone, so that has no index of its own.
+    __table_args__ = (
+        Index(
+            "ix_auditlog_table_name_record_id_timestamp",
+            "table_name",
+            "record_id",
+            "timestamp",
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
-    table_name: str = Field(index=True)
-    record_id: int = Field(index=True)
+    table_name: str
+    record_id: int
     field_name: str
     field_type: Optional[str] = Field(
         default=None,
@@ -383,3 +445,30 @@ class AuditLog(SQLModel, table=True):
     session_id: Optional[str] = Field(default=None)
 
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class AuditSnapshot(SQLModel, table=True):
+    """
+    Checkpoint of a record's state, so that reconstructing its state at a point in
+    time only needs to replay the AuditLog changes made since the checkpoint.
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_auditsnapshot_table_name_record_id_timestamp",
+            "table_name",
+            "record_id",
+            "timestamp",
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    table_name: str
+    record_id: int
+    data: str = Field(
+        description="Field labels of the record, as stored in AuditLog values, as a "
+        'JSON object e.g. {"lastname": "Smith", "dob": "1901-01-01"}'
+    )
+
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
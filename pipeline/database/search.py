@@ -0,0 +1,130 @@
+"""
+SQLite FTS5 full-text search indexes of tables.
+
+The search index of a table `<table>` is an external-content FTS5 table named
+`<table>_search`. It stores only the index, and reads the text of matching rows
+back from `<table>` by rowid, i.e. the table's integer primary key. Triggers on
+`<table>` keep the index in sync with inserts, deletes and updates of the indexed
+columns.
+
+Indexes are registered on a table with `register_search_index`, so they are created
+along with it by `SQLModel.metadata.create_all`. Existing databases get them from
+an Alembic migration.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import Table, event
+from sqlalchemy.sql import column, table
+from sqlalchemy.sql.expression import TableClause
+
+# Match words regardless of case and accents
+SEARCH_TOKENIZE = "unicode61 remove_diacritics 2"
+# Also index 2 and 3 character prefixes, so that short prefix queries are fast
+SEARCH_PREFIX = "2 3"
+
+# The FTS5 table of an index and the shadow tables it stores the index in
+_SEARCH_TABLE_NAME = re.compile(r".+_search(_(config|content|data|docsize|idx))?")
+_TOKEN = re.compile(r"\w+")
+
+
+def search_table_name(table_name: str) -> str:
+    """Return the name of the search index of a table."""
+    return f"{table_name}_search"
+
+
+def is_search_table(name: str) -> bool:
+    """Return whether a table is part of a search index, rather than a model."""
+    return _SEARCH_TABLE_NAME.fullmatch(name) is not None
+
+
+def search_table(table_name: str) -> TableClause:
+    """
+    Return the search index of a table for use in queries.
+
+    Join it to the table on `rowid`, filter it with `.match()` on its hidden column
+    named after the index itself, which searches every indexed column, and order by
+    `rank` to list the most relevant rows first.
+    """
+    name = search_table_name(table_name)
+    return table(name, column("rowid"), column("rank"), column(name))
+
+
+def search_index_ddl(table_name: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    Return the SQL statements that create the search index of a table, the
+    triggers that keep it in sync and index the table's existing rows.
+
+    Args:
+        table_name (str): Table to index. Its primary key must be an integer.
+        columns (tuple[str, ...]): Text columns of the table to index.
+
+    Returns:
+        list[str]: SQL statements, to be executed in order.
+    """
+    name = search_table_name(table_name)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    delete_old = (
+        f"INSERT INTO {name} ({name}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = (
+        f"INSERT INTO {name} (rowid, {column_list}) VALUES (new.id, {new_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({column_list}, "
+        f"content='{table_name}', content_rowid='id', "
+        f"tokenize='{SEARCH_TOKENIZE}', prefix='{SEARCH_PREFIX}')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_update "
+        f"AFTER UPDATE OF {column_list} ON {table_name} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {name} ({name}) VALUES ('rebuild')",
+    ]
+
+
+def register_search_index(model_table: Table, columns: tuple[str, ...]) -> None:
+    """
+    Create the search index of a table whenever the table is created by SQLAlchemy,
+    and drop it when the table is dropped. The triggers are dropped with the table.
+
+    Args:
+        model_table (Table): Table to index, e.g. `FormB102r.__table__`.
+        columns (tuple[str, ...]): Text columns of the table to index.
+    """
+    statements = search_index_ddl(model_table.name, columns)
+
+    @event.listens_for(model_table, "after_create")
+    def _create_search_index(target, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+
+    @event.listens_for(model_table, "before_drop")
+    def _drop_search_index(target, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            name = search_table_name(model_table.name)
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+
+def match_query(text: Optional[str]) -> Optional[str]:
+    """
+    Convert text typed into a search box into an FTS5 query that matches rows
+    containing words starting with every word of the text, in any indexed column.
+
+    Each word is quoted, so characters that are FTS5 syntax are searched for as
+    text rather than causing a syntax error.
+
+    Returns:
+        str | None: FTS5 query, or None if the text has no words to search for.
+    """
+    words = _TOKEN.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
@@ -1,21 +1,44 @@
+import hashlib
 import logging
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
+from pipeline.database.helpers.audit_log import (
+    IMPORT_CHANGE_REASON,
+    build_change,
+    log_changes,
+)
+from pipeline.database.helpers.individual import pdf_id_sort_key
 from pipeline.database.helpers.matchers import is_individual_match
-from pipeline.database.init_db import engine
+from pipeline.database.init_db import bulk_load_engine
 from pipeline.database.models import FormB102r, Individual
 from pipeline.logging_config import setup_logging
-from pipeline.tasks.utils.db_import_utils import get_image_path, load_json_data
+from pipeline.tasks.utils.db_import_utils import get_image_path, parse_json_bytes
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Number of JSON files imported per database transaction
+DEFAULT_BATCH_SIZE = 500
+# Number of files per worker process that can be parsed ahead of the database writer
+PARSE_QUEUE_SIZE = 16
+# Record of the file a form was imported from, rather than data of the form, so
+# changes to them are not audited
+SOURCE_FIELDS = ("source_filename", "source_sha256")
 
-def extract_b102r_data(source_filename: Path, json_data: dict) -> FormB102r:
-    """Extract B102r data from a BVQA json file and return an instantiated FormB102r."""
+
+def extract_b102r_fields(
+    source_filename: Path, json_data: dict
+) -> dict[str, Optional[str]]:
+    """Extract B102r data from a BVQA json file as FormB102r keyword arguments."""
     # @TODO handle more than 1 model section in JSON
     model_data = next(iter(json_data["models"].values()))  # First model section
     answers = model_data["questions"]
@@ -23,7 +46,7 @@ def extract_b102r_data(source_filename: Path, json_data: dict) -> FormB102r:
     def answer(key: str) -> Optional[str]:
         return answers.get(key, {}).get("answer")
 
-    return FormB102r(
+    return dict(
         lastname_raw=answer("B102r_1_Last_name"),
         lastname=answer("B102r_1_Last_name"),
         firstname_raw=answer("B102r_2_First_name"),
@@ -66,8 +89,85 @@ def extract_b102r_data(source_filename: Path, json_data: dict) -> FormB102r:
     )
 
 
+def extract_b102r_data(source_filename: Path, json_data: dict) -> FormB102r:
+    """Extract B102r data from a BVQA json file and return an instantiated FormB102r."""
+    return FormB102r(**extract_b102r_fields(source_filename, json_data))
+
+
+def parse_b102r_file(
+    json_path: Path, known_sha256: Optional[str] = None
+) -> Optional[dict[str, Optional[str]]]:
+    """
+    Load a BVQA json file and extract its B102r data as FormB102r keyword arguments.
+
+    The fields include the file's name and the SHA-256 hash of its contents, so that
+    it can be recognised if it is imported again. If the hash equals `known_sha256`,
+    the file is unchanged since it was last imported and None is returned without
+    parsing it.
+
+    Doesn't touch the database, so it can run in a worker process; the plain dict it
+    returns is cheap to send back to the process writing to the database.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    if not json_path.is_file():
+        raise FileNotFoundError(f"JSON file not found: {json_path}")
+
+    content = json_path.read_bytes()
+    sha256 = hashlib.sha256(content).hexdigest()
+    if sha256 == known_sha256:
+        return None
+
+    fields = extract_b102r_fields(json_path, parse_json_bytes(content))
+    fields["source_filename"] = json_path.name
+    fields["source_sha256"] = sha256
+    return fields
+
+
+def load_imported_forms(
+    session: Session,
+) -> tuple[dict[str, tuple[int, Optional[str]]], dict[str, int]]:
+    """
+    Load the FormB102r records that earlier imports created.
+
+    Returns:
+        tuple: A mapping from source filename to form id and source hash, and a
+        mapping from form image to form id for forms imported before source
+        filenames were recorded.
+    """
+    by_source: dict[str, tuple[int, Optional[str]]] = {}
+    by_image: dict[str, int] = {}
+    stmt = select(
+        col(FormB102r.id),
+        col(FormB102r.source_filename),
+        col(FormB102r.source_sha256),
+        col(FormB102r.form_image),
+    )
+    for form_id, source_filename, source_sha256, form_image in session.exec(stmt):
+        if form_id is None:
+            continue
+        if source_filename is not None:
+            by_source[source_filename] = (form_id, source_sha256)
+        elif form_image is not None:
+            by_image[str(form_image)] = form_id
+    return by_source, by_image
+
+
+def load_individual_index(session: Session) -> dict[str, list[Individual]]:
+    """Load all Individuals, grouped by PDF filename identifier."""
+    index: dict[str, list[Individual]] = defaultdict(list)
+    for individual in session.exec(select(Individual).order_by(col(Individual.id))):
+        if individual.pdf_id is not None:
+            index[individual.pdf_id].append(individual)
+    return index
+
+
 def get_or_create_individual(
-    session: Session, record: FormB102r, source_filename: str
+    session: Session,
+    record: FormB102r,
+    source_filename: str,
+    individual_index: Optional[dict[str, list[Individual]]] = None,
 ) -> Individual:
     """
     Check if a matching Individual exists for the PDF filename identifier; if not
@@ -80,15 +180,26 @@ def get_or_create_individual(
     because the heuristic is not accurate enough. Log analysis can be used to identify
     and manually fix cases where there are 2 individuals in 1 PDF.
 
+    A new Individual is flushed, not committed, so that it gets an id and is visible
+    to later lookups in the same transaction; committing is left to the caller.
+
+    If `individual_index` is given (see `load_individual_index`), existing
+    Individuals are looked up in it instead of querying the database, and any new
+    Individual is added to it.
+
     @TODO improve heuristic to allow for more accurate matching.
     """
     pdf_id = Path(source_filename).name.split("_")[0]  # type: ignore
 
     # Find any existing Individuals with the same PDF number
-    stmt = select(Individual).where(
-        Individual.pdf_id == pdf_id,
-    )
-    existing: list[Individual] = list(session.exec(stmt))  # type: ignore
+    existing: list[Individual]
+    if individual_index is not None:
+        existing = individual_index.get(pdf_id, [])
+    else:
+        stmt = select(Individual).where(
+            Individual.pdf_id == pdf_id,
+        )
+        existing = list(session.exec(stmt))  # type: ignore
 
     if existing:
         num_matches = len(existing)
@@ -123,20 +234,47 @@ def get_or_create_individual(
     # Otherwise there is no existing individual, so create one
     individual = Individual(
         pdf_id=pdf_id,
+        pdf_id_number=pdf_id_sort_key(pdf_id),
         lastname=record.lastname_raw,
         firstname=record.firstname_raw,
     )
     session.add(individual)
-    session.commit()
-    session.refresh(individual)
+    session.flush()
+    if individual_index is not None:
+        individual_index.setdefault(pdf_id, []).append(individual)
     return individual
 
 
-def import_b102r_json(json_path: Path, session: Session):
-    data = load_json_data(json_path)
+def import_b102r_json(
+    json_path: Path,
+    session: Session,
+    individual_index: Optional[dict[str, list[Individual]]] = None,
+):
+    """
+    Import a single B102r JSON file into the session's current transaction.
+
+    The new FormB102r (and Individual, if one is created) is flushed but not
+    committed, so that many files can be imported in a single transaction. See
+    `get_or_create_individual` for `individual_index`.
+    """
+    form_record = FormB102r(**parse_b102r_file(json_path))  # type: ignore[arg-type]
     logger.info("JSON data loaded for %s", json_path)
 
-    form_record = extract_b102r_data(json_path, data)
+    save_b102r_record(session, form_record, json_path, individual_index)
+
+
+def save_b102r_record(
+    session: Session,
+    form_record: FormB102r,
+    json_path: Path,
+    individual_index: Optional[dict[str, list[Individual]]] = None,
+):
+    """
+    Add a FormB102r extracted from `json_path` to the session, with its Individual.
+
+    The form (and Individual, if one is created) is flushed but not committed. See
+    `get_or_create_individual` for `individual_index`.
+    """
     logger.info(
         "FormB102r form_image=%s created for %s, %s ",
         form_record.form_image,
@@ -145,7 +283,10 @@ def import_b102r_json(json_path: Path, session: Session):
     )
 
     individual = get_or_create_individual(
-        session, form_record, source_filename=str(json_path)
+        session,
+        form_record,
+        source_filename=str(json_path),
+        individual_index=individual_index,
     )
     form_record.individual = individual
     logger.info(
@@ -155,16 +296,221 @@ def import_b102r_json(json_path: Path, session: Session):
     )
 
     session.add(form_record)
-    session.commit()
+    session.flush()
+
+
+def update_b102r_record(
+    session: Session, form_record: FormB102r, fields: dict[str, Optional[str]]
+):
+    """
+    Update a previously imported FormB102r in place from a changed source file.
 
+    Raw fields are always overwritten. A corrected field is only overwritten if it
+    still holds the value that was imported into its raw field, so that corrections
+    made during review are kept.
 
-def import_all_in_dir(folder: Path) -> int:
+    Each changed field is recorded in the AuditLog, in the session's current
+    transaction, so that the form's earlier state can still be reconstructed. The
+    form's version is only incremented if one did change; the SOURCE_FIELDS, which
+    record where the form was imported from, are updated without either.
+    """
+    assert form_record.id is not None, "Form must have an ID to be updated"
+    corrected = {
+        name
+        for name in fields
+        if f"{name}_raw" in fields
+        and getattr(form_record, name) != getattr(form_record, f"{name}_raw")
+    }
+    timestamp = datetime.now(timezone.utc)
+    changes = []
+    for name, value in fields.items():
+        if name in corrected or getattr(form_record, name) == value:
+            continue
+        if name in SOURCE_FIELDS:
+            setattr(form_record, name, value)
+            continue
+        changes.append(
+            build_change(
+                model_class=FormB102r,
+                record_id=form_record.id,
+                field_name=name,
+                old_label=str(getattr(form_record, name) or ""),
+                new_label=str(value or ""),
+                change_reason=IMPORT_CHANGE_REASON,
+                timestamp=timestamp,
+            )
+        )
+        setattr(form_record, name, value)
+    if not changes:
+        logger.info(
+            "FormB102r id=%s unchanged by %s", form_record.id, fields["source_filename"]
+        )
+        return
+
+    log_changes(session, changes)
+    # Corrections being made to the old version will not be saved over this one
+    form_record.version += 1
+
+    logger.info(
+        "FormB102r id=%s updated from %s, keeping corrected fields: %s",
+        form_record.id,
+        fields["source_filename"],
+        ", ".join(sorted(corrected)) or "none",
+    )
+
+
+def _parse_in_pool(
+    files: list[Path],
+    known_hashes: dict[str, Optional[str]],
+    workers: int,
+    max_pending: int,
+) -> Iterator[tuple[Path, Callable[[], Optional[dict[str, Optional[str]]]]]]:
+    """
+    Parse files in a process pool, yielding each file with a callable for its result.
+
+    Files are yielded in order. At most `max_pending` files are queued or being
+    parsed ahead of the consumer, so a slow consumer doesn't cause every parsed file
+    to be held in memory at once. Calling the callable returns the result of
+    `parse_b102r_file`, or raises the exception raised while parsing.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def submit(file: Path) -> tuple[Path, Future]:
+            return file, executor.submit(
+                parse_b102r_file, file, known_hashes.get(file.name)
+            )
+
+        files_iter = iter(files)
+        pending = deque(submit(file) for file in islice(files_iter, max_pending))
+        while pending:
+            file, future = pending.popleft()
+            next_file = next(files_iter, None)
+            if next_file is not None:
+                pending.append(submit(next_file))
+            yield file, future.result
+
+
+def import_all_in_dir(
+    folder: Path, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1
+) -> int:
+    """
+    Import all B102r JSON files in a folder, committing once per batch of files.
+
+    Each file is imported inside a savepoint, so a file that fails to import is
+    rolled back and logged without losing the other files in its batch. The
+    transaction is committed after every `batch_size` files, and once more at the
+    end, rather than after every form and individual.
+
+    Importing is idempotent: each form records the name and hash of its source file.
+    Files that were imported before and are unchanged are skipped without being
+    parsed, and files that have changed update their existing form in place (see
+    `update_b102r_record`). Forms imported before source files were recorded are
+    matched on their form image instead.
+
+    Existing Individuals are loaded once into an in-memory index by PDF identifier,
+    so matching each file to its Individual does not need a query.
+
+    If `workers` is greater than 1, files are parsed in a process pool of that size
+    while this process writes the results to the database, in filename order. Only
+    a bounded number of parsed files are held waiting to be written.
+
+    Args:
+        folder (Path): Directory containing B102r JSON files.
+        batch_size (int): Number of files to import per transaction.
+        workers (int): Number of worker processes to parse files with. Defaults to 1
+            (parse and write sequentially).
+
+    Returns:
+        int: Number of files successfully imported, as new or updated forms.
+
+    Raises:
+        ValueError: If `batch_size` or `workers` is less than 1.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
+    start_time = time.time()
     imported_count = 0
-    with Session(engine) as session:
-        for file in folder.glob("*.json"):
+    updated_count = 0
+    skipped_count = 0
+    # Don't expire the indexed Individuals on each commit, or every one would be
+    # reloaded from the database the next time it is matched
+    with Session(bulk_load_engine, expire_on_commit=False) as session:
+        individual_index = load_individual_index(session)
+        logger.info("Loaded %d PDF identifiers into index", len(individual_index))
+        forms_by_source, forms_by_image = load_imported_forms(session)
+        known_hashes = {name: sha for name, (_, sha) in forms_by_source.items()}
+
+        files = sorted(folder.glob("*.json"))
+        parsed: Iterable[tuple[Path, Callable[[], Optional[dict[str, Optional[str]]]]]]
+        if workers == 1:
+            parsed = (
+                (file, partial(parse_b102r_file, file, known_hashes.get(file.name)))
+                for file in files
+            )
+        else:
+            logger.info("Parsing %d files with %d workers", len(files), workers)
+            parsed = _parse_in_pool(
+                files, known_hashes, workers, max_pending=workers * PARSE_QUEUE_SIZE
+            )
+
+        for file_num, (file, get_fields) in enumerate(parsed, start=1):
             try:
-                import_b102r_json(file, session)
-                imported_count += 1
+                fields = get_fields()
             except Exception as e:
-                logger.warning("Failed to import %s: %s", file.name, e)
+                logger.warning("Failed to parse %s: %s", file.name, e)
+                fields = None
+            else:
+                if fields is None:
+                    logger.info("Skipping unchanged file %s", file.name)
+                    skipped_count += 1
+
+            if fields is not None:
+                if file.name in forms_by_source:
+                    existing_id: Optional[int] = forms_by_source[file.name][0]
+                else:
+                    # Each form imported before source files were recorded can only
+                    # be claimed by one file
+                    existing_id = forms_by_image.pop(str(fields["form_image"]), None)
+
+                try:
+                    with session.begin_nested():
+                        if existing_id is None:
+                            save_b102r_record(
+                                session, FormB102r(**fields), file, individual_index
+                            )
+                        else:
+                            form_record = session.get(FormB102r, existing_id)
+                            if form_record is None:
+                                raise ValueError(
+                                    f"FormB102r id={existing_id} no longer exists"
+                                )
+                            update_b102r_record(session, form_record, fields)
+                            session.flush()
+                    imported_count += 1
+                    if existing_id is not None:
+                        updated_count += 1
+                except Exception as e:
+                    logger.warning("Failed to import %s: %s", file.name, e)
+                    # The savepoint rollback may have discarded an Individual that
+                    # was added to the index, so rebuild it from the database
+                    individual_index = load_individual_index(session)
+
+            if file_num % batch_size == 0:
+                session.commit()
+                logger.info("Committed batch ending at file %d", file_num)
+        session.commit()
+
+    total_time = time.time() - start_time
+    logger.info(
+        "Imported %d files (%d updated) and skipped %d unchanged files from %s in "
+        "%.2f seconds",
+        imported_count,
+        updated_count,
+        skipped_count,
+        folder,
+        total_time,
+    )
     return imported_count
@@ -1,7 +1,8 @@
 import logging
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Sequence
 
 from PIL import Image, UnidentifiedImageError
 from PIL.Image import Resampling
@@ -12,6 +13,115 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 VALID_SUFFIXES = {".jpg", ".jpeg", ".png", ".tiff"}
+THUMBNAIL_WIDTH = 150
+SCREEN_WIDTH = 1200
+PYRAMID_WIDTHS = (THUMBNAIL_WIDTH, 600, SCREEN_WIDTH)
+# JPEGs are decoded at no less than this multiple of the target size before the final
+# LANCZOS resize, as in Pillow's Image.thumbnail(), so quality is not affected
+DRAFT_REDUCING_GAP = 2.0
+
+
+def _draft_for_size(img: Image.Image, size: tuple[int, int]) -> None:
+    """
+    Ask the JPEG decoder to decode at a reduced scale if the target is much smaller.
+
+    JPEGs can be decoded directly at 1/2, 1/4 or 1/8 scale, which is much faster
+    than decoding at full size and then resizing. Pillow picks the smallest scale
+    that is still at least `DRAFT_REDUCING_GAP` times `size`. This must be called
+    before the image is loaded and has no effect on other formats, or if even 1/2
+    scale would be too small.
+    """
+    draft_size = (
+        int(size[0] * DRAFT_REDUCING_GAP),
+        int(size[1] * DRAFT_REDUCING_GAP),
+    )
+    if (
+        img.format == "JPEG"
+        and draft_size[0] * 2 <= img.width
+        and draft_size[1] * 2 <= img.height
+    ):
+        img.draft(img.mode, draft_size)
+
+
+def _target_size(
+    orig_size: tuple[int, int],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+) -> tuple[tuple[int, int], str]:
+    """
+    Calculate the resized dimensions and filename suffix for an image.
+
+    If only one of `width` or `height` is given, the other is calculated to preserve
+    the aspect ratio. If both are given, the image is scaled to fit within them.
+
+    Returns:
+        tuple[tuple[int, int], str]: The new (width, height) and the filename suffix,
+        e.g. "_w150px".
+    """
+    orig_width, orig_height = orig_size
+    if width and height:
+        # Scale to fit within the box maintaining aspect ratio
+        width_ratio = width / orig_width
+        height_ratio = height / orig_height
+        scale = min(width_ratio, height_ratio)
+        return (
+            (int(orig_width * scale), int(orig_height * scale)),
+            f"_w{width}px_h{height}px",
+        )
+    elif width:
+        scale = width / orig_width
+        return (width, int(orig_height * scale)), f"_w{width}px"
+    elif height:
+        scale = height / orig_height
+        return (int(orig_width * scale), height), f"_h{height}px"
+    raise ValueError("Specify one of width or height.")
+
+
+def save_resized_widths(
+    img: Image.Image,
+    img_name: str,
+    output_dir: Path,
+    widths: Sequence[int],
+) -> list[Path]:
+    """
+    Save resized copies of an already decoded image, one for each target width.
+
+    This is used when the image is already in memory, e.g. straight after it has been
+    extracted from a PDF, so that it does not need to be read and decoded again from
+    disk. Output files are named as by `resize_image`, e.g.
+    <img_stem>_w150px<img_suffix>.
+
+    The image is decoded once, and the widths are produced from largest to smallest,
+    each one downscaled from the previous size rather than from the original. This
+    makes a pyramid of several sizes little more expensive than the largest alone.
+
+    Args:
+        img (Image.Image): The decoded source image.
+        img_name (str): Filename of the source image, used to name the outputs.
+        output_dir (Path): Directory where the resized images will be saved.
+        widths (Sequence[int]): Target widths in pixels.
+
+    Returns:
+        list[Path]: Paths to the resized images, in the order of `widths`.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = Path(img_name)
+    output_paths: dict[int, Path] = {}
+    if not widths:
+        return []
+
+    orig_size = img.size
+    _draft_for_size(img, _target_size(orig_size, width=max(widths))[0])
+    previous = img
+    for width in sorted(set(widths), reverse=True):
+        # Sizes are calculated from the original so they match resize_image exactly
+        new_size, suffix = _target_size(orig_size, width=width)
+        output_path = output_dir / f"{name.stem}{suffix}{name.suffix}"
+        resized = previous.resize(new_size, Resampling.LANCZOS)
+        resized.save(output_path)
+        output_paths[width] = output_path
+        previous = resized
+    return [output_paths[width] for width in widths]
 
 
 def resize_image(
@@ -29,6 +139,9 @@ def resize_image(
     the image is resized to fit *within* the given width and height,
     preserving aspect ratio.
 
+    JPEGs are decoded at a reduced scale when the target is much smaller than the
+    original, which makes thumbnailing large scans several times faster.
+
     Resized image is saved to `output_dir` with a modified filename that includes
     suffixes indicating the resized dimensions.
 
@@ -58,22 +171,8 @@ def resize_image(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     with Image.open(img_path) as img:
-        orig_width, orig_height = img.size
-        if width and height:
-            # Scale to fit within the box maintaining aspect ratio
-            width_ratio = width / orig_width
-            height_ratio = height / orig_height
-            scale = min(width_ratio, height_ratio)
-            new_size = (int(orig_width * scale), int(orig_height * scale))
-            suffix = f"_w{width}px_h{height}px"
-        elif width:
-            scale = width / orig_width
-            new_size = (width, int(orig_height * scale))
-            suffix = f"_w{width}px"
-        elif height:
-            scale = height / orig_height
-            new_size = (int(orig_width * scale), height)
-            suffix = f"_h{height}px"
+        new_size, suffix = _target_size(img.size, width=width, height=height)
+        _draft_for_size(img, new_size)
 
         output_name = f"{img_path.stem}{suffix}{img_path.suffix}"
         output_path = output_dir / output_name
@@ -87,11 +186,95 @@ def resize_image(
     return output_path
 
 
+def resize_image_pyramid(
+    img_path: Path, output_dir: Path, widths: Sequence[int]
+) -> list[Path]:
+    """
+    Resize an image to several widths from a single decode.
+
+    Opens the image at `img_path` once and saves a copy at each of `widths`,
+    preserving aspect ratio, e.g. 150px thumbnails for browsing and 1200px images
+    for the correction page. Each size is downscaled from the next size up. Outputs
+    are named as by `resize_image`, e.g. <img_stem>_w1200px<img_suffix>.
+
+    Args:
+        img_path (Path): Path to the original image file.
+        output_dir (Path): Directory where the resized images will be saved.
+        widths (Sequence[int]): Target widths in pixels.
+
+    Returns:
+        list[Path]: Paths to the resized images, in the order of `widths`.
+
+    Raises:
+        ValueError: If no widths are given or the file is not a supported image.
+    """
+    if not widths:
+        raise ValueError("Specify at least one width.")
+
+    if img_path.suffix.lower() not in VALID_SUFFIXES:
+        raise ValueError(f"File is not a supported image type: {img_path}")
+
+    start_time = time.time()
+    logger.info("Starting resizing of image to widths %s: %s", widths, img_path)
+
+    with Image.open(img_path) as img:
+        output_paths = save_resized_widths(img, img_path.name, output_dir, widths)
+
+    total_time = time.time() - start_time
+    logger.info("Completed processing %s in %.2f seconds", img_path, total_time)
+
+    return output_paths
+
+
+def _resize_to_list(img_path: Path, output_dir: Path, **kwargs) -> list[Path]:
+    """Call `resize_image` and wrap the single output path in a list."""
+    return [resize_image(img_path, output_dir, **kwargs)]
+
+
+def _resize_files(
+    dir_path: Path,
+    resize_fn: Callable[..., list[Path]],
+    workers: int,
+    **kwargs,
+) -> dict[Path, list[Path]]:
+    """Apply `resize_fn` to every supported image in `dir_path`, optionally in a
+    process pool, returning results in sorted filename order."""
+    result: dict[Path, list[Path]] = {}
+
+    files = []
+    for file in sorted(dir_path.iterdir()):
+        if not file.is_file() or file.suffix.lower() not in VALID_SUFFIXES:
+            logger.debug("Skipping non-image file: %s", file.name)
+            continue
+        files.append(file)
+
+    if workers == 1:
+        for file in files:
+            try:
+                result[file] = resize_fn(file, **kwargs)
+            except (UnidentifiedImageError, OSError) as e:
+                logger.warning("Failed to process %s: %s", file.name, e)
+    else:
+        logger.info("Resizing %d images with %d workers", len(files), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                file: executor.submit(resize_fn, file, **kwargs) for file in files
+            }
+            for file, future in futures.items():
+                try:
+                    result[file] = future.result()
+                except (UnidentifiedImageError, OSError) as e:
+                    logger.warning("Failed to process %s: %s", file.name, e)
+
+    return result
+
+
 def resize_images_from_dir(
     dir_path: Path,
     output_dir: Path,
     width: Optional[int] = None,
     height: Optional[int] = None,
+    workers: int = 1,
 ) -> dict[Path, list[Path]]:
     """
     Resize all image files in a directory and save them to an output folder.
@@ -100,34 +283,93 @@ def resize_images_from_dir(
     `resize_image` function, and stores the resized images in the output
     directory. Each image is renamed automatically with dimension suffixes.
 
+    If `workers` is greater than 1, images are resized in parallel in a process pool
+    of that size. The returned mapping is the same as for a sequential run.
+
     Args:
         dir_path (Path): Directory containing image files to resize.
         output_dir (Path): Directory where resized images will be saved.
         width (Optional[int]): Target width in pixels.
         height (Optional[int]): Target height in pixels.
+        workers (int): Number of worker processes to use. Defaults to 1 (sequential).
 
     Returns:
         dict[Path, list[Path]]: Mapping from original image file to list of resized
         paths.
+
+    Raises:
+        ValueError: If `workers` is less than 1.
     """
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
     logger.info("Starting batch resizing of images from folder: %s", dir_path)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     start_time = time.time()
-    result: dict[Path, list[Path]] = {}
+    result = _resize_files(
+        dir_path,
+        _resize_to_list,
+        workers,
+        output_dir=output_dir,
+        width=width,
+        height=height,
+    )
 
-    for file in sorted(dir_path.iterdir()):
-        if not file.is_file() or file.suffix.lower() not in VALID_SUFFIXES:
-            logger.debug("Skipping non-image file: %s", file.name)
-            continue
+    total_time = time.time() - start_time
+    logger.info("Finished batch resizing from %s in %.2f seconds", dir_path, total_time)
+
+    return result
+
+
+def resize_images_pyramid_from_dir(
+    dir_path: Path,
+    output_dir: Path,
+    widths: Sequence[int],
+    workers: int = 1,
+) -> dict[Path, list[Path]]:
+    """
+    Resize all image files in a directory to several widths each.
+
+    Runs `resize_image_pyramid` on every supported image in `dir_path`, so each image
+    is decoded only once however many widths are requested. If `workers` is greater
+    than 1, images are processed in parallel in a process pool of that size.
+
+    Args:
+        dir_path (Path): Directory containing image files to resize.
+        output_dir (Path): Directory where resized images will be saved.
+        widths (Sequence[int]): Target widths in pixels.
+        workers (int): Number of worker processes to use. Defaults to 1 (sequential).
+
+    Returns:
+        dict[Path, list[Path]]: Mapping from original image file to its resized
+        paths, in the order of `widths`.
+
+    Raises:
+        ValueError: If no widths are given or `workers` is less than 1.
+    """
+    if not widths:
+        raise ValueError("Specify at least one width.")
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
+    logger.info("Starting batch pyramid resizing of images from folder: %s", dir_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-        try:
-            resized_path = resize_image(file, output_dir, width=width, height=height)
-            result[file] = [resized_path]
-        except (UnidentifiedImageError, OSError) as e:
-            logger.warning("Failed to process %s: %s", file.name, e)
+    start_time = time.time()
+    result = _resize_files(
+        dir_path,
+        resize_image_pyramid,
+        workers,
+        output_dir=output_dir,
+        widths=list(widths),
+    )
 
     total_time = time.time() - start_time
-    logger.info("Finished batch resizing from %s in %.2f seconds", dir_path, total_time)
+    logger.info(
+        "Finished batch pyramid resizing from %s in %.2f seconds",
+        dir_path,
+        total_time,
+    )
 
     return result
@@ -1,11 +1,19 @@
 import logging
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import copy
+from functools import partial
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Sequence
 
 from pikepdf import (
+    Array,
+    Name,
     Pdf,
+    PdfError,
     PdfImage,
+    StreamDecodeLevel,
 )
 from pikepdf.exceptions import (
     HifiPrintImageNotTranscodableError,
@@ -13,13 +21,105 @@ from pikepdf.exceptions import (
     InvalidPdfImageError,
     UnsupportedImageTypeError,
 )
+from PIL import Image, UnidentifiedImageError
 
 from pipeline.logging_config import setup_logging
+from pipeline.tasks.image_processing import THUMBNAIL_WIDTH, save_resized_widths
+from pipeline.tasks.utils.extraction_manifest import (
+    append_manifest_entry,
+    build_manifest_entry,
+    load_manifest,
+    match_manifest_entry,
+    write_manifest,
+)
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
+# Compressed image formats that can be written to disk exactly as stored in the PDF
+PASSTHROUGH_SUFFIXES = {"/DCTDecode": ".jpg", "/JPXDecode": ".jp2"}
+# Lossless wrappers that may be applied on top of a JPEG stream, e.g. ASCII85
+SIMPLE_FILTERS = {
+    "/ASCII85Decode",
+    "/ASCIIHexDecode",
+    "/FlateDecode",
+    "/LZWDecode",
+    "/RunLengthDecode",
+}
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _compressed_image_data(pdf_image: PdfImage) -> tuple[Any, str] | None:
+    """
+    Return the compressed bytes and file suffix of a plain JPEG or JPEG 2000 image.
+
+    Returns None if the image is not one that can be saved without decoding.
+    """
+    filters = pdf_image.filters
+    if not filters or filters[-1] not in PASSTHROUGH_SUFFIXES:
+        return None
+    if any(f not in SIMPLE_FILTERS for f in filters[:-1]):
+        return None
+
+    raw_image = pdf_image.obj
+    if "/Decode" in raw_image:
+        return None
+
+    if filters[-1] == "/DCTDecode":
+        if pdf_image.mode not in ("L", "RGB"):
+            return None
+        # RGB JPEGs are only standard if stored as YUV (/ColorTransform 1)
+        decode_parms = pdf_image.decode_parms[-1] if pdf_image.decode_parms else {}
+        if pdf_image.mode == "RGB" and decode_parms.get("/ColorTransform", 1) != 1:
+            return None
+
+    if len(filters) == 1:
+        data = raw_image.read_raw_bytes()
+    else:
+        # Decode only the lossless wrappers, leaving the JPEG data compressed
+        wrapped = copy(raw_image)
+        wrapped.Filter = Array([Name(f) for f in filters[:-1]])
+        if pdf_image.decode_parms:
+            wrapped.DecodeParms = Array(pdf_image.decode_parms[:-1])
+        data = wrapped.read_bytes(StreamDecodeLevel.specialized)
+
+    return data, PASSTHROUGH_SUFFIXES[filters[-1]]
+
+
+def extract_compressed_image(pdf_image: PdfImage, output_stem: Path) -> Path | None:
+    """
+    Write a JPEG or JPEG 2000 image stream straight to disk without decoding it.
+
+    Scanned PDFs usually embed each page as a single DCTDecode (JPEG) image, which is
+    already a valid image file. If the image stream is a plain JPEG or JPEG 2000,
+    optionally wrapped in lossless filters such as ASCII85, the compressed bytes are
+    copied to `<output_stem>.jpg` or `<output_stem>.jp2` with a large buffered write.
+    No pixel data is decoded.
+
+    Images that would need their pixels transforming to be saved correctly (CMYK or
+    unusual colour transforms, /Decode arrays) are not handled, and None is returned
+    so the caller can fall back to `PdfImage.extract_to`.
+
+    Args:
+        pdf_image (PdfImage): The image to extract.
+        output_stem (Path): Output path without the file extension.
+
+    Returns:
+        Path | None: Path to the written image, or None if the fast path does not
+        apply to this image.
+    """
+    compressed = _compressed_image_data(pdf_image)
+    if compressed is None:
+        return None
+
+    data, suffix = compressed
+    output_path = Path(f"{output_stem}{suffix}")
+    with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(data)
+    return output_path
+
+
 def extract_images_from_pdf(pdf_path: Path, output_dir: Path) -> list[Path]:
     """
     Extract images from a single PDF and save them to a directory.
@@ -29,6 +129,11 @@ def extract_images_from_pdf(pdf_path: Path, output_dir: Path) -> list[Path]:
     pattern: <PDF_stem>_page<page_num>_img<image_num>. Images are saved in the
     specified output directory.
 
+    JPEG and JPEG 2000 images are copied to disk without decoding using
+    `extract_compressed_image`. All other images fall back to
+    `PdfImage.extract_to`. The method and time taken for each image are logged at
+    DEBUG level, and a count per method is logged at INFO level.
+
     Non-PDF files will raise a ValueError. Any unsupported or unreadable images
     are skipped with a logged error.
 
@@ -50,51 +155,67 @@ def extract_images_from_pdf(pdf_path: Path, output_dir: Path) -> list[Path]:
     extracted_images = []
     pdf_name = pdf_path.stem
 
-    doc = Pdf.open(pdf_path)
     total_images = 0
+    method_counts = {"passthrough": 0, "extract_to": 0}
+    method_times = {"passthrough": 0.0, "extract_to": 0.0}
 
-    for page_num, page in enumerate(doc.pages):
-        images = page.images
-        logger.debug("Page %d: Found %d images.", page_num + 1, len(images))
+    with Pdf.open(pdf_path) as doc:
+        for page_num, page in enumerate(doc.pages):
+            images = page.images
+            logger.debug("Page %d: Found %d images.", page_num + 1, len(images))
 
-        for img_index, (_, raw_image) in enumerate(images.items()):
-            image_start_time = time.time()  # Image time start
-
-            try:
-                pdf_image = PdfImage(raw_image)
+            for img_index, (_, raw_image) in enumerate(images.items()):
+                image_start_time = time.time()  # Image time start
                 output_stem = (
                     Path(output_dir)
                     / f"{pdf_name}_page{page_num + 1}_img{img_index + 1}"
                 )
-                output_path = pdf_image.extract_to(fileprefix=str(output_stem))
-                extracted_images.append(Path(output_path))
-
-            except (
-                UnsupportedImageTypeError,
-                HifiPrintImageNotTranscodableError,
-                InvalidPdfImageError,
-                ImageDecompressionError,
-            ) as e:
-                logger.error(
-                    "PikePDF cannot extract the image on page %d: %s", page_num + 1, e
-                )
-            except OSError as e:
-                logger.error(
-                    "Error writing image to file %s: %s", extracted_images[-1], e
-                )
-            except Exception as e:
-                logger.error(
-                    "Unexpected error processing image on page %d: %s", page_num + 1, e
-                )
 
-            image_end_time = time.time()  # Image time end
-            total_images += 1
+                try:
+                    pdf_image = PdfImage(raw_image)
+                    method = "passthrough"
+                    output_path = extract_compressed_image(pdf_image, output_stem)
+                    if output_path is None:
+                        method = "extract_to"
+                        output_path = Path(
+                            pdf_image.extract_to(fileprefix=str(output_stem))
+                        )
+                    extracted_images.append(output_path)
 
-            logger.debug(
-                "Saved: %s (Processing time: %.2f seconds)",
-                extracted_images[-1],
-                image_end_time - image_start_time,
-            )
+                except (
+                    UnsupportedImageTypeError,
+                    HifiPrintImageNotTranscodableError,
+                    InvalidPdfImageError,
+                    ImageDecompressionError,
+                ) as e:
+                    logger.error(
+                        "PikePDF cannot extract the image on page %d: %s",
+                        page_num + 1,
+                        e,
+                    )
+                    continue
+                except OSError as e:
+                    logger.error("Error writing image to file %s: %s", output_stem, e)
+                    continue
+                except Exception as e:
+                    logger.error(
+                        "Unexpected error processing image on page %d: %s",
+                        page_num + 1,
+                        e,
+                    )
+                    continue
+
+                image_time = time.time() - image_start_time  # Image time end
+                total_images += 1
+                method_counts[method] += 1
+                method_times[method] += image_time
+
+                logger.debug(
+                    "Saved: %s (Method: %s, Processing time: %.3f seconds)",
+                    output_path,
+                    method,
+                    image_time,
+                )
 
     # Total time end
     pdf_end_time = time.time()
@@ -105,12 +226,30 @@ def extract_images_from_pdf(pdf_path: Path, output_dir: Path) -> list[Path]:
         total_images,
         total_time,
     )
+    logger.info(
+        "Passthrough: %d images in %.2f seconds; extract_to: %d images in %.2f "
+        "seconds.",
+        method_counts["passthrough"],
+        method_times["passthrough"],
+        method_counts["extract_to"],
+        method_times["extract_to"],
+    )
     logger.info("Completed processing %s", pdf_path)
 
     return extracted_images
 
 
-def extract_images_from_dir(dir_path: Path, output_dir: Path) -> dict[Path, list[Path]]:
+def _extract_pdf_for_batch(
+    pdf_path: Path, output_dir: Path
+) -> tuple[list[Path], dict[str, Any]]:
+    """Extract one PDF of a batch and build its manifest entry."""
+    images = extract_images_from_pdf(pdf_path, output_dir / pdf_path.stem)
+    return images, build_manifest_entry(pdf_path, images, output_dir)
+
+
+def extract_images_from_dir(
+    dir_path: Path, output_dir: Path, workers: int = 1, resume: bool = True
+) -> dict[Path, list[Path]]:
     """
     Extract all images from all PDF files in a directory.
 
@@ -118,32 +257,295 @@ def extract_images_from_dir(dir_path: Path, output_dir: Path) -> dict[Path, list
     `extract_images_from_pdf`, and saves them into subfolders within `output_dir`.
     Non-PDF files are skipped with a warning.
 
+    If `workers` is greater than 1, each PDF is sent to a process pool of that size
+    and extracted in parallel. Output filenames and the returned mapping are the same
+    as for a sequential run, since each PDF writes only to its own subfolder.
+
+    A manifest in `output_dir` records each completed PDF with its size, mtime,
+    content hash and the images it produced. Entries are appended as each PDF
+    completes. If `resume` is True, PDFs that are unchanged since they were recorded,
+    and whose images are still present, are skipped, so a batch that is interrupted
+    picks up where it left off on the next run. If `resume` is False, the existing
+    manifest is discarded and every PDF is extracted again.
+
     Args:
         dir_path (Path): The directory containing PDF files to process.
         output_dir (Path): The directory where output images will be saved.
+        workers (int): Number of worker processes to use. Defaults to 1 (sequential).
+        resume (bool): Skip PDFs already extracted according to the manifest.
+            Defaults to True.
 
     Returns:
         dict[Path, list[Path]]: A mapping from each processed PDF file to a list of
-        extracted image file paths.
+        extracted image file paths, in sorted filename order. Skipped PDFs are
+        included with the images recorded in the manifest.
+
+    Raises:
+        ValueError: If `workers` is less than 1.
     """
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
     logger.info("Starting batch extraction of images from folder: %s", dir_path)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     start_time = time.time()
     results: Dict[Path, List[Path]] = {}
 
+    manifest = load_manifest(output_dir) if resume else {}
+    # Compact the manifest so appends start after a clean final line
+    write_manifest(output_dir, manifest)
+
+    files = []
+    pending = []
     for file in sorted(dir_path.glob("*")):
         if not file.is_file():
             logger.debug("Skipping non-file: %s", file)
             continue
+        files.append(file)
+
+        entry = manifest.get(file.name)
+        if entry is not None:
+            current = match_manifest_entry(file, entry, output_dir)
+            if current is not None:
+                logger.debug("Skipping unchanged PDF: %s", file.name)
+                results[file] = [output_dir / img["path"] for img in current["images"]]
+                if current is not entry:
+                    append_manifest_entry(output_dir, current)
+                continue
+        pending.append(file)
+
+    logger.info(
+        "%d files already extracted, %d to process",
+        len(files) - len(pending),
+        len(pending),
+    )
+
+    def record(file: Path, images: list[Path], entry: dict[str, Any]):
+        results[file] = images
+        # Remove images left over from an earlier version of this PDF
+        previous = manifest.get(file.name)
+        if previous is not None:
+            current_paths = {img["path"] for img in entry["images"]}
+            for img in previous["images"]:
+                if img["path"] not in current_paths:
+                    (output_dir / img["path"]).unlink(missing_ok=True)
+        append_manifest_entry(output_dir, entry)
+
+    if workers == 1:
+        for file in pending:
+            try:
+                record(file, *_extract_pdf_for_batch(file, output_dir))
+            except ValueError as e:
+                logger.warning("Skipping non-PDF %s: %s", file.name, e)
+    else:
+        logger.info("Extracting %d files with %d workers", len(pending), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_extract_pdf_for_batch, file, output_dir): file
+                for file in pending
+            }
+            # Record each PDF as soon as it finishes so a crash loses little work
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    record(file, *future.result())
+                except ValueError as e:
+                    logger.warning("Skipping non-PDF %s: %s", file.name, e)
+
+    total_time = time.time() - start_time
+    logger.info(
+        "Finished batch extraction from %s in %.2f seconds", dir_path, total_time
+    )
+    # Return PDFs in sorted filename order, whether skipped or extracted
+    return {file: results[file] for file in files if file in results}
+
+
+def extract_and_thumbnail_pdf(
+    pdf_path: Path,
+    output_dir: Path,
+    widths: Sequence[int] = (THUMBNAIL_WIDTH,),
+) -> dict[Path, list[Path]]:
+    """
+    Extract images from a PDF and create thumbnails for them in a single pass.
+
+    Each image is read from the PDF once into memory, written to `output_dir` at
+    full size with the same name and format as `extract_images_from_pdf`, then
+    decoded once from memory and downscaled to each of `widths`. Thumbnails are saved
+    to a `thumbnails` subfolder and named as by `resize_image`, e.g.
+    <PDF_stem>_page1_img1_w150px.jpg. This avoids writing each image to disk and
+    then reading and decoding it again to make its thumbnails.
+
+    Non-PDF files will raise a ValueError. Any unsupported or unreadable images
+    are skipped with a logged error.
+
+    Args:
+        pdf_path (Path): Path to the input PDF file.
+        output_dir (Path): Directory where extracted image files will be saved.
+        widths (Sequence[int]): Thumbnail widths in pixels. Defaults to 150px.
+
+    Returns:
+        dict[Path, list[Path]]: A mapping from each extracted image to the list of
+        its thumbnails, in the order of `widths`.
+    """
+    if pdf_path.suffix.lower() != ".pdf":
+        raise ValueError(f"File is not a PDF: {pdf_path}")
+
+    logger.info("Starting extraction and thumbnailing of PDF: %s", pdf_path)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    thumbnail_dir = output_dir / "thumbnails"
+    start_time = time.time()
+    results: dict[Path, list[Path]] = {}
+    pdf_name = pdf_path.stem
+
+    with Pdf.open(pdf_path) as doc:
+        for page_num, page in enumerate(doc.pages):
+            for img_index, (_, raw_image) in enumerate(page.images.items()):
+                image_start_time = time.time()
+                output_stem = (
+                    output_dir / f"{pdf_name}_page{page_num + 1}_img{img_index + 1}"
+                )
+
+                try:
+                    pdf_image = PdfImage(raw_image)
+                    compressed = _compressed_image_data(pdf_image)
+                    if compressed is not None:
+                        data, suffix = compressed
+                    else:
+                        buffer = BytesIO()
+                        suffix = pdf_image.extract_to(stream=buffer)
+                        data = buffer.getbuffer()
+
+                    output_path = Path(f"{output_stem}{suffix}")
+                    with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                        f.write(data)
+
+                    with Image.open(BytesIO(data)) as img:
+                        thumbnails = save_resized_widths(
+                            img, output_path.name, thumbnail_dir, widths
+                        )
+                    results[output_path] = thumbnails
+
+                except (
+                    UnsupportedImageTypeError,
+                    HifiPrintImageNotTranscodableError,
+                    InvalidPdfImageError,
+                    ImageDecompressionError,
+                    UnidentifiedImageError,
+                ) as e:
+                    logger.error(
+                        "Cannot extract or thumbnail the image on page %d: %s",
+                        page_num + 1,
+                        e,
+                    )
+                    continue
+                except OSError as e:
+                    logger.error("Error writing image to file %s: %s", output_stem, e)
+                    continue
+                except Exception as e:
+                    # e.g. Pillow's DecompressionBombError, so that one bad image
+                    # doesn't stop the rest of the PDF being processed
+                    logger.error(
+                        "Unexpected error processing image on page %d: %s",
+                        page_num + 1,
+                        e,
+                    )
+                    continue
+
+                logger.debug(
+                    "Saved: %s and %d thumbnails (Processing time: %.3f seconds)",
+                    output_path,
+                    len(thumbnails),
+                    time.time() - image_start_time,
+                )
+
+    logger.info(
+        "Total: %d images in %.2f seconds.", len(results), time.time() - start_time
+    )
+    logger.info("Completed processing %s", pdf_path)
+
+    return results
+
+
+def extract_and_thumbnail_dir(
+    dir_path: Path,
+    output_dir: Path,
+    widths: Sequence[int] = (THUMBNAIL_WIDTH,),
+    workers: int = 1,
+) -> dict[Path, dict[Path, list[Path]]]:
+    """
+    Extract images and create thumbnails for all PDF files in a directory.
+
+    Runs `extract_and_thumbnail_pdf` on each PDF in `dir_path`, saving the output of
+    each into a subfolder of `output_dir` named after the PDF. If `workers` is
+    greater than 1, each PDF is sent to a process pool of that size. Files without
+    a .pdf extension, or that cannot be opened as a PDF, are skipped with a warning;
+    a PDF that fails for any other reason is logged as an error and skipped.
+
+    Args:
+        dir_path (Path): The directory containing PDF files to process.
+        output_dir (Path): The directory where output images will be saved.
+        widths (Sequence[int]): Thumbnail widths in pixels. Defaults to 150px.
+        workers (int): Number of worker processes to use. Defaults to 1 (sequential).
+
+    Returns:
+        dict[Path, dict[Path, list[Path]]]: A mapping from each processed PDF file to
+        the mapping of its extracted images to their thumbnails, in sorted filename
+        order.
+
+    Raises:
+        ValueError: If `workers` is less than 1.
+    """
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
+    logger.info("Starting batch extraction and thumbnailing from folder: %s", dir_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.time()
+    results: dict[Path, dict[Path, list[Path]]] = {}
+    files = []
+    for file in sorted(dir_path.glob("*")):
+        if not file.is_file():
+            continue
+        if file.suffix.lower() != ".pdf":
+            logger.warning("Skipping non-PDF %s", file.name)
+            continue
+        files.append(file)
+
+    def collect(file: Path, result: Callable[[], dict[Path, list[Path]]]) -> None:
         try:
-            images = extract_images_from_pdf(file, output_dir / file.stem)
-            results[file] = images
-        except ValueError as e:
+            results[file] = result()
+        except PdfError as e:
             logger.warning("Skipping non-PDF %s: %s", file.name, e)
+        except Exception as e:
+            logger.error("Error processing PDF %s: %s", file.name, e)
+
+    if workers == 1:
+        for file in files:
+            collect(
+                file,
+                partial(
+                    extract_and_thumbnail_pdf, file, output_dir / file.stem, widths
+                ),
+            )
+    else:
+        logger.info("Processing %d files with %d workers", len(files), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                file: executor.submit(
+                    extract_and_thumbnail_pdf, file, output_dir / file.stem, widths
+                )
+                for file in files
+            }
+            for file, future in futures.items():
+                collect(file, future.result)
 
     total_time = time.time() - start_time
     logger.info(
-        "Finished batch extraction from %s in %.2f seconds", dir_path, total_time
+        "Finished batch extraction and thumbnailing from %s in %.2f seconds",
+        dir_path,
+        total_time,
     )
     return results
@@ -0,0 +1,204 @@
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, UnidentifiedImageError
+from PIL.Image import Resampling
+
+from pipeline.logging_config import setup_logging
+from pipeline.tasks.image_processing import VALID_SUFFIXES
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Deep Zoom defaults, as used by OpenSeadragon and the original Deep Zoom Composer
+TILE_SIZE = 254
+TILE_OVERLAP = 1
+TILE_FORMAT = "jpg"
+TILE_QUALITY = 85
+
+DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{format}" \
+Overlap="{overlap}" TileSize="{tile_size}">
+    <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def _tile_bounds(length: int, tile_size: int, overlap: int) -> list[tuple[int, int]]:
+    """Return the (start, end) pixel bounds of each tile along one axis."""
+    bounds = []
+    for index in range(math.ceil(length / tile_size)):
+        start = index * tile_size - (overlap if index > 0 else 0)
+        end = min((index + 1) * tile_size + overlap, length)
+        bounds.append((start, end))
+    return bounds
+
+
+def create_deep_zoom(
+    img_path: Path,
+    output_dir: Path,
+    tile_size: int = TILE_SIZE,
+    overlap: int = TILE_OVERLAP,
+    tile_format: str = TILE_FORMAT,
+) -> Path:
+    """
+    Create a Deep Zoom (DZI) tile pyramid for an image.
+
+    Writes `<img_stem>.dzi`, describing the full image size, and a folder
+    `<img_stem>_files` with one subfolder per zoom level, each containing tiles named
+    `<column>_<row>.<tile_format>`. Level 0 is a single pixel and the highest level
+    is the full-size image; each level is half the size of the one above it. An image
+    viewer such as OpenSeadragon can then fetch only the tiles visible at the current
+    zoom, rather than the whole original.
+
+    Args:
+        img_path (Path): Path to the original image file.
+        output_dir (Path): Directory where the .dzi file and tiles will be saved.
+        tile_size (int): Width and height of each tile in pixels, before overlap.
+        overlap (int): Number of pixels each tile overlaps its neighbours by.
+        tile_format (str): File format of the tiles, "jpg" or "png".
+
+    Returns:
+        Path: Path to the .dzi file.
+
+    Raises:
+        ValueError: If the file is not a supported image type.
+    """
+    if img_path.suffix.lower() not in VALID_SUFFIXES:
+        raise ValueError(f"File is not a supported image type: {img_path}")
+
+    start_time = time.time()
+    logger.info("Starting tiling of image: %s", img_path)
+
+    tiles_dir = output_dir / f"{img_path.stem}_files"
+    dzi_path = output_dir / f"{img_path.stem}.dzi"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(img_path) as img:
+        level_img = img.convert("RGB") if img.mode not in ("RGB", "L") else img.copy()
+
+    width, height = level_img.size
+    max_level = math.ceil(math.log2(max(width, height)))
+    num_tiles = 0
+
+    # Work down from full size, halving each time, so every level is downscaled
+    # from the one above rather than from the original
+    for level in range(max_level, -1, -1):
+        level_dir = tiles_dir / str(level)
+        level_dir.mkdir(parents=True, exist_ok=True)
+        level_width, level_height = level_img.size
+
+        for col, (x0, x1) in enumerate(_tile_bounds(level_width, tile_size, overlap)):
+            for row, (y0, y1) in enumerate(
+                _tile_bounds(level_height, tile_size, overlap)
+            ):
+                tile = level_img.crop((x0, y0, x1, y1))
+                tile_path = level_dir / f"{col}_{row}.{tile_format}"
+                if tile_format == "jpg":
+                    tile.save(tile_path, quality=TILE_QUALITY)
+                else:
+                    tile.save(tile_path)
+                num_tiles += 1
+
+        if level > 0:
+            level_img = level_img.resize(
+                (math.ceil(level_width / 2), math.ceil(level_height / 2)),
+                Resampling.LANCZOS,
+            )
+
+    dzi_path.write_text(
+        DZI_TEMPLATE.format(
+            format=tile_format,
+            overlap=overlap,
+            tile_size=tile_size,
+            width=width,
+            height=height,
+        ),
+        encoding="utf-8",
+    )
+
+    total_time = time.time() - start_time
+    logger.info(
+        "Completed %d tiles in %d levels for %s in %.2f seconds",
+        num_tiles,
+        max_level + 1,
+        img_path,
+        total_time,
+    )
+
+    return dzi_path
+
+
+def create_deep_zoom_from_dir(
+    dir_path: Path,
+    output_dir: Path,
+    workers: int = 1,
+) -> dict[Path, Path]:
+    """
+    Create Deep Zoom tile pyramids for all images in a directory and its subfolders.
+
+    Images are found recursively, skipping `thumbnails` folders, and the folder
+    layout is mirrored in `output_dir`, so that the tiles for
+    `<dir_path>/APV01/APV01_page1_img1.jpg` are described by
+    `<output_dir>/APV01/APV01_page1_img1.dzi`. If `workers` is greater than 1, images
+    are tiled in parallel in a process pool of that size.
+
+    Args:
+        dir_path (Path): Directory containing image files to tile.
+        output_dir (Path): Directory where the tile pyramids will be saved.
+        workers (int): Number of worker processes to use. Defaults to 1 (sequential).
+
+    Returns:
+        dict[Path, Path]: Mapping from each original image file to its .dzi file, in
+        sorted filename order.
+
+    Raises:
+        ValueError: If `workers` is less than 1.
+    """
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
+    logger.info("Starting batch tiling of images from folder: %s", dir_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.time()
+    result: dict[Path, Path] = {}
+
+    files = []
+    for file in sorted(dir_path.rglob("*")):
+        if not file.is_file() or file.suffix.lower() not in VALID_SUFFIXES:
+            continue
+        if "thumbnails" in file.relative_to(dir_path).parts:
+            logger.debug("Skipping thumbnail: %s", file)
+            continue
+        files.append(file)
+
+    def image_output_dir(file: Path) -> Path:
+        return output_dir / file.parent.relative_to(dir_path)
+
+    if workers == 1:
+        for file in files:
+            try:
+                result[file] = create_deep_zoom(file, image_output_dir(file))
+            except (UnidentifiedImageError, OSError) as e:
+                logger.warning("Failed to process %s: %s", file.name, e)
+    else:
+        logger.info("Tiling %d images with %d workers", len(files), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                file: executor.submit(create_deep_zoom, file, image_output_dir(file))
+                for file in files
+            }
+            for file, future in futures.items():
+                try:
+                    result[file] = future.result()
+                except (UnidentifiedImageError, OSError) as e:
+                    logger.warning("Failed to process %s: %s", file.name, e)
+
+    total_time = time.time() - start_time
+    logger.info("Finished batch tiling from %s in %.2f seconds", dir_path, total_time)
+
+    return result
@@ -0,0 +1,145 @@
+"""Helpers for the on-disk manifest that makes batch PDF extraction resumable."""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from pipeline.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "extraction_manifest.jsonl"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest_entry(
+    pdf_path: Path, images: list[Path], output_dir: Path
+) -> dict[str, Any]:
+    """
+    Build the manifest entry for a PDF whose images have just been extracted.
+
+    Records the size, mtime and content hash of the source PDF, along with the path
+    (relative to `output_dir`), size, mtime and content hash of every image it
+    produced.
+    """
+    stat = pdf_path.stat()
+    return {
+        "pdf": pdf_path.name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(pdf_path),
+        "images": [_image_entry(Path(image), output_dir) for image in images],
+    }
+
+
+def _image_entry(image: Path, output_dir: Path) -> dict[str, Any]:
+    stat = image.stat()
+    return {
+        "path": str(image.relative_to(output_dir)),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(image),
+    }
+
+
+def load_manifest(output_dir: Path) -> dict[str, dict[str, Any]]:
+    """
+    Load the manifest in `output_dir`, keyed by PDF filename.
+
+    The manifest is a JSON Lines file that is appended to as each PDF completes, so
+    later lines override earlier ones for the same PDF. A malformed line, e.g. one
+    left half-written by a crash, is logged and ignored.
+    """
+    path = output_dir / MANIFEST_FILENAME
+    manifest: dict[str, dict[str, Any]] = {}
+    if not path.exists():
+        return manifest
+
+    with path.open("r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                manifest[entry["pdf"]] = entry
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning(
+                    "Ignoring malformed manifest line %d in %s", line_num, path
+                )
+    return manifest
+
+
+def write_manifest(output_dir: Path, manifest: dict[str, dict[str, Any]]) -> None:
+    """Atomically rewrite the manifest with one line per PDF."""
+    path = output_dir / MANIFEST_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        for entry in manifest.values():
+            f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def append_manifest_entry(output_dir: Path, entry: dict[str, Any]) -> None:
+    """Append a completed PDF to the manifest and flush it to disk."""
+    path = output_dir / MANIFEST_FILENAME
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def match_manifest_entry(
+    pdf_path: Path, entry: dict[str, Any], output_dir: Path
+) -> Optional[dict[str, Any]]:
+    """
+    Return the manifest entry if `pdf_path` and its images are unchanged, else None.
+
+    The common case costs one stat() for the PDF and one for each image. A file is
+    only hashed if its size matches but its mtime does not (e.g. it was copied,
+    touched or rewritten); if the PDF is hashed, so are all its images. If the hashes
+    still match, a copy of the entry with the new mtimes is returned so the caller
+    can record it.
+    """
+    stat = pdf_path.stat()
+    if stat.st_size != entry["size"]:
+        return None
+    pdf_touched = stat.st_mtime_ns != entry["mtime_ns"]
+
+    images = []
+    for image in entry["images"]:
+        image_path = output_dir / image["path"]
+        try:
+            image_stat = image_path.stat()
+        except FileNotFoundError:
+            return None
+        if image_stat.st_size != image["size"]:
+            return None
+        # Entries written before image mtimes were recorded have none
+        if pdf_touched or image_stat.st_mtime_ns != image.get("mtime_ns"):
+            if file_sha256(image_path) != image["sha256"]:
+                return None
+            image = {**image, "mtime_ns": image_stat.st_mtime_ns}
+        images.append(image)
+
+    if pdf_touched and file_sha256(pdf_path) != entry["sha256"]:
+        return None
+
+    if not pdf_touched and images == entry["images"]:
+        return entry
+    return {**entry, "mtime_ns": stat.st_mtime_ns, "images": images}
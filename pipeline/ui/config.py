@@ -6,11 +6,40 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     images_dir: Path = Path("tests/data/public/images")
     images_url_base: Path = Path("/images")
+    tiles_dir: Path = Path("tests/data/public/tiles")
+    tiles_url_base: Path = Path("/tiles")
+    # Unpacked OpenSeadragon release (openseadragon.min.js and images/), served by
+    # muster for the Deep Zoom viewer
+    openseadragon_dir: Path = Path("pipeline/ui/muster/static/openseadragon")
+    openseadragon_url_base: Path = Path("/openseadragon")
     demo_mode: bool = True
 
+    # Write audit log rows on a background thread instead of in each save
+    audit_log_async: bool = False
+    audit_log_flush_interval: float = 1.0
+    audit_log_flush_size: int = 100
+
+    # Number of forms after the current one in the reviewer's queue that the muster
+    # correction page loads, with their images, ahead of time
+    prefetch_forms: int = 5
+
+    # Seconds for which the record counts on the muster home page are cached
+    statistics_ttl: float = 30.0
+
     project_root: Path = Path(__file__).resolve().parents[2]
     database_name: Path = Path("socdyn_test_db.db")
 
+    # SQLite PRAGMAs set on every connection (see pipeline.database.init_db)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64_000  # Negative values are in KiB, i.e. 64MB
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait for a lock
+    # Overrides used when importing data
+    sqlite_bulk_load_synchronous: str = "OFF"
+    sqlite_bulk_load_cache_size: int = -256_000
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,17 @@
 from nicegui import ui
-from sqlmodel import Session, select
-
+from sqlmodel import Session
+
+from pipeline.database.helpers.listing import (
+    IndividualRow,
+    iter_rows,
+    list_forms,
+    list_individuals,
+)
 from pipeline.database.init_db import engine
-from pipeline.database.models import Individual
+from pipeline.database.models import FormB102r
 
 ITEMS_PER_PAGE = 25
+RAW_FIELDS = [name for name in FormB102r.model_fields if name.endswith("_raw")]
 
 
 def render():
@@ -15,11 +22,16 @@ def render():
 
     ui.label("Individuals").classes("text-xl font-bold mb-4")
 
-    page_state = {"current": 1}
+    page_state = {"current": 1, "has_next": False}
+    # Last individual of each page before the current one, for keyset pagination
+    page_ends: list[IndividualRow] = []
+    shown: list[IndividualRow] = []
     with ui.row().classes("items-center justify-between mt-4"):
         ui.button("◀ Previous", on_click=lambda: change_page(-1))
         ui.label().bind_text_from(page_state, "current")
-        ui.button("Next ▶", on_click=lambda: change_page(1))
+        ui.button("Next ▶", on_click=lambda: change_page(1)).bind_enabled_from(
+            page_state, "has_next"
+        )
 
     table_container = ui.column().classes("w-full")
 
@@ -27,32 +39,33 @@ def render():
     with form_dialog:
         ui.column().classes("p-4")
 
-    def get_paginated_individuals(page: int) -> list[Individual]:
-        offset = (page - 1) * ITEMS_PER_PAGE
+    def get_paginated_individuals() -> list[IndividualRow]:
         with Session(engine) as session:
-            individuals = session.exec(
-                select(Individual).offset(offset).limit(ITEMS_PER_PAGE)
-            ).all()
-            # Sort by numeric part of PDF ID
-            return sorted(
-                individuals,
-                key=lambda ind: (
-                    int(ind.pdf_id.removeprefix("APV"))
-                    if ind.pdf_id and ind.pdf_id.startswith("APV")
-                    else 0
-                ),
+            # Sorted by numeric part of PDF ID. One more than a page is read to
+            # know whether there is a next page.
+            return list_individuals(
+                session,
+                after=page_ends[-1] if page_ends else None,
+                limit=ITEMS_PER_PAGE + 1,
             )
 
     def show_form_data(individual_id: int):
         with Session(engine) as session:
-            individual = session.get(Individual, individual_id)
+            forms = list_forms(session, individual_id)
 
-            if not individual or not individual.b102rs:
+            if not forms:
                 ui.notify("No B102r forms found for this individual.", color="warning")
                 return
 
-            # only show first for now
-            form = individual.b102rs[0]  # type: ignore
+            # only show first for now, reading just the columns shown
+            *raw_values, form_image = next(
+                iter_rows(
+                    session,
+                    FormB102r,
+                    [*RAW_FIELDS, "form_image"],
+                    record_ids=[forms[0].id],
+                )
+            )
 
             form_dialog.clear()
 
@@ -65,19 +78,18 @@ def render():
                             {"name": "field", "label": "Field", "field": "field"},
                             {"name": "value", "label": "Raw Value", "field": "value"},
                         ]
-                        rows = []
-                        for key in form.model_fields.keys():
-                            if key.endswith("_raw"):
-                                value = getattr(form, key)
-                                rows.append({"field": key, "value": value or ""})
+                        rows = [
+                            {"field": key, "value": value or ""}
+                            for key, value in zip(RAW_FIELDS, raw_values, strict=True)
+                        ]
                         ui.table(columns=columns, rows=rows).classes("w-full").props(
                             "dense bordered"
                         )
 
                     # Image display
                     with ui.column().classes("w-3/5 items-center"):
-                        if form.form_image:
-                            image_url = f"/images/{form.form_image}"
+                        if form_image:
+                            image_url = f"/images/{form_image}"
                             ui.image(image_url).classes(
                                 "w-[100%] h-auto object-contain rounded shadow"
                             )
@@ -89,7 +101,10 @@ def render():
     def update_table():
         table_container.clear()
 
-        individuals = get_paginated_individuals(page_state["current"])
+        individuals = get_paginated_individuals()
+        page_state["has_next"] = len(individuals) > ITEMS_PER_PAGE
+        individuals = individuals[:ITEMS_PER_PAGE]
+        shown[:] = individuals
 
         columns = [
             {"name": "id", "label": "ID", "field": "id"},
@@ -126,9 +141,16 @@ def render():
             )
 
     def change_page(delta: int):
-        page_state["current"] += delta
-        if page_state["current"] < 1:
-            page_state["current"] = 1
+        if delta > 0:
+            # Stay on the last page
+            if not page_state["has_next"]:
+                return
+            page_ends.append(shown[-1])
+        else:
+            if not page_ends:
+                return
+            page_ends.pop()
+        page_state["current"] = len(page_ends) + 1
         update_table()
 
     update_table()
@@ -1,18 +1,40 @@
 from fastapi import HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, Response
 from nicegui import app, ui
 from nicegui.client import Client
 from nicegui.error import error_content
-from sqlmodel import Session
 
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
+from pipeline.database.helpers.form_b102r import FORM_TABLE_COLUMNS
+from pipeline.database.helpers.form_cache import DEFAULT_CAPACITY, FormCache
+from pipeline.database.helpers.statistics import DatabaseStatistics
 from pipeline.database.init_db import engine
-from pipeline.database.models import FormB102r
 from pipeline.ui.config import settings
 from pipeline.ui.muster.views.correct import render as render_correct
 from pipeline.ui.muster.views.home import render as render_home
 from pipeline.ui.muster.views.layout import layout
 
+# Optionally write audit log rows on a background thread, so that saving on the
+# correction page doesn't wait for them to be committed
+audit_writer: AuditLogWriter | None = None
+if settings.audit_log_async:
+    writer = AuditLogWriter(
+        engine,
+        flush_interval=settings.audit_log_flush_interval,
+        flush_size=settings.audit_log_flush_size,
+    )
+    app.on_startup(writer.start)
+    # Wrapped so that NiceGUI doesn't pass an argument through as the timeout
+    app.on_shutdown(lambda: writer.stop())
+    audit_writer = writer
+
+# Seconds for which browsers reuse a Deep Zoom tile before checking it is unchanged
+TILE_CACHE_MAX_AGE = 300
+
+# Record counts shown on the home page, shared by all visitors
+statistics = DatabaseStatistics(engine, ttl=settings.statistics_ttl)
+
 
 @app.exception_handler(RequestValidationError)
 async def _exception_handler_422(
@@ -33,26 +55,83 @@ def home():
         description="""Browse all available individuals and forms.
     Search and select forms for correction.""",
     ):
-        render_home()
+        render_home(statistics)
 
 
 @ui.page("/correct/{form_id}", title="Form Correction Page")
-def page(form_id: int):
-    with Session(engine) as session:
-        form = session.get(FormB102r, form_id)
+def page(
+    form_id: int,
+    sort_by: str = "lastname",
+    descending: bool = False,
+    search: str | None = None,
+):
+    """
+    The query parameters give the order of the form table the reviewer came from,
+    which is the queue of forms they are working through. An empty `sort_by` sorts
+    search results by relevance.
+    """
+    if sort_by and sort_by not in FORM_TABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort forms by {sort_by!r}")
 
-    if not form:
+    # Forms read on this page, including the next ones in the queue
+    cache = FormCache(engine, capacity=DEFAULT_CAPACITY + settings.prefetch_forms)
+    if cache.get(form_id) is None:
         raise HTTPException(status_code=404, detail=f"Form {form_id} not found.")
 
     with layout(
         title="Form Correction Page",
         description="Review and correct the data for this form.",
     ):
-        render_correct(form_id)
+        render_correct(
+            form_id,
+            cache,
+            audit_writer,
+            sort_by=sort_by or None,
+            descending=descending,
+            search=search,
+        )
+
+
+@app.get(f"{settings.tiles_url_base}/{{file_path:path}}")
+def tiles(file_path: str, request: Request) -> Response:
+    """
+    Serve Deep Zoom (.dzi) descriptors and tiles created by the tile-images command.
+
+    The image viewer only requests the tiles visible at the current zoom level.
+    Browsers reuse a tile for TILE_CACHE_MAX_AGE seconds, then check that it is
+    unchanged by its ETag, so tiles overwritten by running tile-images again are
+    shown soon after without downloading unchanged tiles again.
+    """
+    tiles_root = settings.tiles_dir.resolve()
+    path = (tiles_root / file_path).resolve()
+    if not path.is_relative_to(tiles_root) or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Tile {file_path} not found.")
+    # The file's stat sets the ETag header now rather than when it is sent
+    response = FileResponse(
+        path,
+        stat_result=path.stat(),
+        headers={
+            "Cache-Control": f"public, max-age={TILE_CACHE_MAX_AGE}, must-revalidate"
+        },
+    )
+    if request.headers.get("if-none-match") == response.headers["etag"]:
+        return Response(
+            status_code=304,
+            headers={
+                name: response.headers[name] for name in ("cache-control", "etag")
+            },
+        )
+    return response
 
 
 app.add_static_files(
     str(settings.images_url_base),
     str(settings.images_dir),
 )
+# Served locally rather than from a CDN, so that muster needs no outside network
+if settings.openseadragon_dir.is_dir():
+    app.add_static_files(
+        str(settings.openseadragon_url_base),
+        str(settings.openseadragon_dir),
+    )
 ui.run(title="Main App", port=8080)
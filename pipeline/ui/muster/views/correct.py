@@ -1,43 +1,213 @@
 import copy
+import json
 from collections import namedtuple
+from dataclasses import dataclass
 from datetime import date, datetime
+from pathlib import Path
 from typing import Optional, Union
 
-from nicegui import ui
+from nicegui import run, ui
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlmodel import Session
 
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
 from pipeline.database.helpers.form_b102r import (
-    get_form,
+    get_form_queue,
     get_individual_by_form,
     save_form_with_log,
 )
+from pipeline.database.helpers.form_cache import FormCache
 from pipeline.database.helpers.individual import save_individual_with_log
 from pipeline.database.init_db import engine
 from pipeline.database.models import FormB102r
+from pipeline.tasks.image_processing import SCREEN_WIDTH
+from pipeline.ui.config import settings
 from pipeline.ui.muster.views.css import correct_css
 
-# Current form global
-frm: FormB102r | None = None
-# Copy of form to compare for auditing on save
-original_frm: FormB102r | None = None
+OPENSEADRAGON_URL = f"{settings.openseadragon_url_base}/"
 
 
-def load_form(form_id: int):
-    global frm, original_frm
-    with Session(engine) as session:
-        frm = get_form(session, form_id)
-        original_frm = copy.deepcopy(frm)
+def screen_image_path(form_image: str) -> str:
+    """
+    Return the path of the screen-sized copy of a form image, if there is one.
 
+    Screen-sized copies are made by the `pyramid-images` command and saved in the
+    `thumbnails` folder next to the original, e.g. APV01/thumbnails/
+    APV01_page1_img1_w1200px.jpg. Falls back to the original image if not found.
+    """
+    original = Path(form_image)
+    screen = (
+        original.parent
+        / "thumbnails"
+        / f"{original.stem}_w{SCREEN_WIDTH}px{original.suffix}"
+    )
+    if (settings.images_dir / screen).exists():
+        return str(screen)
+    return form_image
 
-def render(form_id: int):
-    """Create the form editing page for a form specified by unique ID"""
+
+def deep_zoom_url(form_image: str) -> str | None:
+    """
+    Return the URL of the Deep Zoom descriptor for a form image, if there is one.
+
+    Tile pyramids are made by the `tile-images` command, which mirrors the images
+    folder layout, e.g. APV01/APV01_page1_img1.jpg is tiled as APV01/
+    APV01_page1_img1.dzi in the tiles folder. Returns None if OpenSeadragon, which
+    shows the tiles, is not installed in `settings.openseadragon_dir`.
+    """
+    if not (settings.openseadragon_dir / "openseadragon.min.js").is_file():
+        return None
+    dzi = Path(form_image).with_suffix(".dzi")
+    if (settings.tiles_dir / dzi).exists():
+        return f"{settings.tiles_url_base}/{dzi}"
+    return None
+
+
+def deep_zoom_viewer(dzi_url: str) -> None:
+    """Create an OpenSeadragon viewer that loads only the tiles it displays."""
+    viewer = ui.element("div").classes("w-full h-[60vh]")
+    # OpenSeadragon is loaded the first time a viewer is shown, which may be after
+    # the page was built. URLs are quoted as JSON, as image paths may contain quotes.
+    ui.timer(
+        0.1,
+        lambda: ui.run_javascript(
+            f"""
+            const show = () => OpenSeadragon({{
+                element: document.getElementById("c{viewer.id}"),
+                prefixUrl: {json.dumps(OPENSEADRAGON_URL + "images/")},
+                tileSources: {json.dumps(dzi_url)},
+                showNavigator: true,
+            }});
+            if (window.OpenSeadragon) {{
+                show();
+            }} else {{
+                const script = document.createElement("script");
+                script.src = {json.dumps(OPENSEADRAGON_URL + "openseadragon.min.js")};
+                script.onload = show;
+                document.head.appendChild(script);
+            }}
+            """
+        ),
+        once=True,
+    )
+
+
+def preload_images(image_urls: list[str]) -> None:
+    """Have the browser download images, so that they show at once when needed."""
+    ui.run_javascript(
+        f"window.preloadedImages = {json.dumps(image_urls)}.map((url) => {{"
+        "const image = new Image(); image.src = url; return image; });"
+    )
+
+
+@dataclass
+class CorrectionState:
+    """
+    State of one correction page: the form as edited and a copy of it as it was
+    loaded or last saved, to compare with for auditing on save, and the reviewer's
+    queue of form ids with the position of the current form in it.
+
+    The queue is the order of the form table the reviewer came from (see
+    `get_form_queue`). It is read once, the first time it is needed, rather than
+    while the page is being built.
+
+    Each page (NiceGUI client) has its own, so that reviewers correcting forms at
+    the same time in one muster process don't overwrite each other's edits.
+    """
+
+    form: FormB102r
+    original: FormB102r
+    sort_by: str | None = "lastname"
+    descending: bool = False
+    search: str | None = None
+    queue: list[int] | None = None
+    index: int = 0
+
+    @classmethod
+    def start(
+        cls,
+        form: FormB102r,
+        *,
+        sort_by: str | None = "lastname",
+        descending: bool = False,
+        search: str | None = None,
+    ) -> "CorrectionState":
+        """Start correcting a form, in a queue in the given table order."""
+        assert form.id is not None, "Form must have an ID to be corrected"
+        return cls(
+            form=form,
+            original=copy.deepcopy(form),
+            sort_by=sort_by,
+            descending=descending,
+            search=search,
+        )
+
+    def load_queue(self) -> list[int]:
+        """
+        Return the queue, reading it from the database the first time, with the
+        current form added to the front of it if needed.
+        """
+        if self.queue is None:
+            with Session(engine) as session:
+                queue = get_form_queue(
+                    session,
+                    sort_by=self.sort_by,
+                    descending=self.descending,
+                    search=self.search,
+                )
+            assert self.form.id is not None
+            if self.form.id not in queue:
+                queue.insert(0, self.form.id)
+            self.index = queue.index(self.form.id)
+            self.queue = queue
+        return self.queue
+
+    def show(self, form: FormB102r) -> None:
+        """Correct a form as loaded afresh, discarding any unsaved changes."""
+        self.form = form
+        self.original = copy.deepcopy(form)
+
+    def mark_saved(self) -> None:
+        """Compare later changes with the form as it has just been saved."""
+        self.original = copy.deepcopy(self.form)
+
+    def has_unsaved_changes(self) -> bool:
+        return self.form.model_dump() != self.original.model_dump()
+
+
+def render(
+    form_id: int,
+    cache: FormCache,
+    audit_writer: AuditLogWriter | None = None,
+    *,
+    sort_by: str | None = "lastname",
+    descending: bool = False,
+    search: str | None = None,
+):
+    """
+    Create the form editing page for a form specified by unique ID.
+
+    Forms are read through the page's `cache`. If `audit_writer` is given, audit log
+    rows for saved changes are queued on it rather than written as part of the save.
+
+    `sort_by`, `descending` and `search` give the order of the form table the
+    reviewer is working through (see `get_form_queue`). The Previous and Next
+    buttons move along it without leaving the page, and the next
+    `settings.prefetch_forms` forms and their images are loaded in the background,
+    so that moving on is instant.
+    """
 
     correct_css()
-    load_form(form_id)
+    form = cache.get(form_id)
+    assert form is not None, f"Form {form_id} not found"
+    state = CorrectionState.start(
+        form, sort_by=sort_by, descending=descending, search=search
+    )
 
     with ui.row().classes("w-full items-center justify-between"):
-        ui.html(f"<h3 class='text-xl font-bold my-4'>ID: {form_id}</h2>")
+        heading = ui.html(f"<h3 class='text-xl font-bold my-4'>ID: {form_id}</h2>")
+        queue_label = ui.label()
         ui.label("Form Type: B102").classes("text-bold")
     ui.separator()
 
@@ -136,9 +306,22 @@ def render(form_id: int):
                                 "cursor-pointer"
                             )
 
+    @ui.refreshable
+    def form_image(img: str) -> None:
+        """Show a form image, zoomable if it has been tiled."""
+        dzi_url = deep_zoom_url(img)
+        if dzi_url:
+            deep_zoom_viewer(dzi_url)
+        else:
+            with ui.element("div").classes("w-full max-h-[60vh] overflow-x-hidden"):
+                ui.image(f"/images/{screen_image_path(img)}").classes(
+                    "w-full h-full object-contain"
+                )
+        ui.link("Open full-size image", f"/images/{img}", new_tab=True)
+
     def save_changes() -> None:
-        assert frm is not None, "Expected frm to be loaded"
-        assert original_frm is not None, "Expected original_frm to be loaded"
+        frm = state.form
+        original_frm = state.original
 
         try:
             with Session(engine) as session:
@@ -147,6 +330,7 @@ def render(form_id: int):
                     updated_form=frm,
                     original_form=original_frm,
                     change_reason="muster",
+                    audit_writer=audit_writer,
                 )
                 assert original_frm.id is not None
                 individual = get_individual_by_form(session, original_frm)
@@ -170,8 +354,21 @@ def render(form_id: int):
                     updated_individual=individual,
                     original_individual=original_individual,
                     change_reason="muster",
+                    audit_writer=audit_writer,
                 )
                 ui.notify("Changes saved", color="positive", position="center")
+            cache.invalidate(frm.id)  # type: ignore[arg-type]
+            state.mark_saved()
+        except StaleDataError:
+            # Read the latest version if the changes are discarded
+            cache.invalidate(frm.id)  # type: ignore[arg-type]
+            ui.notify(
+                """This form has been changed by someone else since you opened it.
+                No changes were saved. Discard your changes to load the latest
+                version.""",
+                color="negative",
+                position="center",
+            )
         except (ValueError, TypeError) as e:
             ui.notify(
                 f"Validation error: {str(e)}. No changes were saved.",
@@ -187,8 +384,72 @@ def render(form_id: int):
 
     def discard_changes() -> None:
         """Discard all changes made by user and reload all fields from the database."""
-        load_form(frm.id)  # type: ignore
-        create_inputs.refresh(fields_list, frm)
+        cache.invalidate(state.form.id)  # type: ignore[arg-type]
+        form = cache.get(state.form.id)  # type: ignore[arg-type]
+        if form is None:
+            ui.notify("This form no longer exists.", color="warning")
+            return
+        state.show(form)
+        create_inputs.refresh(fields_list, state.form)
+
+    def upcoming_images(form_ids: list[int]) -> list[str]:
+        """Prefetch forms into the cache, and return the URLs of their images."""
+        cache.prefetch(form_ids)
+        urls = []
+        for upcoming_id in form_ids:
+            form = cache.get(upcoming_id)
+            if form is None or not form.form_image:
+                continue
+            img = str(form.form_image)
+            if not deep_zoom_url(img):
+                urls.append(f"/images/{screen_image_path(img)}")
+        return urls
+
+    async def prefetch_next() -> None:
+        """Load the next forms in the queue, and their images, in the background."""
+        queue = await run.io_bound(state.load_queue)
+        show_queue_position()
+        start = state.index + 1
+        upcoming = queue[start : start + settings.prefetch_forms]
+        if upcoming:
+            preload_images(await run.io_bound(upcoming_images, upcoming))
+
+    def show_queue_position() -> None:
+        if state.queue is not None:
+            queue_label.text = f"Form {state.index + 1} of {len(state.queue)}"
+
+    async def move(delta: int) -> None:
+        """Show the form `delta` places along the queue, without leaving the page."""
+        queue = await run.io_bound(state.load_queue)
+        index = state.index + delta
+        if not 0 <= index < len(queue):
+            ui.notify("There are no more forms in this queue.", position="center")
+            return
+        if state.has_unsaved_changes():
+            ui.notify("Save or discard your changes first.", position="center")
+            return
+
+        next_id = queue[index]
+        form = cache.get(next_id)
+        if form is None:
+            ui.notify(f"Form {next_id} no longer exists.", color="warning")
+            queue.pop(index)
+            if delta < 0:
+                state.index -= 1
+            show_queue_position()
+            return
+
+        state.index = index
+        state.show(form)
+        heading.content = f"<h3 class='text-xl font-bold my-4'>ID: {next_id}</h2>"
+        show_queue_position()
+        create_inputs.refresh(fields_list, state.form)
+        form_image.refresh(str(state.form.form_image))
+        # Keep the address of the page pointing at the form, for reloading
+        ui.run_javascript(
+            f'history.replaceState(null, "", "/correct/{next_id}" + location.search)'
+        )
+        await prefetch_next()
 
     def confirm_discard() -> None:
         confirm_discard_dialog.close()
@@ -216,15 +477,11 @@ def render(form_id: int):
                 with ui.row().classes("w-full justify-between no-wrap"):
                     # Text fields
                     with ui.column().classes("full"):
-                        assert frm is not None
-                        create_inputs(fields_list, frm)
+                        create_inputs(fields_list, state.form)
 
         # Right column: image
         with ui.column().classes("w-3/4"):
-            assert frm is not None
-            img = str(frm.form_image)
-            with ui.element("div").classes("w-full max-h-[60vh] overflow-x-hidden"):
-                ui.image(f"/images/{img}").classes("w-full h-full object-contain")
+            form_image(str(state.form.form_image))
 
             with ui.row().classes("w-full justify-between"):
                 with ui.button(
@@ -239,3 +496,15 @@ def render(form_id: int):
                     on_click=lambda: save_changes(),
                 ).props("color=primary"):
                     ui.tooltip("Save all changes")
+                with ui.row().classes("gap-2"):
+                    with ui.button(
+                        "Previous", icon="arrow_back", on_click=lambda: move(-1)
+                    ).props("outline"):
+                        ui.tooltip("Previous form in the queue")
+                    with ui.button(
+                        "Next", icon="arrow_forward", on_click=lambda: move(1)
+                    ).props("outline"):
+                        ui.tooltip("Next form in the queue")
+
+    show_queue_position()
+    ui.timer(0.1, prefetch_next, once=True)
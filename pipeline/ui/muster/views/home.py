@@ -1,18 +1,75 @@
 from typing import Any
+from urllib.parse import urlencode
 
 from nicegui import ui
 from sqlmodel import Session
 
-from pipeline.database.helpers.form_b102r import get_forms
-from pipeline.database.helpers.individual import get_individuals
+from pipeline.database.helpers.form_b102r import get_form_page
+from pipeline.database.helpers.listing import IndividualRow, list_individuals
+from pipeline.database.helpers.statistics import (
+    DatabaseCounts,
+    DatabaseStatistics,
+    data_version,
+)
 from pipeline.database.init_db import engine
 from pipeline.ui.muster.views.css import home_css
 
+INDIVIDUALS_TAB = "individuals"
+FORMS_TAB = "frms"
 
-def render():
+# Rows of the unfiltered Individuals table, shared by every visitor and only
+# reloaded when the data has changed
+_individual_rows_cache: dict[str, Any] = {"version": None, "rows": []}
+
+
+def forms_summary(counts: DatabaseCounts) -> str:
+    """Describe the numbers of forms, e.g. "3672 Forms (3672 B102), 9 corrected"."""
+    summary = f"{counts.forms} Forms"
+    by_type = ", ".join(
+        f"{count} {form_type or 'unknown type'}"
+        for form_type, count in counts.forms_by_type.items()
+    )
+    if by_type:
+        summary += f" ({by_type})"
+    return f"{summary}, {counts.corrected_forms} corrected"
+
+
+def individual_row(person: IndividualRow) -> dict[str, Any]:
+    return {
+        "id": person.id,
+        "pdf_id": person.pdf_id or "",
+        "lastname": person.lastname or "",
+        "firstname": person.firstname or "",
+        "dob": person.dob.isoformat() if person.dob else "",
+        "army_number": person.army_number or "",
+        "num_forms": person.army_number or "",
+    }
+
+
+def individual_rows(search: str | None = None) -> list[dict[str, Any]]:
+    """Rows of the Individuals table, either all or those matching a search."""
+    with Session(engine) as session:
+        if search:
+            return [
+                individual_row(person) for person in list_individuals(session, search)
+            ]
+
+        version = data_version(session)
+        if version != _individual_rows_cache["version"]:
+            _individual_rows_cache["rows"] = [
+                individual_row(person) for person in list_individuals(session)
+            ]
+            _individual_rows_cache["version"] = version
+
+    # Copied, so that no table can change the cached list
+    return list(_individual_rows_cache["rows"])
+
+
+def render(statistics: DatabaseStatistics):
     """Create the Roll Review Centre (homepage correction dashboard)"""
 
     home_css()
+    counts = statistics.counts()
 
     # ----------------
     # Helper functions
@@ -21,18 +78,23 @@ def render():
     column_defaults = {"align": "left"}
 
     async def start_form_correction():
-        selected_rows: list[dict[str, Any]] = form_table.selected
+        selected_rows: list[dict[str, Any]] = tables[FORMS_TAB].selected
         if not selected_rows:
             ui.notify("Pick a form to correct.", position="center")
         else:
             row: dict[str, Any] = selected_rows[0]  # type: ignore
             form_id = row.get("id")
-            ui.navigate.to("/correct/%d" % form_id)
-
-    def update_form_table():
+            # The correction page works through the forms in the table's order
+            table = tables[FORMS_TAB]
+            queue = {
+                "sort_by": table.pagination.get("sortBy") or "",
+                "descending": bool(table.pagination.get("descending")),
+            }
+            if table.filter:
+                queue["search"] = table.filter
+            ui.navigate.to(f"/correct/{form_id}?{urlencode(queue)}")
 
-        with Session(engine) as session:
-            frms = get_forms(session)
+    def update_form_table(search: str | None = None):
 
         columns = [
             {
@@ -62,35 +124,65 @@ def render():
             },
         ]
 
-        rows = [
-            {
-                "id": form.id,
-                "form_type": form.form_type or "",
-                "lastname": form.lastname or "",
-                "firstname": form.firstname or "",
-                "dob": form.dob or "",
-                "army_number": form.army_number or "",
-            }
-            for form in frms
-        ]
-
-        return (
+        # Setting rowsNumber makes the table ask the server for each page with a
+        # "request" event when it is sorted, paged or filtered, instead of holding
+        # every form itself
+        table = (
             ui.table(
                 columns=columns,
-                rows=rows,
+                rows=[],
                 column_defaults=column_defaults,
                 row_key="id",
                 selection="single",
-                pagination={"rowsPerPage": 10, "sortBy": "lastname", "page": 1},
+                pagination={
+                    "rowsPerPage": 10,
+                    "sortBy": "lastname",
+                    "descending": False,
+                    "page": 1,
+                    "rowsNumber": 0,
+                },
             )
             .classes("w-full database-table")
             .props("bordered")
         )
 
-    def update_individual_table():
+        table.filter = search
+        last_search: dict[str, str | None] = {"value": search}
+
+        def load_page(pagination: dict[str, Any], search: str | None) -> None:
+            if search != last_search["value"]:
+                # Show the best matches of a new search first, until a column is sorted
+                pagination = {
+                    **pagination,
+                    "page": 1,
+                    "sortBy": None if search else "lastname",
+                    "descending": False,
+                }
+                last_search["value"] = search
+            with Session(engine) as session:
+                rows, total = get_form_page(
+                    session,
+                    page=pagination["page"],
+                    rows_per_page=pagination["rowsPerPage"],
+                    sort_by=pagination.get("sortBy"),
+                    descending=bool(pagination.get("descending")),
+                    search=search,
+                )
+            table.rows = rows
+            table.pagination = {**pagination, "rowsNumber": total}
+
+        table.on(
+            "request",
+            lambda e: load_page(e.args["pagination"], e.args.get("filter")),
+            ["pagination", "filter"],
+        )
+        if search:
+            table.pagination = {**table.pagination, "sortBy": None}
+        load_page(table.pagination, search)
+
+        return table
 
-        with Session(engine) as session:
-            indivs = get_individuals(session)
+    def update_individual_table(search: str | None = None):
 
         columns = [
             {"name": "pdf_id", "label": "PDF ID", "field": "pdf_id", "sortable": True},
@@ -121,39 +213,65 @@ def render():
             # },
         ]
 
-        rows = [
-            {
-                "pdf_id": person.pdf_id or "",
-                "lastname": person.lastname or "",
-                "firstname": person.firstname or "",
-                "dob": person.dob.isoformat() if person.dob else "",
-                "army_number": person.army_number or "",
-                "num_forms": person.army_number or "",
-            }
-            for person in indivs
-        ]
-
         return (
             ui.table(
                 columns=columns,
-                rows=rows,
+                rows=individual_rows(search),
                 column_defaults=column_defaults,
                 row_key="id",
-                pagination={"rowsPerPage": 10, "sortBy": "lastname", "page": 1},
+                pagination={
+                    "rowsPerPage": 10,
+                    # Keep search results in order of relevance
+                    "sortBy": None if search else "lastname",
+                    "page": 1,
+                },
             )
             .classes("w-full database-table")
             .props("bordered")
         )
 
+    # Tables of the tabs that have been opened, by tab name
+    tables: dict[str, ui.table] = {}
+
+    def search():
+        text = search_input.value or None
+        if INDIVIDUALS_TAB in tables:
+            individual_table = tables[INDIVIDUALS_TAB]
+            individual_table.rows = individual_rows(text)
+            individual_table.pagination = {
+                **individual_table.pagination,
+                "page": 1,
+                "sortBy": None if text else "lastname",
+            }
+        if FORMS_TAB in tables:
+            # The form table fetches the first page of results itself
+            tables[FORMS_TAB].filter = text
+
+    def open_tab(name: str):
+        """Create the table of a tab the first time it is opened."""
+        if name in tables:
+            return
+        text = search_input.value or None
+        with table_containers[name]:
+            if name == INDIVIDUALS_TAB:
+                tables[name] = update_individual_table(text)
+            else:
+                tables[name] = update_form_table(text)
+
     # ---------------
     # Search bar
     # ---------------
     with ui.row().classes("w-full items-center gap-4"):
-        ui.input(placeholder="Search").classes("w-1/2 flex-grow").props(
-            "outlined clearable dense debounce=500"
+        search_input = (
+            ui.input(placeholder="Search", on_change=search)
+            .classes("w-1/2 flex-grow")
+            .props("outlined clearable dense debounce=500")
         )
-        with ui.button("Search", icon="search"):
-            ui.tooltip("Search for individuals")
+        with ui.button("Search", icon="search", on_click=search):
+            ui.tooltip(
+                "Search individuals and forms by name, army number, regiment, "
+                "occupation or hometown"
+            )
 
         ui.separator().props("vertical").classes("h-16")
 
@@ -171,23 +289,23 @@ def render():
             "align=left inline-label no-caps"
         ) as tabs
     ):
-        individuals = ui.tab(name="individuals", label="Individuals", icon="groups")
-        forms = ui.tab(name="frms", label="Forms", icon="view_list")
-    with ui.tab_panels(tabs, value=forms).classes("w-full"):
+        individuals = ui.tab(name=INDIVIDUALS_TAB, label="Individuals", icon="groups")
+        forms = ui.tab(name=FORMS_TAB, label="Forms", icon="view_list")
+    with ui.tab_panels(
+        tabs, value=FORMS_TAB, on_change=lambda e: open_tab(e.value)
+    ).classes("w-full"):
 
         # Individuals tab
         with ui.tab_panel(individuals):
-            ui.label("1403 Individuals")
+            ui.label(f"{counts.individuals} Individuals")
 
-            with ui.column().classes("w-full"):
-                update_individual_table()
+            individuals_container = ui.column().classes("w-full")
 
         # Forms tab
         with ui.tab_panel(forms):
-            ui.label("3672 Forms")
+            ui.label(forms_summary(counts))
 
-            with ui.column().classes("w-full"):
-                form_table = update_form_table()
+            forms_container = ui.column().classes("w-full")
 
             with ui.row().classes("w-full items-center gap-4"):
                 with (
@@ -200,3 +318,10 @@ def render():
                     .props("color=secondary")
                 ):
                     ui.tooltip("Start correction of selected form")
+
+    # Only the visible tab's table is created now; the other is created when opened
+    table_containers = {
+        INDIVIDUALS_TAB: individuals_container,
+        FORMS_TAB: forms_container,
+    }
+    open_tab(FORMS_TAB)
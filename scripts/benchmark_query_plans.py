@@ -0,0 +1,241 @@
+r"""
+Compare the query plans and timings of the hot-path queries without and with the
+indexes designed for them (revisions 3f9c2b7d8e14, c7e2a9f4d613 and 5d8e3b1f9a27).
+
+The database is copied into memory before any index is dropped or created, so it is
+never modified. Without --database, a synthetic database is generated instead.
+
+Example usage:
+
+$ PYTHONPATH=. python scripts/benchmark_query_plans.py
+$ PYTHONPATH=. python scripts/benchmark_query_plans.py --forms 50000
+$ PYTHONPATH=. python scripts/benchmark_query_plans.py --database socdyn_test_db.db
+"""
+
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Annotated, Any, Optional
+
+import typer
+from sqlalchemy import Connection, Engine, create_engine, insert, text, tuple_
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, col, select
+
+from pipeline.database.models import AuditLog, FormB102r, Individual
+
+# Schema before the hot-path indexes: only AuditLog's single-column indexes
+WITHOUT_INDEXES = [
+    "DROP INDEX IF EXISTS ix_individual_pdf_id",
+    "DROP INDEX IF EXISTS ix_individual_pdf_id_number",
+    "DROP INDEX IF EXISTS ix_formb102r_individual_id",
+    "DROP INDEX IF EXISTS ix_formb102r_lastname",
+    "DROP INDEX IF EXISTS ix_formb102r_army_number",
+    "DROP INDEX IF EXISTS ix_formb102r_form_image",
+    "DROP INDEX IF EXISTS ix_auditlog_table_name_record_id_timestamp",
+    "CREATE INDEX IF NOT EXISTS ix_auditlog_table_name ON auditlog (table_name)",
+    "CREATE INDEX IF NOT EXISTS ix_auditlog_record_id ON auditlog (record_id)",
+]
+
+WITH_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_individual_pdf_id ON individual (pdf_id)",
+    "CREATE INDEX IF NOT EXISTS ix_individual_pdf_id_number "
+    "ON individual (pdf_id_number)",
+    "CREATE INDEX IF NOT EXISTS ix_formb102r_individual_id "
+    "ON formb102r (individual_id)",
+    "CREATE INDEX IF NOT EXISTS ix_formb102r_lastname ON formb102r (lastname)",
+    "CREATE INDEX IF NOT EXISTS ix_formb102r_army_number ON formb102r (army_number)",
+    "CREATE INDEX IF NOT EXISTS ix_formb102r_form_image ON formb102r (form_image)",
+    "CREATE INDEX IF NOT EXISTS ix_auditlog_table_name_record_id_timestamp "
+    "ON auditlog (table_name, record_id, timestamp)",
+    "DROP INDEX IF EXISTS ix_auditlog_table_name",
+    "DROP INDEX IF EXISTS ix_auditlog_record_id",
+]
+
+LASTNAMES = ["Smith", "Jones", "Williams", "Brown", "Taylor", "Davies", "Evans"]
+FIRSTNAMES = ["John", "William", "George", "Thomas", "James", "Arthur", "Albert"]
+
+app = typer.Typer()
+
+
+def populate(engine: Engine, num_forms: int) -> None:
+    """Fill an empty database with synthetic individuals, forms and audit log rows."""
+    rng = random.Random(0)
+    num_individuals = max(1, num_forms // 3)
+    start = datetime(2025, 1, 1)
+
+    individuals = [
+        {
+            "id": i,
+            "pdf_id": f"APV{i:05d}",
+            "pdf_id_number": i,
+            "lastname": rng.choice(LASTNAMES),
+            "firstname": rng.choice(FIRSTNAMES),
+            "army_number": str(rng.randrange(100_000, 999_999)),
+        }
+        for i in range(1, num_individuals + 1)
+    ]
+    forms = []
+    for i in range(1, num_forms + 1):
+        individual = individuals[rng.randrange(num_individuals)]
+        forms.append(
+            {
+                "id": i,
+                "individual_id": individual["id"],
+                "form_image": f"{individual['pdf_id']}/{individual['pdf_id']}"
+                f"_page{i}_img1.jpg",
+                "source_filename": f"form_{i}.json",
+                "lastname": f"{individual['lastname']}{rng.randrange(1000)}",
+                "firstname": individual["firstname"],
+                "army_number": individual["army_number"],
+            }
+        )
+    changes = [
+        {
+            "table_name": "formb102r",
+            "record_id": rng.randrange(1, num_forms + 1),
+            "field_name": "lastname",
+            "old_value": '{"label": "old"}',
+            "new_value": '{"label": "new"}',
+            "timestamp": start + timedelta(minutes=i),
+        }
+        for i in range(num_forms * 5)
+    ]
+
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Individual), individuals)
+        conn.execute(insert(FormB102r), forms)
+        conn.execute(insert(AuditLog), changes)
+
+
+def hot_path_queries(conn: Connection) -> dict[str, str]:
+    """
+    Build the hot-path queries, with values taken from the middle of the database.
+
+    Args:
+        conn (Connection): Connection to the database.
+
+    Returns:
+        dict[str, str]: SQL of each query, keyed by a description of where it is run.
+    """
+    sample = conn.execute(
+        text(
+            "SELECT individual_id, army_number, form_image FROM formb102r ORDER BY id "
+            "LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM formb102r)"
+        )
+    ).one()
+    pdf_id, pdf_id_number = conn.execute(
+        text("SELECT pdf_id, pdf_id_number FROM individual WHERE id = :id"),
+        {"id": sample[0]},
+    ).one()
+
+    statements: dict[str, Any] = {
+        "Importer: individuals by pdf_id": select(Individual).where(
+            Individual.pdf_id == pdf_id
+        ),
+        "Browse database: page of individuals": select(Individual)
+        .where(
+            tuple_(col(Individual.pdf_id_number), col(Individual.id))
+            > tuple_(pdf_id_number, sample[0])
+        )
+        .order_by(col(Individual.pdf_id_number), col(Individual.id))
+        .limit(25),
+        "Relationship: forms of an individual": select(FormB102r).where(
+            FormB102r.individual_id == sample[0]
+        ),
+        "Home page: forms sorted by last name": select(FormB102r)
+        .order_by(col(FormB102r.lastname), col(FormB102r.id))
+        .offset(100)
+        .limit(10),
+        "Home page: forms by army number": select(FormB102r).where(
+            FormB102r.army_number == sample[1]
+        ),
+        "Importer: form by image": select(FormB102r.id).where(
+            col(FormB102r.form_image) == sample[2]
+        ),
+        "Audit history: changes to a form": select(AuditLog)
+        .where(AuditLog.table_name == "formb102r", AuditLog.record_id == sample[0])
+        .order_by(col(AuditLog.timestamp), col(AuditLog.id)),
+    }
+    return {
+        name: str(
+            statement.compile(
+                dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+            )
+        )
+        for name, statement in statements.items()
+    }
+
+
+def measure(conn: Connection, sql: str, repeat: int) -> tuple[list[str], float]:
+    """Return the query plan of a query, and its mean time in milliseconds."""
+    plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        conn.exec_driver_sql(sql).fetchall()
+    return plan, (time.perf_counter() - start_time) / repeat * 1000
+
+
+@app.command()
+def main(
+    database: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--database",
+            "-d",
+            help="SQLite database to benchmark. It is copied into memory and never "
+            "modified. Defaults to a synthetic database.",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    forms: Annotated[
+        int,
+        typer.Option(
+            "--forms", "-f", help="Number of forms in the synthetic database.", min=1
+        ),
+    ] = 20_000,
+    repeat: Annotated[
+        int,
+        typer.Option("--repeat", "-r", help="Number of runs of each query.", min=1),
+    ] = 100,
+):
+    """
+    Show the query plans and timings of the hot-path queries without and with the
+    indexes designed for them.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    if database is None:
+        typer.echo(f"Generating a synthetic database of {forms} forms...")
+        populate(engine, forms)
+    else:
+        raw_conn = engine.raw_connection()
+        with sqlite3.connect(database) as source:
+            source.backup(raw_conn.driver_connection)  # type: ignore[arg-type]
+
+    with engine.connect() as conn:
+        queries = hot_path_queries(conn)
+        results = {}
+        for label, ddl in (("Without", WITHOUT_INDEXES), ("With", WITH_INDEXES)):
+            for statement in ddl:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql("ANALYZE")
+            results[label] = {
+                name: measure(conn, sql, repeat) for name, sql in queries.items()
+            }
+
+    for name in queries:
+        typer.echo(typer.style(name, bold=True))
+        for label, measurements in results.items():
+            plan, ms = measurements[name]
+            typer.echo(f"  {label} indexes: {ms:.3f} ms")
+            for detail in plan:
+                typer.echo(f"    {detail}")
+
+
+if __name__ == "__main__":
+    app()
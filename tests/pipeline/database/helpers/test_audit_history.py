@@ -0,0 +1,177 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import Session, SQLModel, col, create_engine, update
+
+from pipeline.database.helpers.audit_history import (
+    create_snapshots,
+    reconstruct_record,
+    reconstruct_records,
+)
+from pipeline.database.helpers.audit_log import build_change, log_changes
+from pipeline.database.models import AuditSnapshot, FormB102r, Individual
+
+T0 = datetime(2025, 1, 1)
+T1 = datetime(2025, 1, 2)
+T2 = datetime(2025, 1, 3)
+T3 = datetime(2025, 1, 4)
+T4 = datetime(2025, 1, 5)
+
+
+def change(record_id, field_name, old_label, new_label, timestamp):
+    return build_change(
+        model_class=FormB102r,
+        record_id=record_id,
+        field_name=field_name,
+        old_label=old_label,
+        new_label=new_label,
+        timestamp=timestamp,
+    )
+
+
+@pytest.fixture
+def populated_session():
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Individual(id=1, pdf_id="APV01", created_at=T0))
+        # Current state, after the changes logged below
+        session.add(
+            FormB102r(
+                id=11,
+                individual_id=1,
+                lastname_raw="Aple",
+                lastname="Appel",
+                rank="Pte",
+                created_at=T0,
+            )
+        )
+        session.add(FormB102r(id=12, individual_id=1, lastname="Banana", created_at=T0))
+        log_changes(
+            session,
+            [
+                change(11, "lastname", "Aple", "Apple", T1),
+                change(11, "lastname", "Apple", "Appel", T3),
+                change(11, "rank", "", "Pte", T3),
+            ],
+        )
+        session.commit()
+        yield session
+
+
+class TestReconstructRecords:
+    def test_undoes_changes_from_current_state(self, populated_session):
+        at_t0 = reconstruct_record(populated_session, FormB102r, 11, T0)
+        at_t2 = reconstruct_record(populated_session, FormB102r, 11, T2)
+        at_t4 = reconstruct_record(populated_session, FormB102r, 11, T4)
+
+        assert (at_t0["lastname"], at_t0["rank"]) == ("Aple", "")
+        assert (at_t2["lastname"], at_t2["rank"]) == ("Apple", "")
+        assert (at_t4["lastname"], at_t4["rank"]) == ("Appel", "Pte")
+
+    def test_replays_changes_from_snapshot(self, populated_session):
+        # A snapshot is trusted as the state at its timestamp
+        populated_session.add(
+            AuditSnapshot(
+                table_name="formb102r",
+                record_id=11,
+                data=json.dumps(
+                    {"lastname": "Snapshot", "rank": "", "army_number": "1"}
+                ),
+                timestamp=T2,
+            )
+        )
+        populated_session.commit()
+
+        at_t2 = reconstruct_record(populated_session, FormB102r, 11, T2)
+        at_t4 = reconstruct_record(populated_session, FormB102r, 11, T4)
+        at_t0 = reconstruct_record(populated_session, FormB102r, 11, T0)
+
+        assert at_t2 == {"lastname": "Snapshot", "rank": "", "army_number": "1"}
+        assert at_t4 == {"lastname": "Appel", "rank": "Pte", "army_number": "1"}
+        # Before the snapshot, the state is rebuilt by undoing changes from it
+        assert at_t0["lastname"] == "Aple"
+
+    def test_undoes_changes_from_later_snapshot(self, populated_session):
+        # The current army number differs, so the state must start from the snapshot
+        snapshot_data = {"lastname": "Apple", "rank": "", "army_number": "1"}
+        populated_session.add(
+            AuditSnapshot(
+                table_name="formb102r",
+                record_id=11,
+                data=json.dumps(snapshot_data),
+                timestamp=T2,
+            )
+        )
+        populated_session.commit()
+
+        at_t0 = reconstruct_record(populated_session, FormB102r, 11, T0)
+        states = reconstruct_records(populated_session, FormB102r, T0)
+
+        assert at_t0 == {"lastname": "Aple", "rank": "", "army_number": "1"}
+        assert states[11] == at_t0
+        assert states[12]["lastname"] == "Banana"
+
+    def test_reconstructs_whole_table(self, populated_session):
+        states = reconstruct_records(populated_session, FormB102r, T2)
+
+        assert list(states) == [11, 12]
+        assert states[11]["lastname"] == "Apple"
+        assert states[12]["lastname"] == "Banana"
+
+    def test_omits_records_created_later(self, populated_session):
+        populated_session.add(FormB102r(id=13, individual_id=1, created_at=T3))
+        populated_session.add(
+            AuditSnapshot(table_name="formb102r", record_id=13, data="{}", timestamp=T4)
+        )
+        populated_session.add(FormB102r(id=14, individual_id=1))
+        populated_session.commit()
+        # As for forms created before created_at was added
+        populated_session.execute(
+            update(FormB102r).where(col(FormB102r.id) == 14).values(created_at=None)
+        )
+        populated_session.commit()
+
+        assert list(reconstruct_records(populated_session, FormB102r, T2)) == [
+            11,
+            12,
+            14,
+        ]
+        assert reconstruct_record(populated_session, FormB102r, 13, T2) is None
+        assert reconstruct_record(populated_session, FormB102r, 13, T4) is not None
+
+    def test_leaves_out_unaudited_fields(self, populated_session):
+        at_t2 = reconstruct_record(populated_session, FormB102r, 11, T2)
+        individual = reconstruct_record(populated_session, Individual, 1, T2)
+
+        assert {"version", "created_at", "source_sha256"}.isdisjoint(at_t2)
+        assert "lastname" in at_t2
+        assert "pdf_id_number" not in individual
+        assert individual["pdf_id"] == "APV01"
+
+    def test_accepts_timezone_aware_time(self, populated_session):
+        as_of = T2.replace(tzinfo=timezone.utc)
+        assert reconstruct_record(populated_session, FormB102r, 11, as_of) == (
+            reconstruct_record(populated_session, FormB102r, 11, T2)
+        )
+
+    def test_unknown_record_returns_none(self, populated_session):
+        assert reconstruct_record(populated_session, FormB102r, 99, T2) is None
+
+
+class TestCreateSnapshots:
+    def test_snapshots_only_changed_records(self, populated_session):
+        assert create_snapshots(populated_session, FormB102r) == 1
+        # Nothing has changed since the first snapshot
+        assert create_snapshots(populated_session, FormB102r) == 0
+        assert create_snapshots(populated_session, Individual) == 0
+
+        now = datetime.now(timezone.utc)
+        state = reconstruct_record(populated_session, FormB102r, 11, now)
+        assert (state["lastname"], state["rank"]) == ("Appel", "Pte")
+
+    def test_min_changes(self, populated_session):
+        assert create_snapshots(populated_session, FormB102r, min_changes=4) == 0
+        assert create_snapshots(populated_session, FormB102r, min_changes=3) == 1
@@ -3,7 +3,7 @@ from datetime import date
 import pytest
 from sqlmodel import Session, SQLModel, create_engine, select
 
-from pipeline.database.helpers.audit_log import log_change
+from pipeline.database.helpers.audit_log import build_change, log_change, log_changes
 from pipeline.database.models import AuditLog, FormB102r, Individual
 
 
@@ -75,3 +75,54 @@ class TestLogChange:
         assert row.old_value == '{"label": "01/01/1901"}'
         assert row.new_value == '{"label": "12/12/1910"}'
         assert row.change_reason == "test"
+
+
+class TestLogChanges:
+    def test_log_changes_inserts_all_rows(self, populated_session):
+        changes = [
+            build_change(
+                model_class=FormB102r,
+                record_id=11,
+                field_name="lastname",
+                old_label="Apple",
+                new_label="Acai",
+                change_reason="test",
+            ),
+            build_change(
+                model_class=FormB102r,
+                record_id=11,
+                field_name="rank_id",
+                old_label="Private",
+                new_label="Corporal",
+                old_id=1,
+                new_id=2,
+                change_reason="test",
+            ),
+        ]
+        log_changes(populated_session, changes)
+        populated_session.commit()
+
+        audit_rows = populated_session.exec(
+            select(AuditLog).order_by(AuditLog.id)
+        ).all()
+        assert [row.field_name for row in audit_rows] == ["lastname", "rank_id"]
+        assert audit_rows[1].field_type == "rank"
+        assert audit_rows[1].old_value == '{"label": "Private", "id": 1}'
+        assert audit_rows[1].new_value == '{"label": "Corporal", "id": 2}'
+
+    def test_log_changes_does_not_commit(self, populated_session):
+        change = build_change(
+            model_class=FormB102r,
+            record_id=12,
+            field_name="lastname",
+            old_label="Banana",
+            new_label="Bean",
+        )
+        log_changes(populated_session, [change])
+        populated_session.rollback()
+
+        assert populated_session.exec(select(AuditLog)).all() == []
+
+    def test_log_changes_with_no_changes(self, populated_session):
+        log_changes(populated_session, [])
+        assert populated_session.exec(select(AuditLog)).all() == []
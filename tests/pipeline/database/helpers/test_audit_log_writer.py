@@ -0,0 +1,117 @@
+import time
+from itertools import pairwise
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from pipeline.database.helpers.audit_log import build_change
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
+from pipeline.database.models import AuditLog, FormB102r
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # The writer uses its own connection, so the database must be shared on disk
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def make_changes(num_changes: int) -> list[dict]:
+    return [
+        build_change(
+            model_class=FormB102r,
+            record_id=1,
+            field_name="lastname",
+            old_label=f"Name {i}",
+            new_label=f"Name {i + 1}",
+        )
+        for i in range(num_changes)
+    ]
+
+
+def count_audit_rows(engine) -> int:
+    with Session(engine) as session:
+        return len(session.exec(select(AuditLog)).all())
+
+
+def wait_for_rows(engine, num_rows: int, timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while count_audit_rows(engine) < num_rows and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return count_audit_rows(engine)
+
+
+class TestAuditLogWriter:
+    def test_stop_drains_queue(self, engine):
+        writer = AuditLogWriter(engine, flush_interval=60, flush_size=1000)
+        writer.start()
+        writer.submit(make_changes(5))
+        writer.stop()
+
+        assert not writer.running
+        assert count_audit_rows(engine) == 5
+
+    def test_flushes_when_batch_is_full(self, engine):
+        writer = AuditLogWriter(engine, flush_interval=60, flush_size=3)
+        writer.start()
+        try:
+            writer.submit(make_changes(4))
+            assert wait_for_rows(engine, 3) == 3
+        finally:
+            writer.stop()
+        assert count_audit_rows(engine) == 4
+
+    def test_flushes_after_interval(self, engine):
+        writer = AuditLogWriter(engine, flush_interval=0.05, flush_size=1000)
+        writer.start()
+        try:
+            writer.submit(make_changes(2))
+            assert wait_for_rows(engine, 2) == 2
+        finally:
+            writer.stop()
+
+    def test_failed_batch_retried_with_backoff(self, engine, monkeypatch):
+        writer = AuditLogWriter(engine, flush_interval=0.01, flush_size=2)
+        attempts: list[tuple[int, float]] = []
+        write = writer._write
+
+        def failing_write(batch):
+            attempts.append((len(batch), time.monotonic()))
+            return len(attempts) > 3 and write(batch)
+
+        monkeypatch.setattr(writer, "_write", failing_write)
+        writer.start()
+        try:
+            writer.submit(make_changes(5))
+            assert wait_for_rows(engine, 5) == 5
+        finally:
+            writer.stop()
+
+        # Rows queued while the first batch failed are not added to it
+        assert [size for size, _ in attempts[:4]] == [2, 2, 2, 2]
+        times = [timestamp for _, timestamp in attempts[:4]]
+        for retry, (before, after) in enumerate(pairwise(times)):
+            assert after - before >= 0.01 * 2**retry
+
+    def test_full_queue_written_by_submit(self, engine, monkeypatch):
+        writer = AuditLogWriter(engine, flush_interval=0.01, flush_size=2, max_queued=2)
+        monkeypatch.setattr(writer, "_write", lambda batch: False)
+        writer.start()
+        try:
+            writer.submit(make_changes(5))
+            # At most 2 rows are queued and 2 in the failing batch
+            assert count_audit_rows(engine) >= 1
+        finally:
+            writer.stop()
+
+    def test_submit_when_not_running_raises(self, engine):
+        writer = AuditLogWriter(engine)
+        with pytest.raises(RuntimeError):
+            writer.submit(make_changes(1))
+
+    def test_invalid_flush_size_raises(self, engine):
+        with pytest.raises(ValueError):
+            AuditLogWriter(engine, flush_size=0)
+        with pytest.raises(ValueError):
+            AuditLogWriter(engine, flush_size=10, max_queued=5)
@@ -0,0 +1,268 @@
+import copy
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from pipeline.database.helpers.audit_log_writer import AuditLogWriter
+from pipeline.database.helpers.form_b102r import (
+    get_form_page,
+    get_form_queue,
+    save_form_with_log,
+)
+from pipeline.database.models import AuditLog, FormB102r, Individual
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Individual(id=1, pdf_id="APV01"))
+        session.add(
+            FormB102r(
+                id=11,
+                individual_id=1,
+                lastname_raw="Aple",
+                lastname="Aple",
+                firstname="John",
+            )
+        )
+        session.commit()
+    return engine
+
+
+def load_form_pair(engine, form_id: int) -> tuple[FormB102r, FormB102r]:
+    """Load a form and a copy of it, as the correction page does."""
+    with Session(engine) as session:
+        form = session.get(FormB102r, form_id)
+    assert form is not None
+    return form, copy.deepcopy(form)
+
+
+class TestSaveFormWithLog:
+    def test_changes_saved_and_logged_in_one_commit(self, engine):
+        updated, original = load_form_pair(engine, 11)
+        updated.lastname = "Apple"
+        updated.rank = "Pte"
+
+        commits = []
+        with Session(engine) as session:
+            event.listen(session, "after_commit", commits.append)
+            save_form_with_log(
+                session,
+                updated_form=updated,
+                original_form=original,
+                change_reason="test",
+                session_id="abc",
+            )
+
+        assert len(commits) == 1
+        with Session(engine) as session:
+            form = session.get(FormB102r, 11)
+            assert form.lastname == "Apple"
+            assert form.rank == "Pte"
+            assert form.lastname_raw == "Aple"
+
+            audit_rows = session.exec(
+                select(AuditLog).order_by(AuditLog.field_name)
+            ).all()
+        assert [row.field_name for row in audit_rows] == ["lastname", "rank"]
+        assert all(row.record_id == 11 for row in audit_rows)
+        assert all(row.session_id == "abc" for row in audit_rows)
+        # All changes from one save share a timestamp
+        assert audit_rows[0].timestamp == audit_rows[1].timestamp
+
+    def test_changes_queued_on_audit_writer(self, engine):
+        updated, original = load_form_pair(engine, 11)
+        updated.lastname = "Apple"
+        writer = AuditLogWriter(engine)
+        writer.start()
+
+        with Session(engine) as session:
+            save_form_with_log(
+                session,
+                updated_form=updated,
+                original_form=original,
+                audit_writer=writer,
+            )
+        writer.stop()
+
+        with Session(engine) as session:
+            audit_rows = session.exec(select(AuditLog)).all()
+            assert session.get(FormB102r, 11).lastname == "Apple"
+        assert [row.field_name for row in audit_rows] == ["lastname"]
+
+    def test_no_changes_logs_nothing(self, engine):
+        updated, original = load_form_pair(engine, 11)
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        with Session(engine) as session:
+            save_form_with_log(session, updated_form=updated, original_form=original)
+            assert statements == []
+            assert session.exec(select(AuditLog)).all() == []
+
+    def test_only_changed_columns_updated(self, engine):
+        updated, original = load_form_pair(engine, 11)
+        updated.lastname = "Apple"
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        with Session(engine) as session:
+            save_form_with_log(session, updated_form=updated, original_form=original)
+
+        form_statements = [sql for sql in statements if "formb102r" in sql]
+        assert form_statements == [
+            "UPDATE formb102r SET version=?, lastname=? "
+            "WHERE formb102r.id = ? AND formb102r.version = ?"
+        ]
+        assert updated.version == 2
+
+    def test_saves_in_a_row(self, engine):
+        updated, original = load_form_pair(engine, 11)
+        updated.lastname = "Apple"
+        with Session(engine) as session:
+            save_form_with_log(session, updated_form=updated, original_form=original)
+
+            # As the correction page does, compare later changes with the saved form
+            original = copy.deepcopy(updated)
+            updated.lastname = "Apples"
+            save_form_with_log(session, updated_form=updated, original_form=original)
+
+        with Session(engine) as session:
+            form = session.get(FormB102r, 11)
+            assert (form.lastname, form.version) == ("Apples", 3)
+
+    def test_concurrent_save_rejected(self, engine):
+        first, first_original = load_form_pair(engine, 11)
+        second, second_original = load_form_pair(engine, 11)
+        first.lastname = "Apple"
+        second.firstname = "Jack"
+
+        with Session(engine) as session:
+            save_form_with_log(
+                session, updated_form=first, original_form=first_original
+            )
+            with pytest.raises(StaleDataError):
+                save_form_with_log(
+                    session, updated_form=second, original_form=second_original
+                )
+
+        with Session(engine) as session:
+            form = session.get(FormB102r, 11)
+            assert (form.lastname, form.firstname) == ("Apple", "John")
+            audit_rows = session.exec(select(AuditLog)).all()
+        assert [row.field_name for row in audit_rows] == ["lastname"]
+        assert second.version == 1
+
+
+@pytest.fixture
+def forms_session(engine):
+    with Session(engine) as session:
+        for form_id, lastname, army_number in [
+            (12, "Cherry", "300"),
+            (13, "Banana", "200"),
+            (14, None, "400"),
+            (15, "Banana", None),
+        ]:
+            session.add(
+                FormB102r(
+                    id=form_id,
+                    individual_id=1,
+                    lastname=lastname,
+                    army_number=army_number,
+                )
+            )
+        session.commit()
+        yield session
+
+
+class TestGetFormPage:
+    def test_pages_sorted_by_lastname_then_id(self, forms_session):
+        first, total = get_form_page(forms_session, rows_per_page=2)
+        second, _ = get_form_page(forms_session, page=2, rows_per_page=2)
+        third, _ = get_form_page(forms_session, page=3, rows_per_page=2)
+
+        assert total == 5
+        assert [row["id"] for row in first + second + third] == [14, 11, 13, 15, 12]
+        assert first[0] == {
+            "id": 14,
+            "form_type": "",
+            "lastname": "",
+            "firstname": "",
+            "dob": "",
+            "army_number": "400",
+        }
+
+    def test_descending(self, forms_session):
+        rows, _ = get_form_page(forms_session, sort_by="army_number", descending=True)
+        assert [row["id"] for row in rows] == [14, 12, 13, 15, 11]
+
+    def test_all_rows(self, forms_session):
+        rows, total = get_form_page(forms_session, rows_per_page=0, sort_by=None)
+        assert [row["id"] for row in rows] == [11, 12, 13, 14, 15]
+        assert total == 5
+
+    def test_search_prefixes_ignoring_case(self, forms_session):
+        rows, total = get_form_page(forms_session, search="BAN")
+        assert [row["id"] for row in rows] == [13, 15]
+        assert total == 2
+
+        rows, total = get_form_page(forms_session, search="30")
+        assert [row["id"] for row in rows] == [12]
+        assert total == 1
+
+        # Substrings that don't start a word don't match
+        assert get_form_page(forms_session, search="anan") == ([], 0)
+
+    def test_search_columns_not_shown(self, forms_session):
+        form = forms_session.get(FormB102r, 12)
+        form.hometown = "Leeds"
+        forms_session.commit()
+
+        rows, _ = get_form_page(forms_session, search="lee")
+        assert [row["id"] for row in rows] == [12]
+
+    def test_search_ranked_without_sort(self, forms_session):
+        form = forms_session.get(FormB102r, 15)
+        form.firstname = "Banana"
+        forms_session.commit()
+
+        rows, _ = get_form_page(forms_session, search="banana", sort_by=None)
+        # Matching in two columns ranks form 15 first
+        assert [row["id"] for row in rows] == [15, 13]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"sort_by": "lastname_raw"}, {"page": 0}, {"rows_per_page": -1}],
+    )
+    def test_invalid_arguments(self, forms_session, kwargs):
+        with pytest.raises(ValueError):
+            get_form_page(forms_session, **kwargs)
+
+
+class TestGetFormQueue:
+    def test_queue_in_table_order(self, forms_session):
+        assert get_form_queue(forms_session) == [14, 11, 13, 15, 12]
+        assert get_form_queue(
+            forms_session, sort_by="army_number", descending=True
+        ) == [14, 12, 13, 15, 11]
+
+    def test_search(self, forms_session):
+        assert get_form_queue(forms_session, search="ban") == [13, 15]
+        assert get_form_queue(forms_session, search="anan") == []
+
+    def test_invalid_sort(self, forms_session):
+        with pytest.raises(ValueError):
+            get_form_queue(forms_session, sort_by="lastname_raw")
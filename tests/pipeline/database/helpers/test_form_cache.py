@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from pipeline.database.helpers.form_cache import FormCache
+from pipeline.database.models import FormB102r, Individual
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Individual(id=1, pdf_id="APV01"))
+        for form_id in range(11, 16):
+            session.add(
+                FormB102r(id=form_id, individual_id=1, lastname=f"Name{form_id}")
+            )
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def queries(engine):
+    """Count the queries run on the engine."""
+    count = {"value": 0}
+
+    def count_query(*args):
+        count["value"] += 1
+
+    event.listen(engine, "before_cursor_execute", count_query)
+    yield count
+    event.remove(engine, "before_cursor_execute", count_query)
+
+
+class TestFormCache:
+    def test_prefetched_forms_need_no_queries(self, engine, queries):
+        cache = FormCache(engine)
+        cache.prefetch([11, 12, 13])
+        assert queries["value"] == 1
+
+        assert cache.get(12).lastname == "Name12"
+        assert queries["value"] == 1
+
+        # Cached forms aren't read again
+        cache.prefetch([12, 13])
+        assert queries["value"] == 1
+
+    def test_get_returns_copies(self, engine):
+        cache = FormCache(engine)
+        form = cache.get(11)
+        form.lastname = "Changed"
+
+        assert cache.get(11).lastname == "Name11"
+
+    def test_least_recently_used_evicted(self, engine):
+        cache = FormCache(engine, capacity=2)
+        cache.get(11)
+        cache.get(12)
+        cache.get(11)
+        cache.prefetch([13])
+
+        assert 11 in cache and 13 in cache
+        assert 12 not in cache
+        assert len(cache) == 2
+
+    def test_invalidate(self, engine):
+        cache = FormCache(engine)
+        cache.get(11)
+        with Session(engine) as session:
+            form = session.get(FormB102r, 11)
+            form.lastname = "Saved"
+            session.commit()
+
+        assert cache.get(11).lastname == "Name11"
+        cache.invalidate(11)
+        assert cache.get(11).lastname == "Saved"
+
+    def test_missing_form(self, engine):
+        cache = FormCache(engine)
+        assert cache.get(99) is None
+        assert 99 not in cache
+
+    def test_invalid_capacity(self, engine):
+        with pytest.raises(ValueError):
+            FormCache(engine, capacity=0)
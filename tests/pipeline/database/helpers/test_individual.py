@@ -1,7 +1,11 @@
 import pytest
 from sqlmodel import Session, SQLModel, create_engine
 
-from pipeline.database.helpers.individual import get_individuals
+from pipeline.database.helpers.individual import (
+    get_individuals,
+    pdf_id_sort_key,
+    save_individual_with_log,
+)
 from pipeline.database.models import Individual
 
 
@@ -12,10 +16,8 @@ def populated_session():
 
     # At this stage in project all PDFs have "APV" prefix
     test_individuals = [
-        Individual(pdf_id=None),
-        Individual(pdf_id="APV001118621"),
-        Individual(pdf_id="APV900031890"),
-        Individual(pdf_id="APV002036895"),
+        Individual(pdf_id=pdf_id, pdf_id_number=pdf_id_sort_key(pdf_id))
+        for pdf_id in (None, "APV001118621", "APV900031890", "APV002036895")
     ]
     with Session(engine) as session:
         session.add_all(test_individuals)
@@ -32,3 +34,30 @@ class TestGetIndividuals:
             "APV002036895",
             "APV900031890",
         ]
+
+
+class TestPdfIdSortKey:
+    def test_numeric_part(self):
+        assert pdf_id_sort_key("APV002036895") == 2036895
+        assert pdf_id_sort_key("APV9") == 9
+
+    def test_no_numeric_part(self):
+        assert pdf_id_sort_key(None) == 0
+        assert pdf_id_sort_key("APV") == 0
+        assert pdf_id_sort_key("APV12a") == 0
+        assert pdf_id_sort_key("XYZ12") == 0
+
+
+class TestSaveIndividualWithLog:
+    def test_pdf_id_number_follows_pdf_id(self, populated_session):
+        original = get_individuals(populated_session)[1]
+        populated_session.expunge(original)
+        updated = original.model_copy(update={"pdf_id": "APV999999999"})
+
+        save_individual_with_log(
+            populated_session, updated_individual=updated, original_individual=original
+        )
+
+        result = get_individuals(populated_session)
+        assert result[-1].pdf_id == "APV999999999"
+        assert result[-1].pdf_id_number == 999999999
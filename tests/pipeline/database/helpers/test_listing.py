@@ -0,0 +1,149 @@
+from datetime import date
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from pipeline.database.helpers.listing import (
+    FormRow,
+    IndividualRow,
+    iter_rows,
+    list_forms,
+    list_individuals,
+)
+from pipeline.database.models import FormB102r, Individual
+
+
+@pytest.fixture
+def populated_session():
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            [
+                Individual(
+                    id=11,
+                    pdf_id="APV10",
+                    pdf_id_number=10,
+                    lastname="Smith",
+                    firstname="John",
+                ),
+                Individual(
+                    id=12,
+                    pdf_id="APV9",
+                    pdf_id_number=9,
+                    lastname="Smythe",
+                    army_number="12345",
+                    dob=date(1900, 1, 2),
+                ),
+                Individual(
+                    id=13,
+                    pdf_id="APV11",
+                    pdf_id_number=11,
+                    lastname="Jones",
+                    firstname="Smith",
+                ),
+                FormB102r(id=21, individual_id=11, lastname="Smith", form_type="B102"),
+                FormB102r(id=22, individual_id=12, lastname="Smythe"),
+                FormB102r(id=23, individual_id=11, lastname="Brown"),
+            ]
+        )
+        session.commit()
+        yield session
+
+
+class TestListIndividuals:
+    def test_sorted_by_pdf_id_number(self, populated_session):
+        rows = list_individuals(populated_session)
+
+        assert [row.pdf_id for row in rows] == ["APV9", "APV10", "APV11"]
+        assert rows[0] == IndividualRow(
+            id=12,
+            pdf_id="APV9",
+            pdf_id_number=9,
+            lastname="Smythe",
+            firstname=None,
+            army_number="12345",
+            dob=date(1900, 1, 2),
+        )
+        # Rows are not tracked by the session
+        assert not populated_session.identity_map
+
+    def test_keyset_pages(self, populated_session):
+        populated_session.add(Individual(id=10, pdf_id="APV10", pdf_id_number=10))
+        populated_session.commit()
+
+        first = list_individuals(populated_session, limit=2)
+        second = list_individuals(populated_session, after=first[-1], limit=2)
+        last = list_individuals(populated_session, after=second[-1], limit=2)
+
+        # Individuals with the same number are ordered by id
+        assert [row.id for row in first] == [12, 10]
+        assert [row.id for row in second] == [11, 13]
+        assert last == []
+
+    def test_invalid_arguments(self, populated_session):
+        first = list_individuals(populated_session)[0]
+        with pytest.raises(ValueError):
+            list_individuals(populated_session, "smith", after=first)
+        with pytest.raises(ValueError):
+            list_individuals(populated_session, limit=0)
+
+    def test_search_prefixes(self, populated_session):
+        def ids(search):
+            return [row.id for row in list_individuals(populated_session, search)]
+
+        assert ids("sm") == [11, 12, 13]
+        assert ids("123") == [12]
+        # Every word must match
+        assert ids("smith jo") == [11, 13]
+        assert ids("  -- ") == []
+
+    def test_search_follows_corrections(self, populated_session):
+        individual = populated_session.get(Individual, 13)
+        individual.lastname = "Brown"
+        populated_session.commit()
+        assert [row.id for row in list_individuals(populated_session, "bro")] == [13]
+
+        populated_session.delete(individual)
+        populated_session.commit()
+        assert list_individuals(populated_session, "bro") == []
+
+
+class TestListForms:
+    def test_sorted_by_lastname(self, populated_session):
+        rows = list_forms(populated_session)
+
+        assert [row.id for row in rows] == [23, 21, 22]
+        assert rows[1] == FormRow(
+            id=21,
+            individual_id=11,
+            form_type="B102",
+            lastname="Smith",
+            firstname=None,
+            dob=None,
+            army_number=None,
+        )
+
+    def test_forms_of_individual(self, populated_session):
+        rows = list_forms(populated_session, individual_id=11)
+        assert [row.id for row in rows] == [23, 21]
+
+
+class TestIterRows:
+    def test_streams_columns_in_batches(self, populated_session):
+        rows = iter_rows(
+            populated_session, Individual, ["pdf_id", "lastname"], batch_size=2
+        )
+        assert next(rows) == ("APV10", "Smith")
+        assert list(rows) == [("APV9", "Smythe"), ("APV11", "Jones")]
+
+    def test_only_given_records(self, populated_session):
+        rows = iter_rows(populated_session, Individual, ["pdf_id"], record_ids=[13, 11])
+        assert list(rows) == [("APV10",), ("APV11",)]
+
+    def test_invalid_arguments(self, populated_session):
+        with pytest.raises(ValueError):
+            iter_rows(populated_session, Individual, ["pdf_id", "b102rs_raw"])
+        with pytest.raises(ValueError):
+            iter_rows(populated_session, Individual, ["pdf_id"], batch_size=0)
@@ -0,0 +1,143 @@
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from pipeline.database.helpers.audit_log import build_change, log_changes
+from pipeline.database.helpers.statistics import (
+    DatabaseStatistics,
+    count_records,
+    data_version,
+)
+from pipeline.database.models import FormB102r, Individual
+from pipeline.tasks.db_import_b102r import update_b102r_record
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'statistics.db'}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Individual(id=1, pdf_id="APV01"))
+        session.add(Individual(id=2, pdf_id="APV02"))
+        session.add(FormB102r(id=11, individual_id=1, form_type="B102"))
+        session.add(FormB102r(id=12, individual_id=1, form_type="B102"))
+        session.add(FormB102r(id=13, individual_id=2))
+        log_changes(
+            session,
+            [
+                build_change(
+                    model_class=FormB102r,
+                    record_id=record_id,
+                    field_name="lastname",
+                    old_label="",
+                    new_label="Smith",
+                )
+                for record_id in (11, 11, 13)
+            ],
+        )
+        session.commit()
+    return engine
+
+
+def add_individual(engine):
+    with Session(engine) as session:
+        session.add(Individual(pdf_id="APV03"))
+        session.commit()
+
+
+class TestCountRecords:
+    def test_counts(self, engine):
+        with Session(engine) as session:
+            counts = count_records(session)
+
+        assert counts.individuals == 2
+        assert counts.forms == 3
+        assert counts.forms_by_type == {"B102": 2, "": 1}
+        assert counts.corrected_forms == 2
+        assert counts.uncorrected_forms == 1
+
+    def test_reimported_forms_are_not_corrected(self, engine):
+        with Session(engine) as session:
+            form = session.get(FormB102r, 12)
+            update_b102r_record(
+                session,
+                form,
+                {
+                    "lastname_raw": "Jones",
+                    "lastname": "Jones",
+                    "source_filename": "APV01.json",
+                },
+            )
+            session.commit()
+
+            counts = count_records(session)
+
+        assert counts.corrected_forms == 2
+        assert counts.uncorrected_forms == 1
+
+    def test_empty_database(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        SQLModel.metadata.create_all(engine)
+
+        with Session(engine) as session:
+            counts = count_records(session)
+
+        assert (counts.individuals, counts.forms, counts.corrected_forms) == (0, 0, 0)
+        assert counts.forms_by_type == {}
+
+
+class TestDataVersion:
+    def test_changes_with_data(self, engine):
+        with Session(engine) as session:
+            version = data_version(session)
+            assert data_version(session) == version
+
+            session.delete(session.get(FormB102r, 12))
+            session.commit()
+            after_delete = data_version(session)
+            assert after_delete != version
+
+            log_changes(
+                session,
+                [
+                    build_change(
+                        model_class=Individual,
+                        record_id=1,
+                        field_name="lastname",
+                        old_label="",
+                        new_label="Smith",
+                    )
+                ],
+            )
+            session.commit()
+            assert data_version(session) != after_delete
+
+    def test_empty_database(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        SQLModel.metadata.create_all(engine)
+
+        with Session(engine) as session:
+            assert data_version(session) == (0, 0, 0, 0, 0)
+
+
+class TestDatabaseStatistics:
+    def test_counts_cached_until_invalidated(self, engine):
+        statistics = DatabaseStatistics(engine, ttl=3600)
+        assert statistics.counts().individuals == 2
+
+        add_individual(engine)
+        assert statistics.counts().individuals == 2
+
+        statistics.invalidate()
+        assert statistics.counts().individuals == 3
+
+    def test_counts_expire(self, engine):
+        statistics = DatabaseStatistics(engine, ttl=0)
+        assert statistics.counts().individuals == 2
+
+        add_individual(engine)
+        assert statistics.counts().individuals == 3
+
+    def test_negative_ttl(self, engine):
+        with pytest.raises(ValueError):
+            DatabaseStatistics(engine, ttl=-1)
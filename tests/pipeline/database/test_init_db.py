@@ -0,0 +1,45 @@
+from sqlalchemy import text
+
+from pipeline.database.init_db import create_sqlite_engine, sqlite_pragmas
+from pipeline.ui.config import settings
+
+
+def read_pragma(engine, name: str):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+class TestCreateSqliteEngine:
+    def test_default_profile(self, tmp_path):
+        engine = create_sqlite_engine(tmp_path / "test.db")
+
+        assert read_pragma(engine, "journal_mode") == "wal"
+        assert read_pragma(engine, "synchronous") == 1  # NORMAL
+        assert read_pragma(engine, "cache_size") == settings.sqlite_cache_size
+        assert read_pragma(engine, "temp_store") == 2  # MEMORY
+        assert read_pragma(engine, "busy_timeout") == settings.sqlite_busy_timeout
+
+    def test_bulk_load_profile(self, tmp_path):
+        engine = create_sqlite_engine(tmp_path / "test.db", bulk_load=True)
+
+        assert read_pragma(engine, "journal_mode") == "wal"
+        assert read_pragma(engine, "synchronous") == 0  # OFF
+        assert read_pragma(engine, "cache_size") == (
+            settings.sqlite_bulk_load_cache_size
+        )
+
+    def test_only_bulk_load_engine_begins_transactions(self, tmp_path):
+        engine = create_sqlite_engine(tmp_path / "test.db")
+        bulk_load_engine = create_sqlite_engine(tmp_path / "test.db", bulk_load=True)
+
+        with engine.connect() as conn:
+            assert conn.connection.driver_connection.isolation_level == ""
+        with bulk_load_engine.begin() as conn:
+            assert conn.connection.driver_connection.isolation_level is None
+            assert conn.connection.driver_connection.in_transaction
+
+    def test_pragmas_follow_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "sqlite_synchronous", "FULL")
+
+        assert sqlite_pragmas()["synchronous"] == "FULL"
+        assert sqlite_pragmas(bulk_load=True)["synchronous"] == "OFF"
@@ -1,8 +1,23 @@
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
 import pytest
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from pipeline.database.helpers.audit_history import reconstruct_record
+from pipeline.database.init_db import enable_sqlite_savepoints
+from pipeline.database.models import AuditLog, FormB102r, Individual
+from pipeline.tasks import db_import_b102r
+from pipeline.tasks.db_import_b102r import (
+    get_or_create_individual,
+    import_all_in_dir,
+    load_individual_index,
+    parse_b102r_file,
+)
 
-from pipeline.database.models import FormB102r, Individual
-from pipeline.tasks.db_import_b102r import get_or_create_individual
+JSON_DIR = Path("tests/data/public/json")
 
 
 @pytest.fixture
@@ -21,6 +36,7 @@ class TestGetOrCreateIndividual:
         )
 
         assert result.pdf_id == "APV0001"
+        assert result.pdf_id_number == 1
         assert result.lastname == "Smith"
         assert result.firstname == "John"
 
@@ -38,3 +54,249 @@ class TestGetOrCreateIndividual:
         )
 
         assert result.id == ind.id
+
+
+@pytest.fixture
+def import_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    enable_sqlite_savepoints(engine)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(db_import_b102r, "bulk_load_engine", engine)
+    return engine
+
+
+def count_rows(engine, model) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+
+class TestImportAllInDir:
+    def test_imports_all_files(self, import_engine):
+        num_files = len(list(JSON_DIR.glob("*.json")))
+
+        num_imported = import_all_in_dir(JSON_DIR, batch_size=3)
+
+        assert num_imported == num_files
+        assert count_rows(import_engine, FormB102r) == num_files
+        # Forms from the same PDF share an Individual
+        with Session(import_engine) as session:
+            pdf_ids = session.exec(select(Individual.pdf_id)).all()
+        assert len(pdf_ids) == len(set(pdf_ids))
+        assert "APV010" in pdf_ids
+
+    def test_failed_file_does_not_roll_back_batch(self, import_engine, tmp_path):
+        input_dir = tmp_path / "json"
+        input_dir.mkdir()
+        good_files = sorted(JSON_DIR.glob("*.json"))[:3]
+        for file in good_files:
+            shutil.copy(file, input_dir)
+        (input_dir / "APV02_page1_img1_b102r.jpg_1.qas.json").write_text("{broken")
+
+        num_imported = import_all_in_dir(input_dir, batch_size=10)
+
+        assert num_imported == len(good_files)
+        assert count_rows(import_engine, FormB102r) == len(good_files)
+
+    def test_parallel_parsing_matches_sequential(self, import_engine, tmp_path):
+        input_dir = tmp_path / "json"
+        shutil.copytree(JSON_DIR, input_dir)
+        (input_dir / "APV02_page1_img1_b102r.jpg_1.qas.json").write_text("{broken")
+
+        num_imported = import_all_in_dir(input_dir, batch_size=4, workers=2)
+
+        expected = [
+            parse_b102r_file(file)["form_image"]
+            for file in sorted(JSON_DIR.glob("*.json"))
+        ]
+        assert num_imported == len(expected)
+        # Forms are written in filename order
+        with Session(import_engine) as session:
+            stmt = select(FormB102r.form_image).order_by(FormB102r.id)
+            assert session.exec(stmt).all() == expected
+
+    def test_reimport_skips_unchanged_files(self, import_engine):
+        num_files = import_all_in_dir(JSON_DIR)
+
+        assert import_all_in_dir(JSON_DIR) == 0
+        assert import_all_in_dir(JSON_DIR, workers=2) == 0
+        assert count_rows(import_engine, FormB102r) == num_files
+
+    def test_reimport_updates_changed_file_in_place(self, import_engine, tmp_path):
+        input_dir = tmp_path / "json"
+        shutil.copytree(JSON_DIR, input_dir)
+        json_path = input_dir / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+        num_files = import_all_in_dir(input_dir)
+
+        with Session(import_engine) as session:
+            form = session.exec(
+                select(FormB102r).where(FormB102r.source_filename == json_path.name)
+            ).one()
+            form_id = form.id
+            form.firstname = "Corrected"
+            session.add(form)
+            session.commit()
+
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        model_data = next(iter(data["models"].values()))
+        model_data["questions"]["B102r_1_Last_name"]["answer"] = "Newname"
+        model_data["questions"]["B102r_2_First_name"]["answer"] = "Newfirst"
+        json_path.write_text(json.dumps(data), encoding="utf-8")
+
+        assert import_all_in_dir(input_dir) == 1
+
+        assert count_rows(import_engine, FormB102r) == num_files
+        with Session(import_engine) as session:
+            form = session.get(FormB102r, form_id)
+            assert form.lastname_raw == "Newname"
+            assert form.lastname == "Newname"
+            assert form.firstname_raw == "Newfirst"
+            # Corrections made during review are kept
+            assert form.firstname == "Corrected"
+            # Saves of corrections to the old version are rejected
+            assert form.version == 2
+
+    def test_reimport_logs_changes(self, import_engine, tmp_path):
+        input_dir = tmp_path / "json"
+        shutil.copytree(JSON_DIR, input_dir)
+        json_path = input_dir / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+        import_all_in_dir(input_dir)
+        with Session(import_engine) as session:
+            form = session.exec(
+                select(FormB102r).where(FormB102r.source_filename == json_path.name)
+            ).one()
+            form_id, old_lastname = form.id, form.lastname
+        before_reimport = datetime.now(timezone.utc)
+
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        model_data = next(iter(data["models"].values()))
+        model_data["questions"]["B102r_1_Last_name"]["answer"] = "Newname"
+        json_path.write_text(json.dumps(data), encoding="utf-8")
+        import_all_in_dir(input_dir)
+
+        with Session(import_engine) as session:
+            changes = session.exec(
+                select(AuditLog).where(AuditLog.record_id == form_id)
+            ).all()
+            assert {change.field_name for change in changes} == {
+                "lastname",
+                "lastname_raw",
+            }
+            assert {change.change_reason for change in changes} == {"import"}
+
+            before = reconstruct_record(session, FormB102r, form_id, before_reimport)
+            after = reconstruct_record(
+                session, FormB102r, form_id, datetime.now(timezone.utc)
+            )
+            assert before is not None and before["lastname"] == old_lastname
+            assert after is not None and after["lastname"] == "Newname"
+
+    def test_reimport_without_data_changes(self, import_engine, tmp_path):
+        input_dir = tmp_path / "json"
+        shutil.copytree(JSON_DIR, input_dir)
+        json_path = input_dir / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+        import_all_in_dir(input_dir)
+        with Session(import_engine) as session:
+            form = session.exec(
+                select(FormB102r).where(FormB102r.source_filename == json_path.name)
+            ).one()
+            form_id, old_sha256 = form.id, form.source_sha256
+
+        # Same answers, different bytes
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        json_path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+        assert import_all_in_dir(input_dir) == 1
+
+        with Session(import_engine) as session:
+            form = session.get(FormB102r, form_id)
+            assert form.source_sha256 != old_sha256
+            # Open correction pages are not made out of date
+            assert form.version == 1
+        assert count_rows(import_engine, AuditLog) == 0
+
+    def test_reimport_adopts_forms_without_source_file(self, import_engine):
+        json_path = JSON_DIR / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+        with Session(import_engine) as session:
+            individual = Individual(pdf_id="APV01")
+            form = FormB102r(
+                form_image="APV01/APV01_page8_img1_b102r.jpg", individual=individual
+            )
+            session.add(form)
+            session.commit()
+            form_id = form.id
+
+        num_imported = import_all_in_dir(JSON_DIR)
+
+        assert count_rows(import_engine, FormB102r) == num_imported
+        with Session(import_engine) as session:
+            form = session.get(FormB102r, form_id)
+            assert form.source_filename == json_path.name
+            assert form.source_sha256 is not None
+
+    def test_invalid_workers_raises(self, import_engine):
+        with pytest.raises(ValueError):
+            import_all_in_dir(JSON_DIR, workers=0)
+
+    def test_invalid_batch_size_raises(self, import_engine):
+        with pytest.raises(ValueError):
+            import_all_in_dir(JSON_DIR, batch_size=0)
+
+    def test_matches_individuals_from_earlier_runs(self, import_engine):
+        with Session(import_engine) as session:
+            session.add(Individual(pdf_id="APV010", lastname="Existing"))
+            session.commit()
+
+        import_all_in_dir(JSON_DIR)
+
+        with Session(import_engine) as session:
+            individuals = session.exec(
+                select(Individual).where(Individual.pdf_id == "APV010")
+            ).all()
+            assert len(individuals) == 1
+            assert individuals[0].lastname == "Existing"
+            assert len(individuals[0].b102rs) == 2
+
+
+class TestParseB102rFile:
+    def test_parse_b102r_file(self):
+        json_path = JSON_DIR / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+
+        fields = parse_b102r_file(json_path)
+
+        assert fields["form_image"] == "APV01/APV01_page8_img1_b102r.jpg"
+        assert fields["lastname"] == fields["lastname_raw"]
+        assert FormB102r(**fields).form_image == fields["form_image"]
+        assert fields["source_filename"] == json_path.name
+        assert len(fields["source_sha256"]) == 64
+
+    def test_parse_b102r_file_skips_known_hash(self):
+        json_path = JSON_DIR / "APV01_page8_img1_b102r.jpg_644894.qas.json"
+        sha256 = parse_b102r_file(json_path)["source_sha256"]
+
+        assert parse_b102r_file(json_path, known_sha256=sha256) is None
+        assert parse_b102r_file(json_path, known_sha256="0" * 64) is not None
+
+
+class TestIndividualIndex:
+    def test_load_individual_index(self, session):
+        session.add(Individual(pdf_id="APV0001"))
+        session.add(Individual(pdf_id="APV0001"))
+        session.add(Individual(pdf_id="APV0002"))
+        session.add(Individual(pdf_id=None))
+        session.commit()
+
+        index = load_individual_index(session)
+
+        assert sorted(index) == ["APV0001", "APV0002"]
+        assert len(index["APV0001"]) == 2
+
+    def test_get_or_create_individual_uses_index(self, session):
+        index = load_individual_index(session)
+        form = FormB102r(lastname_raw="Smith", firstname_raw="John")
+        filename = "APV0003_page8_img1_b102r.jpg_644894.qas.json"
+
+        created = get_or_create_individual(session, form, filename, index)
+        found = get_or_create_individual(session, form, filename, index)
+
+        assert created.id is not None
+        assert index["APV0003"] == [created]
+        assert found is created
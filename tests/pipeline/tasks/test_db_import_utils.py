@@ -3,6 +3,7 @@ from pathlib import Path
 
 import pytest
 
+from pipeline.tasks.utils import db_import_utils
 from pipeline.tasks.utils.db_import_utils import get_image_path, load_json_data
 
 
@@ -29,6 +30,14 @@ def test_load_json_data(tmp_path: Path):
     assert result == test_data
 
 
+def test_load_json_data_without_orjson(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(db_import_utils, "orjson", None)
+    test_data = {"key": "välue", "nested": {"a": 1, "b": 2}}
+    test_file = tmp_path / "sample.json"
+    test_file.write_text(json.dumps(test_data), encoding="utf-8")
+    assert load_json_data(test_file) == test_data
+
+
 def test_load_json_data_missing_file(tmp_path: Path):
     missing_file = tmp_path / "missing.json"
     with pytest.raises(FileNotFoundError):
@@ -1,10 +1,17 @@
 import re
+import zlib
 from pathlib import Path
 
+import pikepdf
 import pytest
 from PIL import Image, UnidentifiedImageError
 
+from pipeline.tasks import pdf_processing
+from pipeline.tasks.image_processing import save_resized_widths
 from pipeline.tasks.pdf_processing import (
+    extract_and_thumbnail_dir,
+    extract_and_thumbnail_pdf,
+    extract_compressed_image,
     extract_images_from_dir,
     extract_images_from_pdf,
 )
@@ -78,6 +85,43 @@ class TestExtractImagesFromPdf:
             extract_images_from_pdf(fake_file, output_dir)
 
 
+class TestExtractCompressedImage:
+    def test_jpeg_bytes_match_pikepdf_extraction(self, sample_pdf: Path, tmp_path):
+        with pikepdf.open(sample_pdf) as pdf:
+            raw_image = next(iter(pdf.pages[0].images.values()))
+            assert isinstance(raw_image, pikepdf.Stream)
+            pdf_image = pikepdf.PdfImage(raw_image)
+            if pdf_image.filters[-1] != "/DCTDecode":
+                pytest.skip(f"First image in {sample_pdf.name} is not a JPEG")
+
+            result = extract_compressed_image(pdf_image, tmp_path / "fast")
+            expected = pdf_image.extract_to(fileprefix=str(tmp_path / "slow"))
+
+        assert result is not None
+        assert result == tmp_path / "fast.jpg"
+        assert result.read_bytes() == Path(expected).read_bytes()
+
+    def test_returns_none_for_non_jpeg_image(self, tmp_path: Path):
+        pdf = pikepdf.new()
+        stream = pikepdf.Stream(pdf, zlib.compress(b"\x00" * 16))
+        stream.Type = pikepdf.Name.XObject
+        stream.Subtype = pikepdf.Name.Image
+        stream.Width, stream.Height = 4, 4
+        stream.ColorSpace = pikepdf.Name.DeviceGray
+        stream.BitsPerComponent = 8
+        stream.Filter = pikepdf.Name.FlateDecode
+
+        result = extract_compressed_image(pikepdf.PdfImage(stream), tmp_path / "img")
+
+        assert result is None
+        assert not any(tmp_path.iterdir())
+
+    def test_logs_passthrough_method(self, sample_pdf: Path, tmp_path, caplog):
+        with caplog.at_level("DEBUG", logger="pipeline.tasks.pdf_processing"):
+            extract_images_from_pdf(sample_pdf, tmp_path)
+        assert "Method: passthrough" in caplog.text
+
+
 class TestExtractImagesFromDir:
     def test_all_pdfs_are_processed(
         self, pdf_dir: Path, output_dir: Path, images_result_from_dir
@@ -100,8 +144,6 @@ class TestExtractImagesFromDir:
         mixed_dir = tmp_path / "mixed"
         mixed_dir.mkdir()
 
-        import pikepdf
-
         valid_pdf_path = mixed_dir / "valid.pdf"
         with pikepdf.new() as pdf:
             pdf.save(valid_pdf_path)
@@ -111,10 +153,97 @@ class TestExtractImagesFromDir:
         output_dir = tmp_path / "output"
         output_dir.mkdir()
 
-        from pipeline.tasks.pdf_processing import extract_images_from_dir
-
         result = extract_images_from_dir(mixed_dir, output_dir)
 
         assert set(result.keys()) == {
             valid_pdf_path
         }, "Non-PDFs should not be processed"
+
+    def test_parallel_matches_sequential(self, pdf_dir: Path, tmp_path: Path):
+        sequential = extract_images_from_dir(pdf_dir, tmp_path / "sequential")
+        parallel = extract_images_from_dir(pdf_dir, tmp_path / "parallel", workers=2)
+
+        assert list(parallel.keys()) == list(sequential.keys())
+        for pdf, images in sequential.items():
+            assert [p.name for p in parallel[pdf]] == [p.name for p in images]
+
+    def test_raises_if_workers_less_than_one(self, pdf_dir: Path, tmp_path: Path):
+        with pytest.raises(ValueError, match="at least 1"):
+            extract_images_from_dir(pdf_dir, tmp_path, workers=0)
+
+    def test_skips_unchanged_pdfs_on_rerun(self, pdf_dir: Path, tmp_path: Path):
+        first = extract_images_from_dir(pdf_dir, tmp_path)
+        mtimes = {p: p.stat().st_mtime_ns for images in first.values() for p in images}
+
+        second = extract_images_from_dir(pdf_dir, tmp_path)
+
+        assert second == first
+        for path, mtime in mtimes.items():
+            assert path.stat().st_mtime_ns == mtime, f"{path} was re-extracted"
+
+    def test_no_resume_re_extracts_pdfs(self, pdf_dir: Path, tmp_path: Path):
+        first = extract_images_from_dir(pdf_dir, tmp_path)
+        mtimes = {p: p.stat().st_mtime_ns for images in first.values() for p in images}
+
+        second = extract_images_from_dir(pdf_dir, tmp_path, resume=False)
+
+        assert second == first
+        for path, mtime in mtimes.items():
+            assert path.stat().st_mtime_ns != mtime, f"{path} was not re-extracted"
+
+
+class TestExtractAndThumbnail:
+    def test_images_match_extract_images(self, sample_pdf: Path, tmp_path: Path):
+        fused = extract_and_thumbnail_pdf(sample_pdf, tmp_path / "fused")
+        separate = extract_images_from_pdf(sample_pdf, tmp_path / "separate")
+
+        assert [p.name for p in fused] == [p.name for p in separate]
+        for fused_path, separate_path in zip(fused, separate, strict=True):
+            assert fused_path.read_bytes() == separate_path.read_bytes()
+
+    def test_thumbnails_created_for_each_width(self, sample_pdf: Path, tmp_path):
+        result = extract_and_thumbnail_pdf(sample_pdf, tmp_path, widths=[150, 300])
+
+        assert result, f"No images extracted from {sample_pdf.name}"
+        for image, thumbnails in result.items():
+            assert [p.parent for p in thumbnails] == [tmp_path / "thumbnails"] * 2
+            for width, thumbnail in zip([150, 300], thumbnails, strict=True):
+                assert thumbnail.name == f"{image.stem}_w{width}px{image.suffix}"
+                with Image.open(thumbnail) as img:
+                    assert img.width == width
+
+    def test_bad_image_does_not_stop_pdf(self, sample_pdf, tmp_path, monkeypatch):
+        expected = extract_and_thumbnail_pdf(sample_pdf, tmp_path / "expected")
+        first_image = next(iter(expected)).name
+
+        def resize(img, filename, *args):
+            if filename == first_image:
+                raise ValueError("Broken image")
+            return save_resized_widths(img, filename, *args)
+
+        monkeypatch.setattr(pdf_processing, "save_resized_widths", resize)
+        result = extract_and_thumbnail_pdf(sample_pdf, tmp_path / "result")
+
+        assert [p.name for p in result] == [p.name for p in expected][1:]
+
+    def test_dir_skips_non_pdf_files(self, sample_pdf, tmp_path, caplog):
+        mixed_dir = tmp_path / "mixed"
+        mixed_dir.mkdir()
+        valid_pdf_path = mixed_dir / sample_pdf.name
+        valid_pdf_path.write_bytes(sample_pdf.read_bytes())
+        (mixed_dir / "notes.txt").write_text("hello world")
+        (mixed_dir / "corrupt.pdf").write_bytes(b"not a PDF")
+
+        result = extract_and_thumbnail_dir(mixed_dir, tmp_path / "output")
+
+        assert list(result) == [valid_pdf_path]
+        skipped = [r for r in caplog.records if "non-PDF" in r.getMessage()]
+        assert len(skipped) == 2
+
+    def test_dir_parallel_matches_sequential(self, pdf_dir: Path, tmp_path: Path):
+        sequential = extract_and_thumbnail_dir(pdf_dir, tmp_path / "sequential")
+        parallel = extract_and_thumbnail_dir(pdf_dir, tmp_path / "parallel", workers=2)
+
+        assert list(parallel.keys()) == list(sequential.keys())
+        for pdf, images in sequential.items():
+            assert [p.name for p in parallel[pdf]] == [p.name for p in images]
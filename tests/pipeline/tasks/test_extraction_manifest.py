@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pipeline.tasks.utils.extraction_manifest import (
+    MANIFEST_FILENAME,
+    append_manifest_entry,
+    build_manifest_entry,
+    load_manifest,
+    match_manifest_entry,
+)
+
+
+@pytest.fixture
+def extracted(tmp_path: Path) -> tuple[Path, Path, dict]:
+    pdf = tmp_path / "APV01.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake pdf content")
+    output_dir = tmp_path / "output"
+    image = output_dir / "APV01" / "APV01_page1_img1.jpg"
+    image.parent.mkdir(parents=True)
+    image.write_bytes(b"fake jpeg content")
+    entry = build_manifest_entry(pdf, [image], output_dir)
+    return pdf, output_dir, entry
+
+
+def test_build_manifest_entry(extracted):
+    pdf, output_dir, entry = extracted
+    assert entry["pdf"] == "APV01.pdf"
+    assert entry["size"] == pdf.stat().st_size
+    assert len(entry["sha256"]) == 64
+    assert [img["path"] for img in entry["images"]] == [
+        str(Path("APV01") / "APV01_page1_img1.jpg")
+    ]
+
+
+def test_load_manifest_later_entries_win_and_bad_lines_ignored(extracted):
+    _, output_dir, entry = extracted
+    append_manifest_entry(output_dir, {**entry, "size": 1})
+    append_manifest_entry(output_dir, entry)
+    with (output_dir / MANIFEST_FILENAME).open("a") as f:
+        f.write('{"pdf": "APV02.pdf", "si')  # Truncated by a crash
+
+    manifest = load_manifest(output_dir)
+    assert manifest == {"APV01.pdf": entry}
+
+
+def test_match_unchanged(extracted):
+    pdf, output_dir, entry = extracted
+    assert match_manifest_entry(pdf, entry, output_dir) is entry
+
+
+def test_match_touched_but_same_content(extracted):
+    pdf, output_dir, entry = extracted
+    os.utime(pdf, ns=(entry["mtime_ns"] + 10**9, entry["mtime_ns"] + 10**9))
+    result = match_manifest_entry(pdf, entry, output_dir)
+    assert result is not None
+    assert result["mtime_ns"] == pdf.stat().st_mtime_ns
+
+
+def test_match_changed_content(extracted):
+    pdf, output_dir, entry = extracted
+    pdf.write_bytes(b"%PDF-1.4 other pdf content")
+    assert match_manifest_entry(pdf, entry, output_dir) is None
+
+
+def test_match_missing_image(extracted):
+    pdf, output_dir, entry = extracted
+    (output_dir / entry["images"][0]["path"]).unlink()
+    assert match_manifest_entry(pdf, entry, output_dir) is None
+
+
+def test_match_rewritten_image_checks_hash(extracted):
+    pdf, output_dir, entry = extracted
+    image = output_dir / entry["images"][0]["path"]
+    rewritten_ns = image.stat().st_mtime_ns + 10**9
+    image.write_bytes(b"fake jpeg CONTENT")  # Same size
+    os.utime(image, ns=(rewritten_ns, rewritten_ns))
+    assert match_manifest_entry(pdf, entry, output_dir) is None
+
+    image.write_bytes(b"fake jpeg content")
+    os.utime(image, ns=(rewritten_ns, rewritten_ns))
+    result = match_manifest_entry(pdf, entry, output_dir)
+    assert result is not None
+    assert result["images"][0]["mtime_ns"] == image.stat().st_mtime_ns
+
+
+def test_match_touched_pdf_checks_image_hashes(extracted):
+    pdf, output_dir, entry = extracted
+    image = output_dir / entry["images"][0]["path"]
+    mtime_ns = image.stat().st_mtime_ns
+    image.write_bytes(b"fake jpeg CONTENT")  # Same size and mtime
+    os.utime(image, ns=(mtime_ns, mtime_ns))
+    assert match_manifest_entry(pdf, entry, output_dir) is entry
+
+    os.utime(pdf, ns=(entry["mtime_ns"] + 10**9, entry["mtime_ns"] + 10**9))
+    assert match_manifest_entry(pdf, entry, output_dir) is None
@@ -2,12 +2,34 @@ from pathlib import Path
 
 import pytest
 from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
 
-from pipeline.tasks.image_processing import resize_image, resize_images_from_dir
+from pipeline.tasks.image_processing import (
+    resize_image,
+    resize_image_pyramid,
+    resize_images_from_dir,
+    resize_images_pyramid_from_dir,
+    save_resized_widths,
+)
 
 TARGET_DIMENSION = 150
 
 
+@pytest.fixture
+def draft_calls(monkeypatch) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """Record the size requested from each JPEG draft, and the size decoded."""
+    calls = []
+    draft = JpegImageFile.draft
+
+    def recording_draft(self, mode, size):
+        result = draft(self, mode, size)
+        calls.append((size, self.size))
+        return result
+
+    monkeypatch.setattr(JpegImageFile, "draft", recording_draft)
+    return calls
+
+
 # Returns a single image from the test data folder for testing
 @pytest.fixture(scope="module")
 def sample_image(image_dir: Path):
@@ -113,11 +135,82 @@ class TestResizeImageFromFile:
             expected_suffix
         ), f"Expected filename suffix '{expected_suffix}', got '{result.name}'"
 
+    def test_large_jpeg_resized_to_exact_size(self, tmp_path: Path, draft_calls: list):
+        # Large enough for the JPEG decoder to use a reduced scale
+        large_image = tmp_path / "large.jpg"
+        Image.new("RGB", (2400, 3300), color="white").save(large_image)
+
+        result = resize_image(large_image, tmp_path / "out", width=TARGET_DIMENSION)
+
+        with Image.open(result) as img:
+            assert img.size == (TARGET_DIMENSION, int(3300 * TARGET_DIMENSION / 2400))
+        # Decoded at 1/8 scale, the smallest still at least twice the target size
+        assert draft_calls == [((300, 412), (300, 413))]
+
+    def test_small_jpeg_not_drafted(self, tmp_path: Path, draft_calls: list):
+        small_image = tmp_path / "small.jpg"
+        Image.new("RGB", (200, 275), color="white").save(small_image)
+
+        resize_image(small_image, tmp_path / "out", width=TARGET_DIMENSION)
+
+        assert draft_calls == []
+
     def test_raises_if_no_dimensions_given(self, sample_image: Path, tmp_path: Path):
         with pytest.raises(ValueError, match="Specify one of width or height."):
             resize_image(sample_image, tmp_path, width=None, height=None)
 
 
+class TestSaveResizedWidths:
+    def test_matches_resize_image(self, sample_image: Path, tmp_path: Path):
+        with Image.open(sample_image) as img:
+            result = save_resized_widths(
+                img, sample_image.name, tmp_path / "in_memory", [TARGET_DIMENSION]
+            )
+        expected = resize_image(
+            sample_image, tmp_path / "from_file", width=TARGET_DIMENSION
+        )
+
+        assert [p.name for p in result] == [expected.name]
+        with Image.open(result[0]) as actual, Image.open(expected) as resized:
+            assert actual.size == resized.size
+
+
+class TestResizeImagePyramid:
+    def test_creates_each_width_in_given_order(
+        self, sample_image: Path, tmp_path: Path
+    ):
+        widths = [150, 600, 300]
+        result = resize_image_pyramid(sample_image, tmp_path, widths)
+
+        assert [p.name for p in result] == [
+            f"{sample_image.stem}_w{width}px{sample_image.suffix}" for width in widths
+        ]
+        for width, path in zip(widths, result, strict=True):
+            with Image.open(path) as img:
+                assert img.width == width
+
+    def test_sizes_match_resize_image(self, sample_image: Path, tmp_path: Path):
+        result = resize_image_pyramid(sample_image, tmp_path / "pyramid", [600, 150])
+        expected = resize_image(sample_image, tmp_path / "single", width=150)
+
+        with Image.open(result[1]) as actual, Image.open(expected) as resized:
+            assert actual.size == resized.size
+
+    def test_raises_if_no_widths_given(self, sample_image: Path, tmp_path: Path):
+        with pytest.raises(ValueError, match="at least one width"):
+            resize_image_pyramid(sample_image, tmp_path, [])
+
+    def test_from_dir_processes_all_images(self, image_dir: Path, tmp_path: Path):
+        result = resize_images_pyramid_from_dir(
+            image_dir, tmp_path, [150, 600], workers=2
+        )
+
+        assert result, f"No images resized from {image_dir}"
+        for resized in result.values():
+            assert len(resized) == 2
+            assert all(p.exists() for p in resized)
+
+
 class TestResizeImagesFromDir:
     def test_all_images_are_processed(
         self, image_dir: Path, output_img_dir: Path, resized_result_from_dir
@@ -141,6 +234,18 @@ class TestResizeImagesFromDir:
                     resized.exists()
                 ), f"{resized} was not created from {original.name}"
 
+    def test_parallel_matches_sequential(self, image_dir: Path, tmp_path: Path):
+        sequential = resize_images_from_dir(
+            image_dir, tmp_path / "sequential", width=TARGET_DIMENSION
+        )
+        parallel = resize_images_from_dir(
+            image_dir, tmp_path / "parallel", width=TARGET_DIMENSION, workers=2
+        )
+
+        assert list(parallel.keys()) == list(sequential.keys())
+        for original, resized in sequential.items():
+            assert [p.name for p in parallel[original]] == [p.name for p in resized]
+
     def test_skips_non_image_files(self, tmp_path: Path):
         mixed_dir = tmp_path / "mixed"
         mixed_dir.mkdir()
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from pipeline.tasks.tiling import (
+    TILE_SIZE,
+    create_deep_zoom,
+    create_deep_zoom_from_dir,
+)
+
+
+@pytest.fixture
+def sample_image(tmp_path: Path) -> Path:
+    path = tmp_path / "source" / "APV01" / "APV01_page1_img1.jpg"
+    path.parent.mkdir(parents=True)
+    Image.new("RGB", (600, 400), color="white").save(path)
+    return path
+
+
+class TestCreateDeepZoom:
+    def test_writes_dzi_descriptor(self, sample_image: Path, tmp_path: Path):
+        result = create_deep_zoom(sample_image, tmp_path / "tiles")
+
+        assert result == tmp_path / "tiles" / "APV01_page1_img1.dzi"
+        dzi = result.read_text()
+        assert f'TileSize="{TILE_SIZE}"' in dzi
+        assert '<Size Width="600" Height="400"/>' in dzi
+
+    def test_creates_every_level(self, sample_image: Path, tmp_path: Path):
+        create_deep_zoom(sample_image, tmp_path)
+        tiles_dir = tmp_path / "APV01_page1_img1_files"
+
+        # ceil(log2(600)) = 10, so levels 0 to 10
+        assert sorted(int(p.name) for p in tiles_dir.iterdir()) == list(range(11))
+
+        # Full size level is 3 x 2 tiles, with 1px overlap between neighbours
+        top_level = sorted(p.stem for p in (tiles_dir / "10").iterdir())
+        assert top_level == ["0_0", "0_1", "1_0", "1_1", "2_0", "2_1"]
+        with Image.open(tiles_dir / "10" / "1_1.jpg") as tile:
+            assert tile.size == (TILE_SIZE + 2, 400 - TILE_SIZE + 1)
+
+        # Lowest level is a single pixel
+        with Image.open(tiles_dir / "0" / "0_0.jpg") as tile:
+            assert tile.size == (1, 1)
+
+    def test_raises_on_non_image_file(self, tmp_path: Path):
+        not_image = tmp_path / "notes.txt"
+        not_image.write_text("not an image")
+        with pytest.raises(ValueError, match="notes.txt"):
+            create_deep_zoom(not_image, tmp_path)
+
+
+class TestCreateDeepZoomFromDir:
+    def test_mirrors_layout_and_skips_thumbnails(
+        self, sample_image: Path, tmp_path: Path
+    ):
+        source_dir = tmp_path / "source"
+        thumbnail = sample_image.parent / "thumbnails" / "APV01_page1_img1_w150px.jpg"
+        thumbnail.parent.mkdir()
+        Image.new("RGB", (150, 100)).save(thumbnail)
+
+        result = create_deep_zoom_from_dir(source_dir, tmp_path / "tiles")
+
+        assert result == {
+            sample_image: tmp_path / "tiles" / "APV01" / "APV01_page1_img1.dzi"
+        }